@@ -1,15 +1,16 @@
 from flask import Flask, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
+from db_config import configure_database
 from datetime import datetime
 import os
-import requests
+from http_client import upstream
 import graphene
+from graphql_cache import execute_query
 from graphene import ObjectType, String, Int, Field, List, DateTime
 from graphene_sqlalchemy import SQLAlchemyObjectType
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///event_approval.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+configure_database(app, 'sqlite:///event_approval.db')
 
 db = SQLAlchemy(app)
 
@@ -45,7 +46,7 @@ class ApproveEvent(graphene.Mutation):
         
         try:
             # Update status in add_event_service
-            update_response = requests.post(
+            update_response = upstream.post(
                 f"{ADD_EVENT_SERVICE}/api/events/{event_id}/update-status",
                 json={'status_approval': status}
             )
@@ -126,20 +127,7 @@ def graphql():
     if not data:
         return jsonify({"error": "No input data provided"}), 400
 
-    result = schema.execute(
-        data.get("query"),
-        variables=data.get("variables"),
-        operation_name=data.get("operationName"),
-        context_value=request,
-    )
-
-    response = {}
-    if result.errors:
-        response["errors"] = [str(e) for e in result.errors]
-    if result.data:
-        response["data"] = result.data
-
-    status_code = 200 if not result.errors else 400
+    response, status_code = execute_query(schema, data, context_value=request)
     return jsonify(response), status_code
 
 with app.app_context():
@@ -161,7 +149,7 @@ def approve_event():
     
     try:
         # Update status in add_event_service
-        update_response = requests.post(
+        update_response = upstream.post(
             f"{ADD_EVENT_SERVICE}/api/events/{event_id}/update-status",
             json={'status_approval': status}
         )
@@ -194,5 +182,9 @@ def get_approval_logs(event_id):
         } for log in logs
     ])
 
+@app.route('/metrics/upstreams', methods=['GET'])
+def upstream_metrics():
+    return jsonify(upstream.stats()), 200
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5010) 
\ No newline at end of file
@@ -1,10 +1,11 @@
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-import requests
+from http_client import upstream
 from datetime import datetime, timedelta
 import logging
 import os
 import graphene
+from graphql_cache import execute_query
 from graphene import ObjectType, String, Int, Field, List, Boolean
 
 app = Flask(__name__)
@@ -45,7 +46,7 @@ class Query(ObjectType):
     def resolve_calendar_events(self, info):
         try:
             # Fetch events from add_event_service
-            response = requests.get(f"{ADD_EVENT_SERVICE}/api/events")
+            response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events")
             if response.status_code != 200:
                 return []
 
@@ -142,20 +143,7 @@ def graphql():
     if not data:
         return jsonify({"error": "No input data provided"}), 400
 
-    result = schema.execute(
-        data.get("query"),
-        variables=data.get("variables"),
-        operation_name=data.get("operationName"),
-        context_value=request,
-    )
-
-    response = {}
-    if result.errors:
-        response["errors"] = [str(e) for e in result.errors]
-    if result.data:
-        response["data"] = result.data
-
-    status_code = 200 if not result.errors else 400
+    response, status_code = execute_query(schema, data, context_value=request)
     return jsonify(response), status_code
 
 def get_status_color(status):
@@ -183,7 +171,7 @@ def get_status_border_color(status):
 def get_calendar_events():
     try:
         # Fetch events from add_event_service
-        response = requests.get(f"{ADD_EVENT_SERVICE}/api/events")
+        response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events")
         if response.status_code != 200:
             return jsonify({'error': 'Failed to fetch events'}), 500
 
@@ -230,5 +218,9 @@ def get_calendar_events():
         logger.error(f"Error fetching calendar events: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics/upstreams', methods=['GET'])
+def upstream_metrics():
+    return jsonify(upstream.stats()), 200
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5013, debug=True)
+    app.run(host='0.0.0.0', port=5013)
@@ -0,0 +1,56 @@
+# ====================
+# Shared Gunicorn Config
+# ====================
+"""
+Production server settings, used by the Dockerfile CMD: gunicorn -c gunicorn.conf.py app:app
+
+Each worker process runs a pool of threads, so one slow request no longer
+blocks the other users of a service. The app is preloaded in the master,
+so module level work (db.create_all(), building the GraphQL schema, warming
+indexes) happens once before the workers are forked. The master closes the
+connections it opened while preloading before it forks, so no socket or
+SQLite handle is shared between processes.
+
+Port and sizing come from the environment (PORT and the GUNICORN_*
+variables below). `kill -HUP <master>` replaces the workers gracefully;
+since the code is preloaded, a code change needs a restart.
+
+This file is shared by every service; keep the copies identical.
+"""
+import multiprocessing
+import os
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', str(min(multiprocessing.cpu_count() * 2 + 1, 4))))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+preload_app = True
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+# Services call each other over pooled keep-alive connections (http_client.py)
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '15'))
+
+# Recycle workers now and then so slow leaks cannot build up; the jitter
+# keeps them from all restarting at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    # Runs in the master after preloading, before the first worker is forked
+    http_client = sys.modules.get('http_client')
+    if http_client is not None:
+        http_client.upstream.reset()
+
+    service = sys.modules.get('app')
+    db = getattr(service, 'db', None)
+    if db is not None:
+        with service.app.app_context():
+            db.engine.dispose()
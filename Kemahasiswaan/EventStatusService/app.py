@@ -1,7 +1,8 @@
 from flask import Flask, jsonify, request
-import requests
+from http_client import upstream
 import os
 import graphene
+from graphql_cache import execute_query
 from graphene import ObjectType, String, Int, Field, List
 
 app = Flask(__name__)
@@ -53,7 +54,7 @@ class Query(ObjectType):
     def resolve_event_status(self, info, event_id):
         try:
             # Get approval status from add_event_service
-            event_resp = requests.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
+            event_resp = upstream.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
             if event_resp.status_code != 200:
                 return None
             event = event_resp.json()
@@ -61,7 +62,7 @@ class Query(ObjectType):
 
             # Get booking status from RoomBookingStatusService
             try:
-                booking_resp = requests.get(f"{ROOM_BOOKING_STATUS_SERVICE}/api/room-booking-status/{event_id}")
+                booking_resp = upstream.get(f"{ROOM_BOOKING_STATUS_SERVICE}/api/room-booking-status/{event_id}")
                 if booking_resp.status_code == 200:
                     booking = booking_resp.json()
                     status_booking = booking.get('status_booking', 'Not Booked')
@@ -136,20 +137,7 @@ def graphql():
     if not data:
         return jsonify({"error": "No input data provided"}), 400
 
-    result = schema.execute(
-        data.get("query"),
-        variables=data.get("variables"),
-        operation_name=data.get("operationName"),
-        context_value=request,
-    )
-
-    response = {}
-    if result.errors:
-        response["errors"] = [str(e) for e in result.errors]
-    if result.data:
-        response["data"] = result.data
-
-    status_code = 200 if not result.errors else 400
+    response, status_code = execute_query(schema, data, context_value=request)
     return jsonify(response), status_code
 
 # Existing REST endpoints
@@ -186,7 +174,7 @@ def get_all_event_statuses():
 def get_event_status(event_id):
     # Get approval status from add_event_service
     try:
-        event_resp = requests.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
+        event_resp = upstream.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
         if event_resp.status_code != 200:
             return jsonify({'error': 'Event not found'}), 404
         event = event_resp.json()
@@ -196,7 +184,7 @@ def get_event_status(event_id):
 
     # Get booking status from RoomBookingStatusService
     try:
-        booking_resp = requests.get(f"{ROOM_BOOKING_STATUS_SERVICE}/api/room-booking-status/{event_id}")
+        booking_resp = upstream.get(f"{ROOM_BOOKING_STATUS_SERVICE}/api/room-booking-status/{event_id}")
         if booking_resp.status_code == 200:
             booking = booking_resp.json()
             status_booking = booking.get('status_booking', 'Not Booked')
@@ -215,5 +203,9 @@ def get_event_status(event_id):
         'keterangan_reject': keterangan_reject
     })
 
+@app.route('/metrics/upstreams', methods=['GET'])
+def upstream_metrics():
+    return jsonify(upstream.stats()), 200
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5011, debug=True) 
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5011) 
\ No newline at end of file
@@ -2,8 +2,9 @@ import os
 import logging
 from flask import Flask, jsonify, request
 from flask_cors import CORS
-import requests
+from http_client import upstream
 import graphene
+from graphql_cache import execute_query
 from graphene import ObjectType, String, Int, Field, List
 
 app = Flask(__name__)
@@ -16,6 +17,27 @@ ROOM_SERVICE_URL = os.getenv("ROOM_AVAILABILITY_SERVICE_URL", "http://room_avail
 # Konfigurasi logging
 logging.basicConfig(level=logging.DEBUG)
 
+def fetch_rooms(room_ids):
+    """Ambil detail banyak ruangan sekaligus dalam satu request ke room service."""
+    if not room_ids:
+        return {}
+    room_response = upstream.post(f"{ROOM_SERVICE_URL}/rooms/batch", json={'ids': list(room_ids)})
+    logging.debug(f"Respon dari room service untuk {len(room_ids)} room_id: {room_response.status_code}")
+    return room_response.json() if room_response.ok else {}
+
+def enrich_bookings_with_rooms(bookings):
+    rooms = fetch_rooms({booking.get('room_id') for booking in bookings if booking.get('room_id')})
+    for booking in bookings:
+        room_data = rooms.get(str(booking.get('room_id')))
+        if room_data:
+            booking.update({
+                'nama_ruangan': room_data.get('nama_ruangan'),
+                'kapasitas': room_data.get('kapasitas'),
+                'lokasi': room_data.get('lokasi'),
+                'keterangan_reject': booking.get('keterangan_reject', '')
+            })
+    return bookings
+
 # GraphQL Types
 class RoomType(ObjectType):
     room_id = Int()
@@ -38,30 +60,18 @@ class Query(ObjectType):
 
     def resolve_bookings(self, info):
         try:
-            booking_response = requests.get(f"{BOOKING_SERVICE_URL}/bookings")
+            booking_response = upstream.get(f"{BOOKING_SERVICE_URL}/bookings")
             if not booking_response.ok:
                 return []
             bookings = booking_response.json()
-            for booking in bookings:
-                room_id = booking.get('room_id')
-                if room_id:
-                    room_response = requests.get(f"{ROOM_SERVICE_URL}/rooms/{room_id}")
-                    if room_response.ok:
-                        room_data = room_response.json()
-                        booking.update({
-                            'nama_ruangan': room_data.get('nama_ruangan'),
-                            'kapasitas': room_data.get('kapasitas'),
-                            'lokasi': room_data.get('lokasi'),
-                            'keterangan_reject': booking.get('keterangan_reject', '')
-                        })
-            return bookings
+            return enrich_bookings_with_rooms(bookings)
         except Exception as e:
             logging.error(f"Error in resolve_bookings: {str(e)}")
             return []
 
     def resolve_booking(self, info, event_id):
         try:
-            booking_response = requests.get(f"{BOOKING_SERVICE_URL}/bookings")
+            booking_response = upstream.get(f"{BOOKING_SERVICE_URL}/bookings")
             if not booking_response.ok:
                 return None
             bookings = booking_response.json()
@@ -70,7 +80,7 @@ class Query(ObjectType):
                 return None
             room_id = booking.get('room_id')
             if room_id:
-                room_response = requests.get(f"{ROOM_SERVICE_URL}/rooms/{room_id}")
+                room_response = upstream.get(f"{ROOM_SERVICE_URL}/rooms/{room_id}")
                 if room_response.ok:
                     room_data = room_response.json()
                     booking.update({
@@ -135,20 +145,7 @@ def graphql():
     if not data:
         return jsonify({"error": "No input data provided"}), 400
 
-    result = schema.execute(
-        data.get("query"),
-        variables=data.get("variables"),
-        operation_name=data.get("operationName"),
-        context_value=request,
-    )
-
-    response = {}
-    if result.errors:
-        response["errors"] = [str(e) for e in result.errors]
-    if result.data:
-        response["data"] = result.data
-
-    status_code = 200 if not result.errors else 400
+    response, status_code = execute_query(schema, data, context_value=request)
     return jsonify(response), status_code
 
 # Existing REST endpoints
@@ -156,26 +153,13 @@ def graphql():
 def get_bookings():
     logging.debug("Mengakses endpoint /bookings")
     try:
-        booking_response = requests.get(f"{BOOKING_SERVICE_URL}/bookings")
+        booking_response = upstream.get(f"{BOOKING_SERVICE_URL}/bookings")
         logging.debug(f"Status code dari booking service: {booking_response.status_code}")
         logging.debug(f"Respon dari booking service: {booking_response.text}")
         if not booking_response.ok:
             return jsonify({"error": "Failed to fetch bookings"}), 500
         bookings = booking_response.json()
-        for booking in bookings:
-            room_id = booking.get('room_id')
-            if room_id:
-                room_response = requests.get(f"{ROOM_SERVICE_URL}/rooms/{room_id}")
-                logging.debug(f"Respon dari room service untuk room_id {room_id}: {room_response.status_code}")
-                if room_response.ok:
-                    room_data = room_response.json()
-                    booking.update({
-                        'nama_ruangan': room_data.get('nama_ruangan'),
-                        'kapasitas': room_data.get('kapasitas'),
-                        'lokasi': room_data.get('lokasi'),
-                        'keterangan_reject': booking.get('keterangan_reject', '')
-                    })
-        return jsonify(bookings)
+        return jsonify(enrich_bookings_with_rooms(bookings))
     except Exception as e:
         logging.error(f"Error: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -184,7 +168,7 @@ def get_bookings():
 def get_booking_by_event_id(event_id):
     logging.debug(f"Mengakses endpoint /bookings/{event_id}")
     try:
-        booking_response = requests.get(f"{BOOKING_SERVICE_URL}/bookings")
+        booking_response = upstream.get(f"{BOOKING_SERVICE_URL}/bookings")
         logging.debug(f"Status code dari booking service: {booking_response.status_code}")
         logging.debug(f"Respon dari booking service: {booking_response.text}")
         if not booking_response.ok:
@@ -195,7 +179,7 @@ def get_booking_by_event_id(event_id):
             return jsonify({"error": "Booking not found"}), 404
         room_id = booking.get('room_id')
         if room_id:
-            room_response = requests.get(f"{ROOM_SERVICE_URL}/rooms/{room_id}")
+            room_response = upstream.get(f"{ROOM_SERVICE_URL}/rooms/{room_id}")
             logging.debug(f"Respon dari room service untuk room_id {room_id}: {room_response.status_code}")
             if room_response.ok:
                 room_data = room_response.json()
@@ -210,5 +194,9 @@ def get_booking_by_event_id(event_id):
         logging.error(f"Error: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/metrics/upstreams', methods=['GET'])
+def upstream_metrics():
+    return jsonify(upstream.stats()), 200
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5012)
\ No newline at end of file
@@ -1,18 +1,21 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from db_config import configure_database
+from sqlalchemy.orm import load_only
 from datetime import datetime, timedelta
 import time
 import os
-import requests
+import json
+from http_client import upstream
 import logging
 import graphene
+from graphql_cache import execute_query
 from graphene import ObjectType, String, Int, Field, Mutation, List, Date
 from flask_cors import CORS
 
 app = Flask(__name__)
 CORS(app)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///add_event.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+configure_database(app, 'sqlite:///add_event.db')
 
 db = SQLAlchemy(app)
 
@@ -152,20 +155,7 @@ def graphql():
     if not data:
         return jsonify({"error": "No input data provided"}), 400
 
-    result = schema.execute(
-        data.get("query"),
-        variables=data.get("variables"),
-        operation_name=data.get("operationName"),
-        context_value=request,
-    )
-
-    response = {}
-    if result.errors:
-        response["errors"] = [str(e) for e in result.errors]
-    if result.data:
-        response["data"] = result.data
-
-    status_code = 200 if not result.errors else 400
+    response, status_code = execute_query(schema, data, context_value=request)
     return jsonify(response), status_code
 
 with app.app_context():
@@ -209,25 +199,99 @@ def add_event():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+EVENT_FIELDS = ('event_id', 'nama_event', 'deskripsi', 'tanggal_mulai', 'tanggal_selesai', 'status_approval')
+
+def serialize_event(event, fields=EVENT_FIELDS):
+    data = {}
+    for field in fields:
+        value = getattr(event, field)
+        data[field] = value.isoformat() if field in ('tanggal_mulai', 'tanggal_selesai') else value
+    return data
+
+def parse_event_ids(value):
+    """Accept a list of ids or a comma separated string of ids."""
+    if isinstance(value, str):
+        value = [item for item in value.split(',') if item.strip()]
+    return {int(item) for item in value}
+
+def parse_event_fields(value):
+    """Validate an optional field projection; event_id is always included."""
+    if not value:
+        return EVENT_FIELDS
+    if isinstance(value, str):
+        value = [item.strip() for item in value.split(',') if item.strip()]
+    unknown = [field for field in value if field not in EVENT_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return ('event_id',) + tuple(field for field in EVENT_FIELDS if field in value and field != 'event_id')
+
+def get_events_by_ids(event_ids, fields):
+    """Resolve many events with a single IN query, loading only the projected columns."""
+    if not event_ids:
+        return {}
+    columns = [getattr(Event, field) for field in fields]
+    events = Event.query.options(load_only(*columns)).filter(Event.event_id.in_(event_ids)).all()
+    return {str(event.event_id): serialize_event(event, fields) for event in events}
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+STREAM_CHUNK_SIZE = 500
+
+def wants_ndjson():
+    """Streaming is requested with ?stream=1 or Accept: application/x-ndjson."""
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+def stream_events(fields):
+    """Stream every event as one JSON object per line, reading rows in chunks with yield_per."""
+    columns = [getattr(Event, field) for field in fields]
+    query = Event.query.options(load_only(*columns)).order_by(Event.event_id)
+
+    def generate():
+        for event in query.yield_per(STREAM_CHUNK_SIZE):
+            yield json.dumps(serialize_event(event, fields)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
 @app.route('/api/events', methods=['GET'])
 def get_events():
     try:
+        if wants_ndjson() and 'ids' not in request.args:
+            try:
+                fields = parse_event_fields(request.args.get('fields'))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return stream_events(fields)
+
+        if 'ids' in request.args:
+            try:
+                event_ids = parse_event_ids(request.args['ids'])
+                fields = parse_event_fields(request.args.get('fields'))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+            return jsonify(get_events_by_ids(event_ids, fields)), 200
+
         events = Event.query.all()
-        event_list = [
-            {
-                'event_id': e.event_id,
-                'nama_event': e.nama_event,
-                'deskripsi': e.deskripsi,
-                'tanggal_mulai': e.tanggal_mulai.isoformat(),
-                'tanggal_selesai': e.tanggal_selesai.isoformat(),
-                'status_approval': e.status_approval
-            }
-            for e in events
-        ]
+        event_list = [serialize_event(e) for e in events]
         return jsonify(event_list), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/events/batch', methods=['POST'])
+def get_events_batch():
+    try:
+        data = request.json
+        if not data or 'ids' not in data:
+            return jsonify({'error': 'Missing ids field'}), 400
+        try:
+            event_ids = parse_event_ids(data['ids'])
+            fields = parse_event_fields(data.get('fields'))
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(get_events_by_ids(event_ids, fields)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/events/<int:event_id>', methods=['GET'])
 def get_event(event_id):
     try:
@@ -235,14 +299,7 @@ def get_event(event_id):
         if not event:
             return jsonify({'error': 'Event not found'}), 404
             
-        return jsonify({
-            'event_id': event.event_id,
-            'nama_event': event.nama_event,
-            'deskripsi': event.deskripsi,
-            'tanggal_mulai': event.tanggal_mulai.isoformat(),
-            'tanggal_selesai': event.tanggal_selesai.isoformat(),
-            'status_approval': event.status_approval
-        }), 200
+        return jsonify(serialize_event(event)), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -250,17 +307,7 @@ def get_event(event_id):
 def get_approved_events():
     try:
         events = Event.query.filter_by(status_approval='Approved').all()
-        event_list = [
-            {
-                'event_id': e.event_id,
-                'nama_event': e.nama_event,
-                'deskripsi': e.deskripsi,
-                'tanggal_mulai': e.tanggal_mulai.isoformat(),
-                'tanggal_selesai': e.tanggal_selesai.isoformat(),
-                'status_approval': e.status_approval
-            }
-            for e in events
-        ]
+        event_list = [serialize_event(e) for e in events]
         return jsonify(event_list), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -270,13 +317,13 @@ def get_all_bookings():
     bookings = Booking.query.all()
     # Fetch all events and rooms once (optional optimization)
     try:
-        events_resp = requests.get(f"{ADD_EVENT_SERVICE}/api/events", timeout=2)
+        events_resp = upstream.get(f"{ADD_EVENT_SERVICE}/api/events", timeout=2)
         events_map = {e['event_id']: e['nama_event'] for e in events_resp.json()} if events_resp.status_code == 200 else {}
     except Exception as e:
         logging.error(f"Failed to fetch events: {e}")
         events_map = {}
     try:
-        rooms_resp = requests.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms", timeout=2)
+        rooms_resp = upstream.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms", timeout=2)
         rooms_map = {r['room_id']: r['nama_ruangan'] for r in rooms_resp.json()} if rooms_resp.status_code == 200 else {}
     except Exception as e:
         logging.error(f"Failed to fetch rooms: {e}")
@@ -320,5 +367,9 @@ def update_event_status(event_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics/upstreams', methods=['GET'])
+def upstream_metrics():
+    return jsonify(upstream.stats()), 200
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5008, debug=True)
+    app.run(host='0.0.0.0', port=5008)
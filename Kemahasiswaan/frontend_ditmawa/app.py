@@ -1,5 +1,6 @@
 from flask import Flask, render_template, request, jsonify
 import requests
+from http_client import upstream
 import os
 from flask_cors import CORS
 from datetime import datetime
@@ -23,12 +24,12 @@ def index():
 def get_events():
     try:
         # Get all events
-        response = requests.get(f"{ADD_EVENT_SERVICE}/api/events")
+        response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events")
         response.raise_for_status()
         events = response.json()
 
         # Get event statuses
-        status_response = requests.get(f"{EVENT_STATUS_SERVICE}/api/events/status")
+        status_response = upstream.get(f"{EVENT_STATUS_SERVICE}/api/events/status")
         if status_response.status_code == 200:
             statuses = {s['event_id']: s for s in status_response.json()}
             for event in events:
@@ -44,12 +45,12 @@ def get_events():
 def get_pending_events():
     try:
         # Get all events
-        response = requests.get(f"{ADD_EVENT_SERVICE}/api/events")
+        response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events")
         response.raise_for_status()
         events = response.json()
 
         # Get event statuses
-        status_response = requests.get(f"{EVENT_STATUS_SERVICE}/api/events/status")
+        status_response = upstream.get(f"{EVENT_STATUS_SERVICE}/api/events/status")
         if status_response.status_code == 200:
             statuses = {s['event_id']: s for s in status_response.json()}
             # Filter only pending events
@@ -71,12 +72,12 @@ def get_pending_events():
 def get_event(event_id):
     try:
         # Get event details
-        response = requests.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
+        response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
         response.raise_for_status()
         event = response.json()
 
         # Get event status
-        status_response = requests.get(f"{EVENT_STATUS_SERVICE}/api/events/{event_id}/status")
+        status_response = upstream.get(f"{EVENT_STATUS_SERVICE}/api/events/{event_id}/status")
         if status_response.status_code == 200:
             status_data = status_response.json()
             event['status_approval'] = status_data.get('status', 'Pending')
@@ -100,12 +101,12 @@ def approve_event(event_id):
             'rejection_reason': data.get('reason') if data['status'] == 'Rejected' else None
         }
         
-        response = requests.post(f"{EVENT_APPROVAL_SERVICE}/api/events/approve", json=status_data)
+        response = upstream.post(f"{EVENT_APPROVAL_SERVICE}/api/events/approve", json=status_data)
         response.raise_for_status()
 
         # If approved, update event status
         if data['status'] == 'Approved':
-            requests.post(f"{EVENT_STATUS_SERVICE}/api/events/status", json=status_data)
+            upstream.post(f"{EVENT_STATUS_SERVICE}/api/events/status", json=status_data)
 
         return jsonify({"message": "Event status updated successfully"}), 200
     except requests.exceptions.RequestException as e:
@@ -126,9 +127,9 @@ def reject_event(event_id):
             'status': 'Rejected',
             'rejection_reason': data['rejection_reason']
         }
-        response = requests.post(f"{EVENT_APPROVAL_SERVICE}/api/events/approve", json=status_data)
+        response = upstream.post(f"{EVENT_APPROVAL_SERVICE}/api/events/approve", json=status_data)
         response.raise_for_status()
-        requests.post(f"{EVENT_STATUS_SERVICE}/api/events/status", json=status_data)
+        upstream.post(f"{EVENT_STATUS_SERVICE}/api/events/status", json=status_data)
         return jsonify({"message": "Event rejected successfully"}), 200
     except requests.exceptions.RequestException as e:
         return jsonify({"error": str(e)}), 500
@@ -137,18 +138,26 @@ def reject_event(event_id):
 def get_bookings():
     try:
         # Get bookings from booking status service
-        response = requests.get(f"{ROOM_BOOKING_STATUS_SERVICE}/api/bookings")
+        response = upstream.get(f"{ROOM_BOOKING_STATUS_SERVICE}/api/bookings")
         response.raise_for_status()
         bookings = response.json()
 
-        # Get event details for each booking
+        # Get event details for all bookings in one call
+        event_ids = {booking['event_id'] for booking in bookings if 'event_id' in booking}
+        events = {}
+        if event_ids:
+            event_response = upstream.post(
+                f"{ADD_EVENT_SERVICE}/api/events/batch",
+                json={'ids': list(event_ids), 'fields': ['nama_event', 'status_approval']}
+            )
+            if event_response.status_code == 200:
+                events = event_response.json()
+
         for booking in bookings:
-            if 'event_id' in booking:
-                event_response = requests.get(f"{ADD_EVENT_SERVICE}/api/events/{booking['event_id']}")
-                if event_response.status_code == 200:
-                    event_data = event_response.json()
-                    booking['nama_event'] = event_data.get('nama_event', 'Unknown Event')
-                    booking['status_approval'] = event_data.get('status_approval', 'Pending')
+            event_data = events.get(str(booking.get('event_id')))
+            if event_data:
+                booking['nama_event'] = event_data.get('nama_event', 'Unknown Event')
+                booking['status_approval'] = event_data.get('status_approval', 'Pending')
 
         return jsonify(bookings), 200
     except requests.exceptions.RequestException as e:
@@ -157,13 +166,13 @@ def get_bookings():
 @app.route('/api/bookings/<int:booking_id>', methods=['GET'])
 def get_booking(booking_id):
     try:
-        response = requests.get(f"{ROOM_BOOKING_STATUS_SERVICE}/api/bookings/{booking_id}")
+        response = upstream.get(f"{ROOM_BOOKING_STATUS_SERVICE}/api/bookings/{booking_id}")
         response.raise_for_status()
         booking = response.json()
 
         # Get event details
         if 'event_id' in booking:
-            event_response = requests.get(f"{ADD_EVENT_SERVICE}/api/events/{booking['event_id']}")
+            event_response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events/{booking['event_id']}")
             if event_response.status_code == 200:
                 event_data = event_response.json()
                 booking['nama_event'] = event_data.get('nama_event', 'Unknown Event')
@@ -178,11 +187,15 @@ def get_booking(booking_id):
 def get_calendar_events():
     try:
         # Forward the request to calendar service
-        response = requests.get(f"{CALENDAR_EVENT_SERVICE}/api/calendar-events", params=request.args)
+        response = upstream.get(f"{CALENDAR_EVENT_SERVICE}/api/calendar-events", params=request.args)
         response.raise_for_status()
         return jsonify(response.json()), 200
     except requests.exceptions.RequestException as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/metrics/upstreams', methods=['GET'])
+def upstream_metrics():
+    return jsonify(upstream.stats()), 200
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5009, debug=True) 
\ No newline at end of file
+    app.run(host="0.0.0.0", port=5009) 
\ No newline at end of file
@@ -0,0 +1,142 @@
+# ====================
+# Shared HTTP Client
+# ====================
+"""
+Pooled HTTP client for calls between services.
+
+One requests.Session is kept per upstream (scheme + host + port), so every
+upstream gets its own keep-alive connection pool. All calls get a default
+connect/read timeout, idempotent GETs are retried a bounded number of times
+with jittered exponential backoff, and latency/error counters are kept per
+upstream so they can be exposed on /metrics/upstreams.
+
+This file is shared by every service; keep the copies identical.
+"""
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '2'))
+READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))
+POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))
+GET_RETRIES = int(os.getenv('HTTP_GET_RETRIES', '2'))
+BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', '0.1'))
+BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', '1.0'))
+
+# Statuses that usually mean "try again" on an idempotent request
+RETRY_STATUSES = {502, 503, 504}
+
+
+class UpstreamStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_latency_ms = 0.0
+        self.max_latency_ms = 0.0
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'avg_latency_ms': round(self.total_latency_ms / self.requests, 2) if self.requests else 0.0,
+            'max_latency_ms': round(self.max_latency_ms, 2)
+        }
+
+
+class HttpClient:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._stats = {}
+
+    def _session(self, upstream):
+        with self._lock:
+            session = self._sessions.get(upstream)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                self._sessions[upstream] = session
+                self._stats[upstream] = UpstreamStats()
+            return session
+
+    def _record(self, upstream, latency_ms, error=False, retry=False):
+        with self._lock:
+            stats = self._stats[upstream]
+            stats.requests += 1
+            stats.total_latency_ms += latency_ms
+            stats.max_latency_ms = max(stats.max_latency_ms, latency_ms)
+            if error:
+                stats.errors += 1
+            if retry:
+                stats.retries += 1
+
+    def _backoff(self, attempt):
+        # Full jitter: sleep a random amount up to the exponential cap
+        time.sleep(random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt))))
+
+    def request(self, method, url, **kwargs):
+        parts = urlsplit(url)
+        upstream = f"{parts.scheme}://{parts.netloc}"
+        session = self._session(upstream)
+        kwargs.setdefault('timeout', (CONNECT_TIMEOUT, READ_TIMEOUT))
+
+        # Only GETs are retried; read timeouts are not, they would multiply the latency
+        attempts = 1 + (GET_RETRIES if method.upper() == 'GET' else 0)
+        for attempt in range(attempts):
+            last_attempt = attempt + 1 == attempts
+            started = time.monotonic()
+            try:
+                response = session.request(method, url, **kwargs)
+            except requests.exceptions.ConnectionError:
+                self._record(upstream, (time.monotonic() - started) * 1000, error=True, retry=not last_attempt)
+                if last_attempt:
+                    raise
+                self._backoff(attempt)
+                continue
+            except requests.exceptions.RequestException:
+                self._record(upstream, (time.monotonic() - started) * 1000, error=True)
+                raise
+
+            retry = response.status_code in RETRY_STATUSES and not last_attempt
+            self._record(upstream, (time.monotonic() - started) * 1000,
+                         error=response.status_code >= 500, retry=retry)
+            if not retry:
+                return response
+            response.close()
+            self._backoff(attempt)
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {upstream: stats.to_dict() for upstream, stats in self._stats.items()}
+
+    def reset(self):
+        """Drop pooled connections, e.g. after a worker process is forked."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions = {}
+            self._stats = {}
+
+
+upstream = HttpClient()
@@ -2,6 +2,7 @@
 
 from flask import Flask, render_template, request, jsonify
 import requests
+from http_client import upstream
 import os
 from flask_cors import CORS
 from datetime import datetime
@@ -27,11 +28,11 @@ def event_form():
 @app.route('/api/events', methods=['GET'])
 def get_events():
     try:
-        response = requests.get(f"{ADD_EVENT_SERVICE}/api/events")
+        response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events")
         response.raise_for_status()
         events = response.json()
         
-        status_response = requests.get(f"{EVENT_STATUS_SERVICE}/api/events/status")
+        status_response = upstream.get(f"{EVENT_STATUS_SERVICE}/api/events/status")
         if status_response.status_code == 200:
             statuses = {s['event_id']: s['status'] for s in status_response.json()}
             for event in events:
@@ -50,7 +51,7 @@ def add_event():
             if field not in data:
                 return jsonify({'error': f'Missing field: {field}'}), 400
 
-        response = requests.post(f"{ADD_EVENT_SERVICE}/api/events", json=data)
+        response = upstream.post(f"{ADD_EVENT_SERVICE}/api/events", json=data)
         response.raise_for_status()
         event_data = response.json()
 
@@ -59,10 +60,10 @@ def add_event():
             'status': 'Pending'
         }
         
-        status_response = requests.post(f"{EVENT_STATUS_SERVICE}/api/events/status", json=status_data)
+        status_response = upstream.post(f"{EVENT_STATUS_SERVICE}/api/events/status", json=status_data)
         status_response.raise_for_status()
         
-        approval_response = requests.post(f"{EVENT_APPROVAL_SERVICE}/api/events/approve", 
+        approval_response = upstream.post(f"{EVENT_APPROVAL_SERVICE}/api/events/approve", 
                                        json={'event_id': event_data['event_id'], 'status': 'Pending'})
         approval_response.raise_for_status()
 
@@ -73,17 +74,17 @@ def add_event():
 @app.route('/api/events/<int:event_id>', methods=['GET'])
 def get_event(event_id):
     try:
-        response = requests.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
+        response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
         response.raise_for_status()
         event = response.json()
 
-        status_response = requests.get(f"{EVENT_STATUS_SERVICE}/api/events/{event_id}/status")
+        status_response = upstream.get(f"{EVENT_STATUS_SERVICE}/api/events/{event_id}/status")
         if status_response.status_code == 200:
             status_data = status_response.json()
             event['status_approval'] = status_data.get('status_approval', 'Pending')
             event['rejection_reason'] = status_data.get('rejection_reason')
 
-        approval_response = requests.get(f"{EVENT_APPROVAL_SERVICE}/api/events/{event_id}/approval-logs")
+        approval_response = upstream.get(f"{EVENT_APPROVAL_SERVICE}/api/events/{event_id}/approval-logs")
         if approval_response.status_code == 200:
             approval_logs = approval_response.json()
             if approval_logs:
@@ -99,7 +100,7 @@ def get_event(event_id):
 @app.route('/api/bookings', methods=['GET'])
 def get_bookings():
     try:
-        response = requests.get(f"{ROOM_BOOKING_STATUS_SERVICE}/bookings")
+        response = upstream.get(f"{ROOM_BOOKING_STATUS_SERVICE}/bookings")
         response.raise_for_status()
         return jsonify(response.json()), 200
     except requests.exceptions.RequestException as e:
@@ -108,11 +109,15 @@ def get_bookings():
 @app.route('/api/bookings/<event_id>', methods=['GET'])
 def get_booking_by_event_id(event_id):
     try:
-        response = requests.get(f"{ROOM_BOOKING_STATUS_SERVICE}/bookings/{event_id}")
+        response = upstream.get(f"{ROOM_BOOKING_STATUS_SERVICE}/bookings/{event_id}")
         response.raise_for_status()
         return jsonify(response.json()), 200
     except requests.exceptions.RequestException as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/metrics/upstreams', methods=['GET'])
+def upstream_metrics():
+    return jsonify(upstream.stats()), 200
+
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5007, debug=True)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=5007)
\ No newline at end of file
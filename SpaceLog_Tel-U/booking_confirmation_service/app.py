@@ -1,14 +1,20 @@
 # =====================
 # Import Libraries
 # =====================
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from flask_sqlalchemy import SQLAlchemy
+from db_config import configure_database
+from sqlalchemy import func
 from flask_cors import CORS
 from datetime import datetime, date
 import logging
-import requests
+from http_client import upstream
+from batch_loader import request_loader
 from enum import Enum
 import graphene
+from graphql_cache import execute_query
+from graphql import FieldNode
+from graphql.utilities import value_from_ast_untyped
 from graphene import ObjectType, String, Int, Field, Mutation, Boolean, List
 import pytz
 
@@ -21,11 +27,13 @@ CORS(app, resources={r"/*": {"origins": "*"}})
 # ====================
 # Service Endpoint Config
 # ====================
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///booking_confirmation.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+configure_database(app, 'sqlite:///booking_confirmation.db')
 
 ROOM_BOOKING_SERVICE = "http://room_booking_service:5003"
 
+# Pagination headers of room_booking_service /api/bookings, forwarded as-is
+PAGINATION_HEADERS = ('X-Next-Cursor', 'X-Total-Count')
+
 # ====================
 # Database Initialization
 # ====================
@@ -55,18 +63,56 @@ class ApprovalLog(db.Model):
     status = db.Column(db.String(255), nullable=False)
     keterangan_reject = db.Column(db.String(255))
 
+    __table_args__ = (
+        # Logs of one booking, oldest or newest first
+        db.Index('ix_approval_log_booking_id_tanggal_approval', 'booking_id', 'tanggal_approval'),
+    )
+
+# ====================
+# Current Approval Model
+# ====================
+class CurrentApproval(db.Model):
+    """The latest ApprovalLog of every booking, updated by every status write."""
+    booking_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    approval_id = db.Column(db.Integer, db.ForeignKey('approval_log.approval_id'), nullable=False)
+
+def set_current_approval(approval_log):
+    """Point the booking's CurrentApproval row at approval_log; call before committing a status write."""
+    db.session.flush()  # a new log gets its approval_id here
+    db.session.merge(CurrentApproval(booking_id=approval_log.booking_id, approval_id=approval_log.approval_id))
+
+def backfill_current_approvals():
+    """Add the CurrentApproval row of every booking whose logs predate the table."""
+    ranked = db.session.query(
+        ApprovalLog.booking_id.label('booking_id'),
+        ApprovalLog.approval_id.label('approval_id'),
+        func.row_number().over(
+            partition_by=ApprovalLog.booking_id,
+            order_by=(ApprovalLog.tanggal_approval.desc(), ApprovalLog.approval_id.desc())
+        ).label('row_number')
+    ).filter(~ApprovalLog.booking_id.in_(db.select(CurrentApproval.booking_id))).subquery()
+    latest = db.session.query(ranked.c.booking_id, ranked.c.approval_id).filter(ranked.c.row_number == 1).all()
+    db.session.add_all(CurrentApproval(booking_id=booking_id, approval_id=approval_id) for booking_id, approval_id in latest)
+    db.session.commit()
+    if latest:
+        logger.info(f"Backfilled current approval of {len(latest)} bookings")
+
 # ====================
 # Create DB
 # ====================
 with app.app_context():
     db.create_all()
+    # create_all() does not add indexes to tables that already exist
+    for index in ApprovalLog.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+    backfill_current_approvals()
 
 # ====================
 # Routes
 # ====================
 @app.route('/api/approval-status/<int:booking_id>', methods=['GET'])
 def get_approval_status(booking_id):
-    approval = ApprovalLog.query.filter_by(booking_id=booking_id).order_by(ApprovalLog.tanggal_approval.desc()).first()
+    approval = get_latest_approval(booking_id)
     if not approval:
         return jsonify({'status': 'Pending', 'keterangan_reject': None}), 200
     return jsonify({
@@ -74,6 +120,104 @@ def get_approval_status(booking_id):
         'keterangan_reject': approval.keterangan_reject
     }), 200
 
+def serialize_approval(approval):
+    return {
+        'status': approval.status,
+        'keterangan_reject': approval.keterangan_reject,
+        'tanggal_approval': approval.tanggal_approval.strftime('%Y-%m-%d %H:%M:%S'),
+        'approval_id': approval.approval_id
+    }
+
+def parse_booking_ids(value):
+    """Accept a list of ids or a comma separated string of ids."""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = [item for item in value.split(',') if item.strip()]
+    return [int(item) for item in value]
+
+def get_latest_approvals(booking_ids=None, start_id=None, end_id=None, since=None):
+    """
+    Return the latest ApprovalLog per booking in a single query.
+
+    Bookings are selected on the CurrentApproval primary key and joined to
+    their log by approval_id, so no ranking over the whole log is needed.
+    """
+    query = ApprovalLog.query.join(CurrentApproval, CurrentApproval.approval_id == ApprovalLog.approval_id)
+    if booking_ids is not None:
+        query = query.filter(CurrentApproval.booking_id.in_(booking_ids))
+    if start_id is not None:
+        query = query.filter(CurrentApproval.booking_id >= start_id)
+    if end_id is not None:
+        query = query.filter(CurrentApproval.booking_id <= end_id)
+    if since is not None:
+        query = query.filter(ApprovalLog.tanggal_approval > since)
+    return query.order_by(CurrentApproval.booking_id).all()
+
+def get_latest_approval(booking_id):
+    approvals = get_latest_approvals(booking_ids=[booking_id])
+    return approvals[0] if approvals else None
+
+def serialize_approval_status(approval):
+    """approval_status of a booking; bookings without a log are Pending."""
+    return {
+        'status': approval.status if approval else 'Pending',
+        'keterangan_reject': approval.keterangan_reject if approval else None,
+        'tanggal_approval': approval.tanggal_approval.strftime('%Y-%m-%d %H:%M:%S') if approval else None,
+        'approval_id': approval.approval_id if approval else None
+    }
+
+def bulk_approval_status(params):
+    booking_ids = parse_booking_ids(params.get('booking_ids'))
+    start_id = params.get('start_id')
+    end_id = params.get('end_id')
+    since = params.get('since')
+
+    if booking_ids is None and start_id is None and end_id is None and since is None:
+        return jsonify({'error': 'Provide booking_ids, start_id/end_id or since'}), 400
+
+    start_id = int(start_id) if start_id is not None else None
+    end_id = int(end_id) if end_id is not None else None
+    if since is not None:
+        since = datetime.strptime(since, '%Y-%m-%d %H:%M:%S')
+
+    approvals = get_latest_approvals(booking_ids, start_id, end_id, since)
+    statuses = {str(approval.booking_id): serialize_approval(approval) for approval in approvals}
+
+    # Explicitly requested bookings without a log are still Pending
+    for booking_id in booking_ids or []:
+        statuses.setdefault(str(booking_id), {
+            'status': 'Pending',
+            'keterangan_reject': None,
+            'tanggal_approval': None,
+            'approval_id': None
+        })
+
+    # Newest approval seen, to be passed back as "since" by polling clients
+    cursor = max((approval.tanggal_approval for approval in approvals), default=since)
+    return jsonify({
+        'statuses': statuses,
+        'count': len(statuses),
+        'cursor': cursor.strftime('%Y-%m-%d %H:%M:%S') if cursor else None
+    }), 200
+
+@app.route('/api/approval-status', methods=['GET'])
+def get_approval_statuses():
+    try:
+        return bulk_approval_status(request.args)
+    except ValueError as e:
+        return jsonify({'error': f'Invalid parameter: {str(e)}'}), 400
+
+@app.route('/api/approval-status/bulk', methods=['POST'])
+def get_approval_statuses_bulk():
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+    try:
+        return bulk_approval_status(data)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': f'Invalid parameter: {str(e)}'}), 400
+
 @app.route('/api/update-booking-status/<int:booking_id>', methods=['POST'])
 def update_booking_status(booking_id):
     try:
@@ -94,7 +238,7 @@ def update_booking_status(booking_id):
             return jsonify({'error': 'Keterangan reject wajib diisi jika status Rejected'}), 400
 
         # Get booking from room_booking_service
-        booking_response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/{booking_id}")
+        booking_response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/{booking_id}")
         if booking_response.status_code != 200:
             return jsonify({'error': 'Booking not found in room_booking_service'}), 404
 
@@ -117,11 +261,12 @@ def update_booking_status(booking_id):
             approval_log.status = new_status
             approval_log.keterangan_reject = keterangan_reject if new_status == BookingStatus.REJECTED.value else None
 
+        set_current_approval(approval_log)
         db.session.commit()
 
         # Sync with room_booking_service
         try:
-            sync_response = requests.post(
+            sync_response = upstream.post(
                 f"{ROOM_BOOKING_SERVICE}/api/update-booking-status/{booking_id}",
                 json={
                     'status_booking': approval_log.status,
@@ -154,57 +299,84 @@ def update_booking_status(booking_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def sync_approval_logs(booking_ids):
+    """
+    Create the initial Pending approval log of every booking that has none yet.
+
+    Syncing is idempotent so room_booking_service can redeliver from its
+    outbox: a booking that already has a log keeps its first one.
+    Returns {booking_id: ApprovalLog}.
+    """
+    approval_logs = {}
+    existing = ApprovalLog.query.filter(ApprovalLog.booking_id.in_(booking_ids)) \
+        .order_by(ApprovalLog.tanggal_approval, ApprovalLog.approval_id).all()
+    for approval_log in existing:
+        approval_logs.setdefault(approval_log.booking_id, approval_log)
+
+    now = datetime.now(pytz.timezone('Asia/Jakarta'))
+    created = []
+    for booking_id in booking_ids:
+        if booking_id not in approval_logs:
+            approval_logs[booking_id] = ApprovalLog(
+                booking_id=booking_id,
+                tanggal_approval=now,
+                status=BookingStatus.PENDING.value,
+                keterangan_reject=None
+            )
+            created.append(approval_logs[booking_id])
+    if created:
+        db.session.add_all(created)
+        db.session.flush()
+        # A booking without a log has no CurrentApproval row either
+        db.session.add_all(
+            CurrentApproval(booking_id=approval_log.booking_id, approval_id=approval_log.approval_id)
+            for approval_log in created
+        )
+    db.session.commit()
+    return approval_logs
+
 @app.route('/api/sync-booking', methods=['POST'])
 def sync_booking():
     try:
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No data provided'}), 400
+        try:
+            booking_id = int(data['booking_id'])
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': 'Missing or invalid booking_id'}), 400
 
-        # Create approval log first
-        approval_log = ApprovalLog(
-            booking_id=data['booking_id'],
-            tanggal_approval=datetime.now(pytz.timezone('Asia/Jakarta')),
-            status='Pending',
-            keterangan_reject=None
-        )
-        db.session.add(approval_log)
-        db.session.commit()
-
-        # Create new booking in booking_confirmation.db
-        booking = Booking(
-            booking_id=data['booking_id'],
-            event_id=data['event_id'],
-            room_id=data['room_id'],
-            tanggal_booking=datetime.strptime(data['tanggal_booking'], '%Y-%m-%d %H:%M:%S'),
-            tanggal_mulai=datetime.strptime(data['tanggal_mulai'], '%Y-%m-%d').date(),
-            tanggal_selesai=datetime.strptime(data['tanggal_selesai'], '%Y-%m-%d').date(),
-            status_booking=approval_log.status,  # Use status from ApprovalLog
-            keterangan_reject=None,
-        )
-        db.session.add(booking)
-        db.session.commit()
+        approval_log = sync_approval_logs([booking_id])[booking_id]
 
         return jsonify({
             'success': True,
             'message': 'Booking synchronized successfully',
-            'booking': {
-                'booking_id': booking.booking_id,
-                'event_id': booking.event_id,
-                'room_id': booking.room_id,
-                'tanggal_booking': booking.tanggal_booking.strftime('%Y-%m-%d %H:%M:%S'),
-                'tanggal_mulai': booking.tanggal_mulai.strftime('%Y-%m-%d'),
-                'tanggal_selesai': booking.tanggal_selesai.strftime('%Y-%m-%d'),
-                'status_booking': booking.status_booking,
-                'keterangan_reject': booking.keterangan_reject
-            },
-            'approval_log': {
-                'approval_id': approval_log.approval_id,
-                'booking_id': approval_log.booking_id,
-                'status': approval_log.status,
-                'keterangan_reject': approval_log.keterangan_reject,
-                'tanggal_approval': approval_log.tanggal_approval.strftime('%Y-%m-%d %H:%M:%S')
-            }
+            'booking': {**data, 'status_booking': approval_log.status},
+            'approval_log': {**serialize_approval(approval_log), 'booking_id': booking_id}
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/sync-bookings', methods=['POST'])
+def sync_bookings():
+    """Bulk variant of /api/sync-booking used by the room_booking_service outbox."""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('bookings'), list):
+            return jsonify({'error': 'Missing bookings field'}), 400
+        try:
+            booking_ids = list(dict.fromkeys(int(booking['booking_id']) for booking in data['bookings']))
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'error': 'Every booking needs a valid booking_id'}), 400
+
+        approval_logs = sync_approval_logs(booking_ids)
+
+        return jsonify({
+            'success': True,
+            'count': len(approval_logs),
+            'approval_ids': {str(booking_id): approval_log.approval_id for booking_id, approval_log in approval_logs.items()}
         }), 200
 
     except Exception as e:
@@ -215,28 +387,27 @@ def sync_booking():
 def health_check():
     return jsonify({'status': 'healthy'}), 200
 
+@app.route('/metrics/upstreams', methods=['GET'])
+def upstream_metrics():
+    return jsonify(upstream.stats()), 200
+
 @app.route('/api/bookings/<int:booking_id>', methods=['GET'])
 def get_booking(booking_id):
     try:
         # Get booking from room_booking_service
-        response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/{booking_id}")
+        response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/{booking_id}")
         if response.status_code != 200:
             return jsonify({'error': 'Booking not found in room_booking_service'}), 404
 
         booking_data = response.json()
         
         # Get approval status from local database
-        approval = ApprovalLog.query.filter_by(booking_id=booking_id).order_by(ApprovalLog.tanggal_approval.desc()).first()
+        approval = get_latest_approval(booking_id)
         
         # Combine booking data with approval status
         result = {
             **booking_data,
-            'approval_status': {
-                'status': approval.status if approval else 'Pending',
-                'keterangan_reject': approval.keterangan_reject if approval else None,
-                'tanggal_approval': approval.tanggal_approval.strftime('%Y-%m-%d %H:%M:%S') if approval else None,
-                'approval_id': approval.approval_id if approval else None
-            }
+            'approval_status': serialize_approval_status(approval)
         }
         
         return jsonify(result), 200
@@ -248,32 +419,33 @@ def get_booking(booking_id):
 @app.route('/api/bookings', methods=['GET'])
 def get_all_bookings():
     try:
-        # Get all bookings from room_booking_service
-        response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings")
+        # Get bookings from room_booking_service; filters and cursor are passed through,
+        # the NDJSON export mode is not since this route post-processes a JSON list
+        params = {key: value for key, value in request.args.items() if key != 'stream'}
+        response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings", params=params)
+        if response.status_code == 400:
+            return jsonify(response.json()), 400
         if response.status_code != 200:
             return jsonify({'error': 'Failed to get bookings from room_booking_service'}), 500
 
         bookings = response.json()
-        results = []
 
-        for booking in bookings:
-            booking_id = booking['booking_id']
-            # Get approval status for each booking
-            approval = ApprovalLog.query.filter_by(booking_id=booking_id).order_by(ApprovalLog.tanggal_approval.desc()).first()
-            
-            # Combine booking data with approval status
-            result = {
-                **booking,
-                'approval_status': {
-                    'status': approval.status if approval else 'Pending',
-                    'keterangan_reject': approval.keterangan_reject if approval else None,
-                    'tanggal_approval': approval.tanggal_approval.strftime('%Y-%m-%d %H:%M:%S') if approval else None,
-                    'approval_id': approval.approval_id if approval else None
-                }
-            }
-            results.append(result)
-
-        return jsonify(results), 200
+        # Approval status of the whole page in one query
+        approvals = {
+            approval.booking_id: approval
+            for approval in get_latest_approvals(booking_ids=[booking['booking_id'] for booking in bookings])
+        } if bookings else {}
+        results = [
+            {**booking, 'approval_status': serialize_approval_status(approvals.get(booking['booking_id']))}
+            for booking in bookings
+        ]
+
+        headers = {
+            header: response.headers[header]
+            for header in PAGINATION_HEADERS
+            if header in response.headers
+        }
+        return jsonify(results), 200, headers
 
     except Exception as e:
         logger.error(f"Error getting all bookings: {str(e)}")
@@ -308,6 +480,19 @@ class BookingType(graphene.ObjectType):
     keteranganReject = graphene.String()
     approvalStatus = graphene.Field(ApprovalStatusType)
 
+    # Approval data comes from the request's approval loader (one IN query per round)
+    def resolve_statusBooking(self, info):
+        approval_log = approval_loader().load(self.bookingId)
+        return approval_log.status if approval_log else None
+
+    def resolve_keteranganReject(self, info):
+        approval_log = approval_loader().load(self.bookingId)
+        return approval_log.keterangan_reject if approval_log else None
+
+    def resolve_approvalStatus(self, info):
+        approval_log = approval_loader().load(self.bookingId)
+        return to_approval_status_type(approval_log) if approval_log else None
+
     def resolve_tanggalBooking(self, info):
         if hasattr(self, 'tanggal_booking'):
             if isinstance(self.tanggal_booking, datetime):
@@ -351,6 +536,81 @@ class ApprovalLogType(graphene.ObjectType):
             return self.tanggal_approval
         return None
 
+# ====================
+# GraphQL Batch Loaders
+# ====================
+def load_latest_approvals(booking_ids):
+    return {approval_log.booking_id: approval_log for approval_log in get_latest_approvals(booking_ids=booking_ids)}
+
+def fetch_remote_bookings(booking_ids):
+    """Return {booking_id: booking} from room_booking_service with one filtered list call."""
+    try:
+        response = upstream.get(
+            f"{ROOM_BOOKING_SERVICE}/api/bookings",
+            params={'ids': ','.join(str(booking_id) for booking_id in booking_ids)}
+        )
+        if response.status_code != 200:
+            logger.error(f"Failed to fetch bookings: {response.status_code} {response.text}")
+            return {}
+        return {booking['booking_id']: booking for booking in response.json()}
+    except Exception as e:
+        logger.error(f"Failed to fetch bookings: {str(e)}")
+        return {}
+
+def approval_loader():
+    return request_loader('approval_log', load_latest_approvals)
+
+def booking_loader():
+    return request_loader('remote_booking', fetch_remote_bookings)
+
+def queue_root_booking_ids(info):
+    """
+    Queue the bookingId of every root booking/approvalLog field of the operation,
+    so aliased root fields share one batched fetch instead of one each.
+    """
+    if g.get('root_booking_ids_queued'):
+        return
+    g.root_booking_ids_queued = True
+    for selection in info.operation.selection_set.selections:
+        if not isinstance(selection, FieldNode) or selection.name.value not in ('booking', 'approvalLog'):
+            continue
+        for argument in selection.arguments:
+            if argument.name.value != 'bookingId':
+                continue
+            booking_id = value_from_ast_untyped(argument.value, info.variable_values)
+            if booking_id is None:
+                continue
+            approval_loader().queue([int(booking_id)])
+            if selection.name.value == 'booking':
+                booking_loader().queue([int(booking_id)])
+
+def to_approval_status_type(approval_log):
+    approval_status = ApprovalStatusType()
+    approval_status.status = approval_log.status
+    approval_status.keteranganReject = approval_log.keterangan_reject
+    approval_status.tanggal_approval = approval_log.tanggal_approval
+    approval_status.approvalId = approval_log.approval_id
+    return approval_status
+
+def to_booking_type(booking_data):
+    booking = BookingType()
+    booking.bookingId = booking_data.get('booking_id')
+    booking.eventId = booking_data.get('event_id')
+    booking.roomId = booking_data.get('room_id')
+    booking.tanggal_booking = booking_data.get('tanggal_booking')
+    booking.tanggal_mulai = booking_data.get('tanggal_mulai')
+    booking.tanggal_selesai = booking_data.get('tanggal_selesai')
+    return booking
+
+def to_approval_log_type(approval_log):
+    log_type = ApprovalLogType()
+    log_type.approvalId = approval_log.approval_id
+    log_type.bookingId = approval_log.booking_id
+    log_type.status = approval_log.status
+    log_type.keteranganReject = approval_log.keterangan_reject
+    log_type.tanggal_approval = approval_log.tanggal_approval
+    return log_type
+
 # ====================
 # GraphQL Mutations
 # ====================
@@ -383,7 +643,7 @@ class UpdateBookingStatus(Mutation):
 
             # Get booking from room_booking_service
             try:
-                booking_response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/{booking_id}")
+                booking_response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/{booking_id}")
                 if booking_response.status_code != 200:
                     return UpdateBookingStatus(success=False, message="Booking not found in room_booking_service")
                 booking_data = booking_response.json()
@@ -408,7 +668,7 @@ class UpdateBookingStatus(Mutation):
                     'keterangan_reject': keterangan_reject,
                     'approval_id': approval_log.approval_id
                 }
-                sync_response = requests.post(
+                sync_response = upstream.post(
                     f"{ROOM_BOOKING_SERVICE}/api/update-booking-status/{booking_id}",
                     json=sync_data
                 )
@@ -422,11 +682,12 @@ class UpdateBookingStatus(Mutation):
 
             # Save changes
             db.session.add(approval_log)
+            set_current_approval(approval_log)
             db.session.commit()
 
             # Get updated booking data
             try:
-                updated_booking_response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/{booking_id}")
+                updated_booking_response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/{booking_id}")
                 if updated_booking_response.status_code == 200:
                     updated_booking_data = updated_booking_response.json()
                 else:
@@ -484,11 +745,12 @@ class DeleteBooking(Mutation):
             # Delete approval log first
             approval_log = ApprovalLog.query.filter_by(booking_id=bookingId).first()
             if approval_log:
+                CurrentApproval.query.filter_by(booking_id=bookingId).delete()
                 db.session.delete(approval_log)
                 db.session.commit()
 
             # Delete booking from room_booking_service
-            response = requests.delete(f"{ROOM_BOOKING_SERVICE}/api/bookings/{bookingId}")
+            response = upstream.delete(f"{ROOM_BOOKING_SERVICE}/api/bookings/{bookingId}")
             
             if response.status_code == 200:
                 return DeleteBooking(
@@ -523,37 +785,9 @@ class Query(ObjectType):
 
     def resolve_booking(self, info, bookingId):
         try:
-            # Get booking from room_booking_service
-            booking_response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/{bookingId}")
-            if booking_response.status_code != 200:
-                return None
-            
-            booking_data = booking_response.json()
-            
-            # Get approval status
-            approval_log = ApprovalLog.query.filter_by(booking_id=bookingId).first()
-            
-            # Create ApprovalStatusType instance
-            approval_status = ApprovalStatusType()
-            if approval_log:
-                approval_status.status = approval_log.status
-                approval_status.keteranganReject = approval_log.keterangan_reject
-                approval_status.tanggal_approval = approval_log.tanggal_approval
-                approval_status.approvalId = approval_log.approval_id
-
-            # Create BookingType instance
-            booking_type = BookingType()
-            booking_type.bookingId = bookingId
-            booking_type.eventId = booking_data.get('event_id')
-            booking_type.roomId = booking_data.get('room_id')
-            booking_type.tanggal_booking = booking_data.get('tanggal_booking')
-            booking_type.tanggal_mulai = booking_data.get('tanggal_mulai')
-            booking_type.tanggal_selesai = booking_data.get('tanggal_selesai')
-            booking_type.statusBooking = approval_status.status if approval_log else None
-            booking_type.keteranganReject = approval_status.keteranganReject if approval_log else None
-            booking_type.approvalStatus = approval_status if approval_log else None
-
-            return booking_type
+            queue_root_booking_ids(info)
+            booking_data = booking_loader().load(bookingId)
+            return to_booking_type(booking_data) if booking_data else None
         except Exception as e:
             print(f"Error in resolve_booking: {str(e)}")
             return None
@@ -561,43 +795,19 @@ class Query(ObjectType):
     def resolve_bookings(self, info):
         try:
             # Get all bookings from room_booking_service
-            booking_response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings")
+            booking_response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings")
             if booking_response.status_code != 200:
                 return []
-            
-            bookings_data = booking_response.json()
-            result = []
 
-            for booking_data in bookings_data:
+            result = []
+            for booking_data in booking_response.json():
                 booking_id = booking_data.get('booking_id')
                 if not booking_id:
                     continue
+                booking_loader().prime(booking_id, booking_data)
+                result.append(to_booking_type(booking_data))
 
-                # Get approval status for each booking
-                approval_log = ApprovalLog.query.filter_by(booking_id=booking_id).first()
-                
-                # Create ApprovalStatusType instance
-                approval_status = ApprovalStatusType()
-                if approval_log:
-                    approval_status.status = approval_log.status
-                    approval_status.keteranganReject = approval_log.keterangan_reject
-                    approval_status.tanggal_approval = approval_log.tanggal_approval
-                    approval_status.approvalId = approval_log.approval_id
-
-                # Create BookingType instance
-                booking_type = BookingType()
-                booking_type.bookingId = booking_id
-                booking_type.eventId = booking_data.get('event_id')
-                booking_type.roomId = booking_data.get('room_id')
-                booking_type.tanggal_booking = booking_data.get('tanggal_booking')
-                booking_type.tanggal_mulai = booking_data.get('tanggal_mulai')
-                booking_type.tanggal_selesai = booking_data.get('tanggal_selesai')
-                booking_type.statusBooking = approval_status.status if approval_log else None
-                booking_type.keteranganReject = approval_status.keteranganReject if approval_log else None
-                booking_type.approvalStatus = approval_status if approval_log else None
-
-                result.append(booking_type)
-
+            approval_loader().queue(booking.bookingId for booking in result)
             return result
         except Exception as e:
             print(f"Error in resolve_bookings: {str(e)}")
@@ -605,38 +815,16 @@ class Query(ObjectType):
 
     def resolve_approval_log(self, info, bookingId):
         try:
-            approval_log = ApprovalLog.query.filter_by(booking_id=bookingId).first()
-            if not approval_log:
-                return None
-
-            approval_log_type = ApprovalLogType()
-            approval_log_type.approvalId = approval_log.approval_id
-            approval_log_type.bookingId = approval_log.booking_id
-            approval_log_type.status = approval_log.status
-            approval_log_type.keteranganReject = approval_log.keterangan_reject
-            approval_log_type.tanggal_approval = approval_log.tanggal_approval
-
-            return approval_log_type
+            queue_root_booking_ids(info)
+            approval_log = approval_loader().load(bookingId)
+            return to_approval_log_type(approval_log) if approval_log else None
         except Exception as e:
             print(f"Error in resolve_approval_log: {str(e)}")
             return None
 
     def resolve_approval_logs(self, info):
         try:
-            approval_logs = ApprovalLog.query.all()
-            result = []
-
-            for approval_log in approval_logs:
-                approval_log_type = ApprovalLogType()
-                approval_log_type.approvalId = approval_log.approval_id
-                approval_log_type.bookingId = approval_log.booking_id
-                approval_log_type.status = approval_log.status
-                approval_log_type.keteranganReject = approval_log.keterangan_reject
-                approval_log_type.tanggal_approval = approval_log.tanggal_approval
-
-                result.append(approval_log_type)
-
-            return result
+            return [to_approval_log_type(approval_log) for approval_log in ApprovalLog.query.all()]
         except Exception as e:
             print(f"Error in resolve_approval_logs: {str(e)}")
             return []
@@ -693,20 +881,7 @@ def graphql():
     if not data:
         return jsonify({"error": "No input data provided"}), 400
 
-    result = schema.execute(
-        data.get("query"),
-        variables=data.get("variables"),
-        operation_name=data.get("operationName"),
-        context_value=request,
-    )
-
-    response = {}
-    if result.errors:
-        response["errors"] = [str(e) for e in result.errors]
-    if result.data:
-        response["data"] = result.data
-
-    status_code = 200 if not result.errors else 400
+    response, status_code = execute_query(schema, data, context_value=request)
     return jsonify(response), status_code
 
 # ====================
@@ -0,0 +1,56 @@
+# ====================
+# Shared GraphQL Batch Loader
+# ====================
+"""
+Request-scoped batch loaders for GraphQL resolvers.
+
+List resolvers queue() the keys of their items; a field resolver that
+actually needs a value calls load(). The first load() dispatches every
+queued key in one batched call and later loads are served from the memo,
+so each key is fetched at most once per request. Execution is synchronous,
+so one "tick" is everything queued before the first load of a round.
+
+This file is shared by every service; keep the copies identical.
+"""
+from flask import g
+
+
+class BatchLoader:
+    def __init__(self, batch_fn, default=None):
+        self.batch_fn = batch_fn
+        self.default = default
+        self._memo = {}
+        self._queue = {}
+
+    def queue(self, keys):
+        for key in keys:
+            if key is not None and key not in self._memo:
+                self._queue[key] = None
+
+    def prime(self, key, value):
+        """Store a value that was already fetched elsewhere."""
+        self._queue.pop(key, None)
+        self._memo[key] = value
+
+    def load(self, key):
+        if key not in self._memo:
+            self.queue([key])
+            self.dispatch()
+        return self._memo.get(key, self.default)
+
+    def dispatch(self):
+        keys = list(self._queue)
+        self._queue.clear()
+        if not keys:
+            return
+        results = self.batch_fn(keys)
+        for key in keys:
+            self._memo[key] = results.get(key, self.default)
+
+
+def request_loader(name, batch_fn, default=None):
+    """Return the loader called name for the current request, creating it on first use."""
+    loaders = g.setdefault('batch_loaders', {})
+    if name not in loaders:
+        loaders[name] = BatchLoader(batch_fn, default)
+    return loaders[name]
@@ -0,0 +1,67 @@
+# ====================
+# Shared Database Config
+# ====================
+"""
+Database configuration for the Flask-SQLAlchemy services.
+
+The database URL is read from DATABASE_URL and falls back to the service's
+own SQLite file. SQLite connections are switched to WAL journaling with a
+busy timeout, synchronous=NORMAL and memory-mapped reads, so readers no
+longer block behind a writer and several workers can share one file. A
+server database (e.g. Postgres) gets a sized connection pool with
+pre-ping, so connections dropped by the server are replaced transparently.
+
+This file is shared by every service; keep the copies identical.
+"""
+import os
+import sqlite3
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))
+
+
+def database_url(default_url):
+    url = os.getenv('DATABASE_URL', default_url)
+    # SQLAlchemy only accepts the postgresql:// scheme
+    if url.startswith('postgres://'):
+        url = 'postgresql://' + url[len('postgres://'):]
+    return url
+
+
+def configure_database(app, default_url):
+    """Set the database URL and engine options on the app; call before creating SQLAlchemy(app)."""
+    url = database_url(default_url)
+    app.config['SQLALCHEMY_DATABASE_URI'] = url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    if url.startswith('sqlite'):
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000}
+        }
+    else:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+            'pool_size': POOL_SIZE,
+            'max_overflow': MAX_OVERFLOW,
+            'pool_timeout': POOL_TIMEOUT,
+            'pool_recycle': POOL_RECYCLE,
+            'pool_pre_ping': True
+        }
+
+
+@event.listens_for(Engine, 'connect')
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute(f'PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute(f'PRAGMA mmap_size={SQLITE_MMAP_SIZE}')
+    cursor.close()
@@ -3,6 +3,7 @@
 # ====================
 from flask import Flask, render_template, request, jsonify, Response
 import requests
+from http_client import upstream
 import os
 from ariadne import QueryType, MutationType, make_executable_schema, gql, convert_kwargs_to_snake_case
 from ariadne.wsgi import GraphQL
@@ -27,6 +28,22 @@ ROOM_BOOKING_SERVICE = os.getenv("ROOM_BOOKING_SERVICE_URL", "http://room_bookin
 ROOM_SCHEDULE_SERVICE = os.getenv("ROOM_SCHEDULE_SERVICE_URL", "http://room_schedule_service:5004")
 ADD_EVENT_SERVICE = os.getenv("ADD_EVENT_SERVICE_URL", "http://add_event_service:5008")
 
+def idempotency_headers():
+    """Pass the client's Idempotency-Key on to room_booking_service so retried submits are not booked twice."""
+    key = request.headers.get('Idempotency-Key')
+    return {'Idempotency-Key': key} if key else {}
+
+APPROVAL_PAGE_SIZE = 50
+# Booking lists are paged by room_booking_service; callers follow X-Next-Cursor
+BOOKING_LIST_PAGE_SIZE = 100
+PAGINATION_HEADERS = ('X-Next-Cursor', 'X-Total-Count')
+
+def booking_list_params():
+    """Filters and cursor of the request, with a page size so the whole table is never loaded at once."""
+    params = {key: value for key, value in request.args.items() if key != 'stream'}
+    params.setdefault('limit', BOOKING_LIST_PAGE_SIZE)
+    return params
+
 # ====================
 # Page Routes
 # ====================
@@ -36,12 +53,33 @@ def index():
 
 @app.route('/approval')
 def approval_page():
+    params = request.args.to_dict()
+    params.setdefault('limit', APPROVAL_PAGE_SIZE)
+    next_cursor = None
     try:
-        resp = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings")
+        resp = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings", params=params)
         bookings = resp.json() if resp.status_code == 200 else []
+        next_cursor = resp.headers.get('X-Next-Cursor')
     except Exception:
         bookings = []
-    return render_template('approval.html', bookings=bookings, current_year=datetime.now().year)
+    filters = {key: value for key, value in request.args.items() if key != 'cursor'}
+
+    # Status counts cover every page; they are fetched with the first page only
+    stats = None
+    if not request.args.get('cursor'):
+        try:
+            resp = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/stats", params=filters)
+            stats = resp.json() if resp.status_code == 200 else None
+        except Exception:
+            stats = None
+    return render_template(
+        'approval.html',
+        bookings=bookings,
+        stats=stats,
+        next_cursor=next_cursor,
+        filters=filters,
+        current_year=datetime.now().year
+    )
 
 @app.route('/services')
 def services_page():
@@ -53,7 +91,7 @@ def services_page():
 @app.route('/api/rooms', methods=['GET'])
 def get_rooms():
     try:
-        response = requests.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms")
+        response = upstream.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Room Service"}), 503
@@ -61,7 +99,7 @@ def get_rooms():
 @app.route('/api/rooms/locations', methods=['GET'])
 def get_locations():
     try:
-        response = requests.get(f"{ROOM_AVAILABILITY_SERVICE}/locations")
+        response = upstream.get(f"{ROOM_AVAILABILITY_SERVICE}/locations")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Room Service"}), 503
@@ -69,7 +107,7 @@ def get_locations():
 @app.route('/api/rooms/<int:room_id>', methods=['GET'])
 def get_room_detail(room_id):
     try:
-        response = requests.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms/{room_id}")
+        response = upstream.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms/{room_id}")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Room Service"}), 503
@@ -78,7 +116,7 @@ def get_room_detail(room_id):
 def get_rooms_recommend():
     try:
         params = request.args.to_dict()
-        response = requests.get(f"{ROOM_RECOMMENDATION_SERVICE}/api/rooms/recommend-rooms", params=params)
+        response = upstream.get(f"{ROOM_RECOMMENDATION_SERVICE}/api/rooms/recommend-rooms", params=params)
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Recommendation Service"}), 503
@@ -87,7 +125,7 @@ def get_rooms_recommend():
 def create_booking():
     try:
         data = request.json
-        response = requests.post(f"{ROOM_BOOKING_SERVICE}/api/book-room", json=data)
+        response = upstream.post(f"{ROOM_BOOKING_SERVICE}/api/book-room", json=data, headers=idempotency_headers())
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Booking Service"}), 503
@@ -95,15 +133,16 @@ def create_booking():
 @app.route('/api/bookings', methods=['GET'])
 def get_bookings_proxy():
     try:
-        response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings")
-        return jsonify(response.json()), response.status_code
+        response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings", params=booking_list_params())
+        headers = {header: response.headers[header] for header in PAGINATION_HEADERS if header in response.headers}
+        return jsonify(response.json()), response.status_code, headers
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Booking Service"}), 503
 
 @app.route('/api/bookings/event/<int:event_id>', methods=['GET'])
 def get_bookings_by_event(event_id):
     try:
-        response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/event/{event_id}")
+        response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/event/{event_id}")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Booking Service"}), 503
@@ -111,7 +150,7 @@ def get_bookings_by_event(event_id):
 @app.route('/api/approved-events', methods=['GET'])
 def get_approved_events():
     try:
-        response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/approved-events")
+        response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/approved-events")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Booking Service"}), 503
@@ -120,7 +159,7 @@ def get_approved_events():
 def get_schedules(room_id):
     try:
         params = request.args.to_dict()
-        response = requests.get(f"{ROOM_SCHEDULE_SERVICE}/schedules/{room_id}", params=params)
+        response = upstream.get(f"{ROOM_SCHEDULE_SERVICE}/schedules/{room_id}", params=params)
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Schedule Service"}), 503
@@ -128,7 +167,7 @@ def get_schedules(room_id):
 @app.route('/api/events', methods=['GET'])
 def get_events():
     try:
-        response = requests.get(f"{ADD_EVENT_SERVICE}/api/events")
+        response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Event Service"}), 503
@@ -143,7 +182,7 @@ def add_event():
                 return jsonify({'error': f'Missing field: {field}'}), 400
 
         # Forward POST to backend service
-        response = requests.post(f"{ADD_EVENT_SERVICE}/api/events", json=data)
+        response = upstream.post(f"{ADD_EVENT_SERVICE}/api/events", json=data)
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Event Service"}), 503
@@ -151,7 +190,7 @@ def add_event():
 @app.route('/api/events/<int:event_id>', methods=['GET'])
 def get_event(event_id):
     try:
-        response = requests.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
+        response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Event Service"}), 503
@@ -159,7 +198,7 @@ def get_event(event_id):
 @app.route('/api/approval-status', methods=['GET'])
 def get_approval_status_proxy():
     try:
-        response = requests.get(f"{BOOKING_CONFIRMATION_SERVICE}/api/approval-status")
+        response = upstream.get(f"{BOOKING_CONFIRMATION_SERVICE}/api/approval-status")
         return (response.text, response.status_code)
     except requests.exceptions.RequestException:
         return ("Offline", 503)
@@ -167,7 +206,7 @@ def get_approval_status_proxy():
 @app.route('/api/schedules', methods=['GET'])
 def get_schedules_proxy():
     try:
-        response = requests.get(f"{ROOM_SCHEDULE_SERVICE}/api/health")
+        response = upstream.get(f"{ROOM_SCHEDULE_SERVICE}/api/health")
         return (response.text, response.status_code)
     except requests.exceptions.RequestException:
         return ("Offline", 503)
@@ -177,14 +216,14 @@ def update_booking_status(booking_id):
     try:
         data = request.get_json(force=True)
         # Forward ke booking_confirmation_service
-        resp = requests.post(
+        resp = upstream.post(
             f"{BOOKING_CONFIRMATION_SERVICE}/api/update-booking-status/{booking_id}",
             json=data
         )
         
         if resp.status_code == 200:
             # Jika berhasil di booking_confirmation_service, update di room_booking_service
-            room_booking_resp = requests.post(
+            room_booking_resp = upstream.post(
                 f"{ROOM_BOOKING_SERVICE}/api/update-booking-status/{booking_id}",
                 json=data
             )
@@ -198,15 +237,20 @@ def update_booking_status(booking_id):
 @app.route('/bookings', methods=['GET'])
 def get_bookings():
     try:
-        response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings")
+        response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings", params=booking_list_params())
         if response.status_code == 200:
-            return jsonify(response.json())
+            headers = {header: response.headers[header] for header in PAGINATION_HEADERS if header in response.headers}
+            return jsonify(response.json()), 200, headers
         return jsonify([])
     except requests.exceptions.RequestException:
         return jsonify([])
 
+@app.route('/metrics/upstreams', methods=['GET'])
+def upstream_metrics():
+    return jsonify(upstream.stats()), 200
+
 # ====================
 # Run Application
 # ====================
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=5005, debug=True)
+    app.run(host="0.0.0.0", port=5005)
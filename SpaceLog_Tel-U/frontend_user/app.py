@@ -3,6 +3,7 @@
 # =====================
 from flask import Flask, render_template, request, jsonify, Response
 import requests
+from http_client import upstream
 import os
 from ariadne import QueryType, MutationType, make_executable_schema, gql, convert_kwargs_to_snake_case
 from ariadne.wsgi import GraphQL
@@ -27,6 +28,13 @@ ROOM_BOOKING_SERVICE = os.getenv("ROOM_BOOKING_SERVICE_URL", "http://room_bookin
 ROOM_SCHEDULE_SERVICE = os.getenv("ROOM_SCHEDULE_SERVICE_URL", "http://room_schedule_service:5004")
 ADD_EVENT_SERVICE = os.getenv("ADD_EVENT_SERVICE_URL", "http://add_event_service:5008")
 
+def idempotency_headers():
+    """Pass the client's Idempotency-Key on to room_booking_service so retried submits are not booked twice."""
+    key = request.headers.get('Idempotency-Key')
+    return {'Idempotency-Key': key} if key else {}
+
+BOOKINGS_PAGE_SIZE = 100
+
 # =====================
 # Page Routes
 # =====================
@@ -40,7 +48,9 @@ def rooms_page():
 
 @app.route('/bookings')
 def bookings_page():
-    bookings = get_all_bookings()
+    params = request.args.to_dict()
+    params.setdefault('limit', BOOKINGS_PAGE_SIZE)
+    bookings, _ = fetch_bookings(params)
     return render_template('bookings.html', bookings=bookings, current_year=datetime.now().year)
 
 @app.route('/schedules')
@@ -53,7 +63,7 @@ def schedules_page():
 @app.route('/api/rooms', methods=['GET'])
 def get_rooms():
     try:
-        response = requests.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms")
+        response = upstream.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Room Service"}), 503
@@ -61,7 +71,7 @@ def get_rooms():
 @app.route('/api/rooms/locations', methods=['GET'])
 def get_locations():
     try:
-        response = requests.get(f"{ROOM_AVAILABILITY_SERVICE}/locations")
+        response = upstream.get(f"{ROOM_AVAILABILITY_SERVICE}/locations")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Room Service"}), 503
@@ -69,7 +79,7 @@ def get_locations():
 @app.route('/api/rooms/<int:room_id>', methods=['GET'])
 def get_room_detail(room_id):
     try:
-        response = requests.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms/{room_id}")
+        response = upstream.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms/{room_id}")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Room Service"}), 503
@@ -78,7 +88,7 @@ def get_room_detail(room_id):
 def recommend_rooms():
     try:
         params = request.args.to_dict()
-        response = requests.get(f"{ROOM_RECOMMENDATION_SERVICE}/api/rooms/recommend-rooms", params=params)
+        response = upstream.get(f"{ROOM_RECOMMENDATION_SERVICE}/api/rooms/recommend-rooms", params=params)
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Recommendation Service"}), 503
@@ -87,7 +97,7 @@ def recommend_rooms():
 def create_booking():
     try:
         data = request.json
-        response = requests.post(f"{ROOM_BOOKING_SERVICE}/api/book-room", json=data)
+        response = upstream.post(f"{ROOM_BOOKING_SERVICE}/api/book-room", json=data, headers=idempotency_headers())
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Booking Service"}), 503
@@ -95,7 +105,7 @@ def create_booking():
 @app.route('/api/bookings/<int:booking_id>', methods=['GET'])
 def get_booking_status(booking_id):
     try:
-        response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/{booking_id}")
+        response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/{booking_id}")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Booking Service"}), 503
@@ -103,7 +113,7 @@ def get_booking_status(booking_id):
 @app.route('/api/bookings/event/<int:event_id>', methods=['GET'])
 def get_bookings_by_event(event_id):
     try:
-        response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/event/{event_id}")
+        response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/event/{event_id}")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Booking Service"}), 503
@@ -111,7 +121,7 @@ def get_bookings_by_event(event_id):
 @app.route('/api/approved-events', methods=['GET'])
 def get_approved_events():
     try:
-        response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/approved-events")
+        response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/approved-events")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Booking Service"}), 503
@@ -120,7 +130,7 @@ def get_approved_events():
 def get_schedules(room_id):
     try:
         params = request.args.to_dict()
-        response = requests.get(f"{ROOM_SCHEDULE_SERVICE}/schedules/{room_id}", params=params)
+        response = upstream.get(f"{ROOM_SCHEDULE_SERVICE}/schedules/{room_id}", params=params)
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Schedule Service"}), 503
@@ -128,19 +138,28 @@ def get_schedules(room_id):
 @app.route('/api/events', methods=['GET'])
 def get_events():
     try:
-        response = requests.get(f"{ADD_EVENT_SERVICE}/api/events")
+        response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events")
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException:
         return jsonify({"error": "Failed to connect to Event Service"}), 503
     
-@app.route('/api/bookings', methods=['GET'])
-def get_all_bookings():
+def fetch_bookings(params):
+    """Return (bookings, next_cursor) from room_booking_service for the given filters."""
     try:
-        response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings")
+        response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings", params=params)
         response.raise_for_status()
-        return response.json()
+        return response.json(), response.headers.get('X-Next-Cursor')
     except requests.exceptions.RequestException:
-        return []
+        return [], None
+
+@app.route('/api/bookings', methods=['GET'])
+def get_all_bookings():
+    params = {key: value for key, value in request.args.items() if key != 'stream'}
+    bookings, next_cursor = fetch_bookings(params)
+    response = jsonify(bookings)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 @app.route('/api/bookings', methods=['POST'])
 def create_booking_api():
@@ -151,14 +170,18 @@ def create_booking_api():
         if not data or 'event_id' not in data or 'room_id' not in data:
             return jsonify({'error': 'Missing required fields'}), 400
         
-        response = requests.post(f"{ROOM_BOOKING_SERVICE}/api/book-room", json=data)
+        response = upstream.post(f"{ROOM_BOOKING_SERVICE}/api/book-room", json=data, headers=idempotency_headers())
         print("Response from booking service:", response.status_code, response.text)  # Cek respon detail
         return jsonify(response.json()), response.status_code
     except requests.exceptions.RequestException as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics/upstreams', methods=['GET'])
+def upstream_metrics():
+    return jsonify(upstream.stats()), 200
+
 # =====================
 # Run Application
 # =====================
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -3,8 +3,15 @@
 # ====================
 from flask import Flask, jsonify, request
 from flask_sqlalchemy import SQLAlchemy
+from db_config import configure_database
 from flask_cors import CORS
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, date, timedelta
+from bisect import bisect_left, bisect_right
+import threading
 import graphene
+from graphql_cache import execute_query
 from graphene import ObjectType, String, Int, Field, Mutation
 
 # ====================
@@ -16,8 +23,7 @@ CORS(app) # Mengaktifkan CORS agar bisa diakses dari frontend/backend lain
 # ====================
 # Service Endpoint Config
 # ====================
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///room_availability.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+configure_database(app, 'sqlite:///room_availability.db')
 
 # ====================
 # Database Initialization
@@ -34,36 +40,317 @@ class Room(db.Model):
     fasilitas = db.Column(db.String(1000))
     lokasi = db.Column(db.String(255))
 
+class VersionCounter(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+CATALOG_VERSION = 'room_catalog'
+
+def get_version(name):
+    counter = VersionCounter.query.get(name)
+    return counter.value if counter else 0
+
+def bump_version(name):
+    """Increment a counter inside the caller's transaction; committed together with the change.
+
+    The counter rows are seeded at startup, so this is a single row-locking UPDATE.
+    """
+    VersionCounter.query.filter_by(name=name).update({VersionCounter.value: VersionCounter.value + 1})
+    return get_version(name)
+
+# Mirror of the bookings held by room_booking_service, pushed on every booking change
+class RoomReservation(db.Model):
+    booking_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    room_id = db.Column(db.Integer, nullable=False, index=True)
+    event_id = db.Column(db.Integer)
+    tanggal_mulai = db.Column(db.Date, nullable=False)
+    tanggal_selesai = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    revision = db.Column(db.Integer, nullable=False, index=True)
+
+RESERVATION_VERSION = 'reservations'
+ACTIVE_RESERVATION_STATUSES = ('Pending', 'Approved')
+DATE_FORMAT = '%Y-%m-%d'
+
+# ====================
+# Availability Engine
+# ====================
+class RoomIntervalIndex:
+    """
+    Reservations of a single room, kept sorted by start day (date ordinals).
+
+    Any reservation overlapping [start, end] has to begin inside
+    [start - longest, end], where longest is the longest reservation now in
+    this room. An overlap query is therefore two bisects plus a scan of that
+    window, i.e. O(log n + k) for the bounded lengths of room bookings.
+    Lengths are counted so longest shrinks again when its last reservation
+    is removed; a room only has a handful of distinct lengths.
+    """
+    def __init__(self):
+        self.starts = []
+        self.entries = []
+        self.lengths = {}
+        self.longest = 0
+
+    def add(self, start, end, booking_id):
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.entries.insert(position, (start, end, booking_id))
+        self.lengths[end - start] = self.lengths.get(end - start, 0) + 1
+        self.longest = max(self.longest, end - start)
+
+    def remove(self, start, booking_id):
+        position = bisect_left(self.starts, start)
+        while position < len(self.starts) and self.starts[position] == start:
+            _, end, entry_booking_id = self.entries[position]
+            if entry_booking_id == booking_id:
+                del self.starts[position]
+                del self.entries[position]
+                self.lengths[end - start] -= 1
+                if not self.lengths[end - start]:
+                    del self.lengths[end - start]
+                    if end - start == self.longest:
+                        self.longest = max(self.lengths, default=0)
+                return
+            position += 1
+
+    def overlapping(self, start, end):
+        # Booking days are inclusive on both ends
+        low = bisect_left(self.starts, start - self.longest)
+        high = bisect_right(self.starts, end)
+        return [booking_id for _, entry_end, booking_id in self.entries[low:high] if entry_end >= start]
+
+
+class AvailabilityEngine:
+    """
+    In-memory interval index per room over Pending and Approved reservations.
+
+    The index is rebuilt from RoomReservation at startup and then kept up to
+    date incrementally: every reservation write stamps the row with a new
+    revision, and refresh() applies the rows newer than the last revision it
+    has seen, which also picks up writes made by other worker processes.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._rooms = {}
+        self._reservations = {}
+        self.revision = 0
+
+    def _apply(self, reservation):
+        previous = self._reservations.pop(reservation.booking_id, None)
+        if previous:
+            self._rooms[previous['room_id']].remove(previous['tanggal_mulai'].toordinal(), reservation.booking_id)
+
+        if reservation.status in ACTIVE_RESERVATION_STATUSES:
+            self._reservations[reservation.booking_id] = {
+                'booking_id': reservation.booking_id,
+                'room_id': reservation.room_id,
+                'event_id': reservation.event_id,
+                'tanggal_mulai': reservation.tanggal_mulai,
+                'tanggal_selesai': reservation.tanggal_selesai,
+                'status': reservation.status
+            }
+            self._rooms.setdefault(reservation.room_id, RoomIntervalIndex()).add(
+                reservation.tanggal_mulai.toordinal(),
+                reservation.tanggal_selesai.toordinal(),
+                reservation.booking_id
+            )
+
+    def rebuild(self):
+        with self._lock:
+            self._rooms = {}
+            self._reservations = {}
+            reservations = RoomReservation.query.filter(
+                RoomReservation.status.in_(ACTIVE_RESERVATION_STATUSES)
+            ).order_by(RoomReservation.tanggal_mulai).all()
+            for reservation in reservations:
+                self._apply(reservation)
+            self.revision = db.session.query(func.max(RoomReservation.revision)).scalar() or 0
+
+    def refresh(self):
+        with self._lock:
+            changed = RoomReservation.query.filter(
+                RoomReservation.revision > self.revision
+            ).order_by(RoomReservation.revision).all()
+            for reservation in changed:
+                self._apply(reservation)
+                self.revision = max(self.revision, reservation.revision)
+
+    def conflicts(self, room_id, start_date, end_date, exclude_booking_id=None):
+        self.refresh()
+        with self._lock:
+            index = self._rooms.get(room_id)
+            if not index:
+                return []
+            booking_ids = index.overlapping(start_date.toordinal(), end_date.toordinal())
+            return [
+                self._reservations[booking_id]
+                for booking_id in booking_ids
+                if booking_id != exclude_booking_id
+            ]
+
+    def check_batch(self, items):
+        """
+        Check many (room_id, start_date, end_date, exclude_booking_id) items at once.
+
+        Besides the index, every item is checked against the earlier available
+        items of the same batch, as if the batch were booked in order.
+        Returns one (conflicts, conflicting_item_positions) pair per item.
+        """
+        self.refresh()
+        accepted = {}
+        results = []
+        with self._lock:
+            for position, (room_id, start_date, end_date, exclude_booking_id) in enumerate(items):
+                start, end = start_date.toordinal(), end_date.toordinal()
+                index = self._rooms.get(room_id)
+                conflicts = [
+                    self._reservations[booking_id]
+                    for booking_id in (index.overlapping(start, end) if index else [])
+                    if booking_id != exclude_booking_id
+                ]
+                batch_index = accepted.get(room_id)
+                batch_conflicts = sorted(batch_index.overlapping(start, end)) if batch_index else []
+                if not conflicts and not batch_conflicts:
+                    accepted.setdefault(room_id, RoomIntervalIndex()).add(start, end, position)
+                results.append((conflicts, batch_conflicts))
+        return results
+
+    def utilization(self, start_date, end_date):
+        """Share of the days in [start_date, end_date] each room is reserved: {room_id: fraction}."""
+        self.refresh()
+        window_days = (end_date - start_date).days + 1
+        booked_days = {}
+        with self._lock:
+            for reservation in self._reservations.values():
+                overlap = (min(end_date, reservation['tanggal_selesai']) - max(start_date, reservation['tanggal_mulai'])).days + 1
+                if overlap > 0:
+                    booked_days[reservation['room_id']] = booked_days.get(reservation['room_id'], 0) + overlap
+        return {room_id: min(1.0, days / window_days) for room_id, days in booked_days.items()}
+
+    def between(self, start_date, end_date):
+        """Active reservations of any room overlapping [start_date, end_date]."""
+        self.refresh()
+        with self._lock:
+            return [
+                reservation for reservation in self._reservations.values()
+                if reservation['tanggal_mulai'] <= end_date and reservation['tanggal_selesai'] >= start_date
+            ]
+
+
+availability = AvailabilityEngine()
+
+def serialize_reservation(reservation):
+    return {
+        'booking_id': reservation['booking_id'],
+        'room_id': reservation['room_id'],
+        'event_id': reservation['event_id'],
+        'tanggal_mulai': reservation['tanggal_mulai'].strftime(DATE_FORMAT),
+        'tanggal_selesai': reservation['tanggal_selesai'].strftime(DATE_FORMAT),
+        'status': reservation['status']
+    }
+
 # ====================
 # Create DB
 # ====================
 with app.app_context():
     db.create_all()
+    for name in (CATALOG_VERSION, RESERVATION_VERSION):
+        if not VersionCounter.query.get(name):
+            db.session.add(VersionCounter(name=name, value=0))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker seeded the counters first
+        db.session.rollback()
+    availability.rebuild()
 
 # ====================
 # REST Endpoints
 # ====================
-@app.route('/rooms', methods=['GET'])
-def get_rooms():
-    rooms = Room.query.all()
-    return jsonify([{
+def serialize_room(room):
+    return {
         'room_id': room.room_id,
         'nama_ruangan': room.nama_ruangan,
         'kapasitas': room.kapasitas,
         'fasilitas': room.fasilitas,
         'lokasi': room.lokasi
-    } for room in rooms])
+    }
+
+def parse_room_ids(value):
+    """Accept a list of ids or a comma separated string of ids."""
+    if isinstance(value, str):
+        value = [item for item in value.split(',') if item.strip()]
+    return {int(item) for item in value}
+
+def get_rooms_by_ids(room_ids):
+    if not room_ids:
+        return {}
+    rooms = Room.query.filter(Room.room_id.in_(room_ids)).all()
+    return {str(room.room_id): serialize_room(room) for room in rooms}
+
+@app.route('/rooms', methods=['GET'])
+def get_rooms():
+    if 'ids' in request.args:
+        try:
+            room_ids = parse_room_ids(request.args['ids'])
+        except ValueError as e:
+            return jsonify({'error': f'Invalid ids: {str(e)}'}), 400
+        return jsonify(get_rooms_by_ids(room_ids))
+
+    rooms = Room.query.all()
+    return jsonify([serialize_room(room) for room in rooms])
+
+@app.route('/rooms/batch', methods=['POST'])
+def get_rooms_batch():
+    data = request.get_json()
+    if not data or 'ids' not in data:
+        return jsonify({'error': 'Missing ids field'}), 400
+    try:
+        room_ids = parse_room_ids(data['ids'])
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': f'Invalid ids: {str(e)}'}), 400
+    return jsonify(get_rooms_by_ids(room_ids))
+
+@app.route('/rooms/catalog', methods=['GET'])
+def get_room_catalog():
+    """
+    Versioned snapshot of every room. Clients pass the version they hold and
+    get 304 Not Modified until a room mutation bumps the catalog version.
+    """
+    version = get_version(CATALOG_VERSION)
+    known_version = request.args.get('version', type=int)
+    etag = f'"{version}"'
+    if known_version == version or request.headers.get('If-None-Match') == etag:
+        return '', 304, {'ETag': etag}
+
+    rooms = Room.query.all()
+    response = jsonify({
+        'version': version,
+        'rooms': [serialize_room(room) for room in rooms]
+    })
+    response.headers['ETag'] = etag
+    return response
+
+@app.route('/rooms/utilization', methods=['GET'])
+def get_room_utilization():
+    """How busy each room was over the last `days` days (default 90); rooms without reservations are left out."""
+    days = request.args.get('days', 90, type=int)
+    if days < 1:
+        return jsonify({'error': 'days must be at least 1'}), 400
+    end_date = date.today()
+    start_date = end_date - timedelta(days=days - 1)
+    utilization = availability.utilization(start_date, end_date)
+    return jsonify({
+        'start_date': start_date.strftime(DATE_FORMAT),
+        'end_date': end_date.strftime(DATE_FORMAT),
+        'utilization': {str(room_id): round(value, 4) for room_id, value in utilization.items()}
+    })
 
 @app.route('/rooms/<int:room_id>', methods=['GET'])
 def get_room_detail(room_id):
     room = Room.query.get_or_404(room_id)
-    return jsonify({
-        'room_id': room.room_id,
-        'nama_ruangan': room.nama_ruangan,
-        'kapasitas': room.kapasitas,
-        'fasilitas': room.fasilitas,
-        'lokasi': room.lokasi
-    })
+    return jsonify(serialize_room(room))
 
 @app.route('/locations', methods=['GET'])
 def get_locations():
@@ -76,27 +363,168 @@ def check_availability():
         room_id = request.args.get('room_id', type=int)
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
+        exclude_booking_id = request.args.get('exclude_booking_id', type=int)
 
         if not all([room_id, start_date, end_date]):
             return jsonify({'error': 'Missing required parameters'}), 400
 
-        # For now, we'll just check if the room exists
-        # In a real implementation, you would check against a schedule/booking database
+        try:
+            start = datetime.strptime(start_date, DATE_FORMAT).date()
+            end = datetime.strptime(end_date, DATE_FORMAT).date()
+        except ValueError as e:
+            return jsonify({'error': f'Invalid date format: {str(e)}'}), 400
+        if start > end:
+            return jsonify({'error': 'start_date must not be after end_date'}), 400
+
         room = Room.query.get(room_id)
         if not room:
             return jsonify({'error': 'Room not found'}), 404
 
-        # Mock response - in a real implementation, you would check actual availability
+        conflicts = availability.conflicts(room_id, start, end, exclude_booking_id)
         return jsonify({
-            'is_available': True,
+            'is_available': not conflicts,
             'room_id': room_id,
             'start_date': start_date,
-            'end_date': end_date
+            'end_date': end_date,
+            'conflicting_schedules': [serialize_reservation(conflict) for conflict in conflicts]
         })
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/check-availability/bulk', methods=['POST'])
+def check_availability_bulk():
+    """
+    Check many {room_id, start_date, end_date[, exclude_booking_id]} items in one call.
+
+    Results come back in request order. Invalid items get an error instead of
+    failing the whole request; items also conflict with earlier available
+    items of the same batch (conflicting_items holds their positions).
+    """
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('items'), list):
+            return jsonify({'error': 'Missing items field'}), 400
+
+        results = [None] * len(data['items'])
+        checks = []
+        for position, item in enumerate(data['items']):
+            try:
+                room_id = int(item['room_id'])
+                start = datetime.strptime(item['start_date'], DATE_FORMAT).date()
+                end = datetime.strptime(item['end_date'], DATE_FORMAT).date()
+                exclude_booking_id = int(item['exclude_booking_id']) if item.get('exclude_booking_id') is not None else None
+            except (KeyError, TypeError, ValueError) as e:
+                results[position] = {'is_available': False, 'error': f'Invalid item: {str(e)}'}
+                continue
+            if start > end:
+                results[position] = {'is_available': False, 'error': 'start_date must not be after end_date'}
+                continue
+            checks.append((position, room_id, start, end, exclude_booking_id))
+
+        known_rooms = {
+            room_id for (room_id,) in db.session.query(Room.room_id)
+            .filter(Room.room_id.in_({check[1] for check in checks})).all()
+        }
+        for position, room_id, *_ in checks:
+            if room_id not in known_rooms:
+                results[position] = {'room_id': room_id, 'is_available': False, 'error': 'Room not found'}
+        checks = [check for check in checks if check[1] in known_rooms]
+
+        outcomes = availability.check_batch([check[1:] for check in checks])
+        for (position, room_id, start, end, _), (conflicts, batch_conflicts) in zip(checks, outcomes):
+            results[position] = {
+                'is_available': not conflicts and not batch_conflicts,
+                'room_id': room_id,
+                'start_date': start.strftime(DATE_FORMAT),
+                'end_date': end.strftime(DATE_FORMAT),
+                'conflicting_schedules': [serialize_reservation(conflict) for conflict in conflicts],
+                'conflicting_items': batch_conflicts
+            }
+
+        return jsonify({'results': results, 'count': len(results)}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/reservations', methods=['POST'])
+def upsert_reservations():
+    """Create or update reservations; accepts one reservation or {"reservations": [...]}."""
+    data = request.get_json()
+    if not data:
+        return jsonify({'error': 'No data provided'}), 400
+
+    items = data.get('reservations', [data]) if isinstance(data, dict) else data
+    required_fields = ['booking_id', 'room_id', 'tanggal_mulai', 'tanggal_selesai', 'status']
+    if not all(field in item for item in items for field in required_fields):
+        return jsonify({'error': 'Missing required fields'}), 400
+
+    try:
+        revision = bump_version(RESERVATION_VERSION)
+        existing = {
+            reservation.booking_id: reservation
+            for reservation in RoomReservation.query.filter(
+                RoomReservation.booking_id.in_([item['booking_id'] for item in items])
+            )
+        }
+        for item in items:
+            reservation = existing.get(item['booking_id'])
+            if not reservation:
+                reservation = RoomReservation(booking_id=item['booking_id'])
+                db.session.add(reservation)
+            reservation.room_id = item['room_id']
+            reservation.event_id = item.get('event_id')
+            reservation.tanggal_mulai = datetime.strptime(item['tanggal_mulai'], DATE_FORMAT).date()
+            reservation.tanggal_selesai = datetime.strptime(item['tanggal_selesai'], DATE_FORMAT).date()
+            reservation.status = item['status']
+            reservation.revision = revision
+        db.session.commit()
+        availability.refresh()
+
+        return jsonify({'success': True, 'count': len(items), 'revision': revision}), 200
+
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': f'Invalid date format: {str(e)}'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/reservations', methods=['GET'])
+def list_reservations():
+    """Active reservations overlapping start_date..end_date, for planners that need every room at once."""
+    if not all([request.args.get('start_date'), request.args.get('end_date')]):
+        return jsonify({'error': 'Missing required parameters'}), 400
+    try:
+        start_date = datetime.strptime(request.args['start_date'], DATE_FORMAT).date()
+        end_date = datetime.strptime(request.args['end_date'], DATE_FORMAT).date()
+    except ValueError as e:
+        return jsonify({'error': f'Invalid date format: {str(e)}'}), 400
+    if start_date > end_date:
+        return jsonify({'error': 'start_date must not be after end_date'}), 400
+
+    reservations = sorted(availability.between(start_date, end_date), key=lambda reservation: reservation['tanggal_mulai'])
+    return jsonify({'reservations': [serialize_reservation(reservation) for reservation in reservations]})
+
+@app.route('/reservations/<int:booking_id>', methods=['DELETE'])
+def release_reservation(booking_id):
+    try:
+        reservation = RoomReservation.query.get(booking_id)
+        if not reservation:
+            return jsonify({'error': 'Reservation not found'}), 404
+
+        # Keep the row as a tombstone so other workers see the release on refresh
+        reservation.status = 'Cancelled'
+        reservation.revision = bump_version(RESERVATION_VERSION)
+        db.session.commit()
+        availability.refresh()
+
+        return jsonify({'success': True, 'message': f'Reservation for booking {booking_id} released'}), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy'}), 200
@@ -129,6 +557,7 @@ class CreateRoom(Mutation):
             lokasi=lokasi
         )
         db.session.add(room)
+        bump_version(CATALOG_VERSION)
         db.session.commit()
         return CreateRoom(room=room)
 
@@ -157,6 +586,7 @@ class UpdateRoom(Mutation):
         if lokasi is not None:
             room.lokasi = lokasi
 
+        bump_version(CATALOG_VERSION)
         db.session.commit()
         return UpdateRoom(room=room)
 
@@ -172,6 +602,7 @@ class DeleteRoom(Mutation):
         if not room:
             raise Exception("Room not found")
         db.session.delete(room)
+        bump_version(CATALOG_VERSION)
         db.session.commit()
         return DeleteRoom(ok=f"Room ID {room_id} deleted")
 
@@ -244,20 +675,7 @@ def graphql():
     if not data:
         return jsonify({"error": "No input data provided"}), 400
 
-    result = schema.execute(
-        data.get("query"),
-        variables=data.get("variables"),
-        operation_name=data.get("operationName"),
-        context_value=request,
-    )
-
-    response = {}
-    if result.errors:
-        response["errors"] = [str(e) for e in result.errors]
-    if result.data:
-        response["data"] = result.data
-
-    status_code = 200 if not result.errors else 400
+    response, status_code = execute_query(schema, data, context_value=request)
     return jsonify(response), status_code
 
 # ====================
@@ -0,0 +1,29 @@
+import importlib.util
+import os
+import sys
+import tempfile
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='session')
+def service():
+    """The service module on a throwaway SQLite file."""
+    sys.path.insert(0, SERVICE_DIR)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'room_availability.db')
+    spec = importlib.util.spec_from_file_location('room_availability_app', os.path.join(SERVICE_DIR, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def client(service):
+    yield service.app.test_client()
+    with service.app.app_context():
+        service.RoomReservation.query.delete()
+        service.Room.query.delete()
+        service.db.session.commit()
+        service.availability.rebuild()
@@ -0,0 +1,43 @@
+import hashlib
+
+QUERY = '{ rooms { roomId namaRuangan } }'
+
+
+def persisted(query_text):
+    return {'extensions': {'persistedQuery': {
+        'version': 1, 'sha256Hash': hashlib.sha256(query_text.encode('utf-8')).hexdigest()}}}
+
+
+def test_persisted_query_miss_then_register(client):
+    query_text = QUERY + ' # apq'
+
+    miss = client.post('/graphql', json=persisted(query_text))
+    assert miss.status_code == 200
+    assert miss.get_json()['errors'][0]['message'] == 'PersistedQueryNotFound'
+    assert miss.get_json()['errors'][0]['extensions']['code'] == 'PERSISTED_QUERY_NOT_FOUND'
+
+    registered = client.post('/graphql', json=dict(persisted(query_text), query=query_text))
+    assert registered.status_code == 200
+    assert registered.get_json() == {'data': {'rooms': []}}
+
+    hit = client.post('/graphql', json=persisted(query_text))
+    assert hit.status_code == 200
+    assert hit.get_json() == {'data': {'rooms': []}}
+
+
+def test_hash_mismatch_is_rejected(client):
+    response = client.post('/graphql', json=dict(persisted('{ other }'), query=QUERY))
+
+    assert response.status_code == 400
+
+
+def test_malformed_bodies_are_rejected_not_crashed(client):
+    for body, status_code in (
+        ({'query': ['not', 'a', 'string']}, 400),
+        ({'query': 42}, 400),
+        ({'extensions': {'persistedQuery': {'sha256Hash': ['x']}}}, 400),
+        (['not', 'an', 'object'], 400),
+        # Unusable extensions are ignored
+        ({'extensions': 'persisted', 'query': QUERY}, 200),
+    ):
+        assert client.post('/graphql', json=body).status_code == status_code, body
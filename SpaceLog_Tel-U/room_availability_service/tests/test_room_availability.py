@@ -0,0 +1,69 @@
+from datetime import date
+
+
+def test_overlaps_are_inclusive_at_both_edges(service):
+    index = service.RoomIntervalIndex()
+    index.add(10, 12, 'a')
+
+    assert index.overlapping(12, 14) == ['a']
+    assert index.overlapping(8, 10) == ['a']
+    assert index.overlapping(11, 11) == ['a']
+    assert index.overlapping(13, 15) == []
+    assert index.overlapping(5, 9) == []
+
+
+def test_overlap_window_reaches_back_by_the_longest_reservation(service):
+    index = service.RoomIntervalIndex()
+    index.add(1, 30, 'long')
+    index.add(25, 25, 'short')
+
+    assert index.overlapping(30, 31) == ['long']
+    assert sorted(index.overlapping(25, 25)) == ['long', 'short']
+
+
+def test_longest_shrinks_when_its_reservation_is_removed(service):
+    index = service.RoomIntervalIndex()
+    index.add(1, 100, 'long')
+    index.add(200, 201, 'a')
+    index.add(300, 301, 'b')
+
+    index.remove(1, 'long')
+    assert index.longest == 1
+    assert index.overlapping(50, 60) == []
+
+    index.remove(200, 'a')
+    assert index.longest == 1
+    assert index.overlapping(301, 302) == ['b']
+
+    index.remove(300, 'b')
+    assert index.longest == 0
+    assert index.lengths == {}
+
+
+def test_same_start_entries_are_removed_by_booking(service):
+    index = service.RoomIntervalIndex()
+    index.add(5, 5, 'a')
+    index.add(5, 9, 'b')
+
+    index.remove(5, 'b')
+
+    assert index.overlapping(5, 9) == ['a']
+    assert index.longest == 0
+
+
+def test_released_reservation_frees_its_days(service, client):
+    client.post('/reservations', json={'reservations': [
+        {'booking_id': 1, 'room_id': 1, 'event_id': 1, 'tanggal_mulai': '2030-01-01',
+         'tanggal_selesai': '2030-03-31', 'status': 'Approved'},
+        {'booking_id': 2, 'room_id': 1, 'event_id': 2, 'tanggal_mulai': '2030-04-10',
+         'tanggal_selesai': '2030-04-11', 'status': 'Pending'},
+    ]})
+    with service.app.app_context():
+        assert [r['booking_id'] for r in service.availability.conflicts(1, date(2030, 3, 31), date(2030, 4, 10))] == [1, 2]
+
+    assert client.delete('/reservations/1').status_code == 200
+
+    with service.app.app_context():
+        assert [r['booking_id'] for r in service.availability.conflicts(1, date(2030, 3, 31), date(2030, 4, 10))] == [2]
+        assert service.availability.conflicts(1, date(2030, 4, 12), date(2030, 4, 12)) == []
+        assert service.availability._rooms[1].longest == 1
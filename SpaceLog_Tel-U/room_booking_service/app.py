@@ -1,15 +1,32 @@
 # =====================
 # Import Libraries
 # =====================
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from db_config import configure_database
 from flask_cors import CORS
 import requests
-from datetime import datetime, date
+from http_client import upstream
+from batch_loader import request_loader
+from datetime import datetime, date, timedelta
+from sqlalchemy import and_, or_, func
+from sqlalchemy.exc import IntegrityError
+import base64
+import json
+import os
+import random
+import socket
+import threading
+import time
+from itertools import islice, groupby
+from functools import wraps
+import hashlib
+import logging
 from enum import Enum
 from marshmallow import Schema, fields, ValidationError
 import pytz
 import graphene
+from graphql_cache import execute_query
 from graphene import ObjectType, String, Int, Field, Mutation
 
 # ====================
@@ -21,18 +38,24 @@ CORS(app)  # Mengaktifkan CORS agar bisa diakses dari frontend/backend lain
 # ====================
 # Service Endpoint Config
 # ====================
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///room_booking.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+configure_database(app, 'sqlite:///room_booking.db')
 
 ROOM_AVAILABILITY_SERVICE = "http://room_availability_service:5001"
 ADD_EVENT_SERVICE = "http://add_event_service:5008"
 BOOKING_CONFIRMATION_SERVICE = "http://booking_confirmation_service:5006"
+ROOM_SCHEDULE_SERVICE = "http://room_schedule_service:5004"
 
 # ====================
 # Database Initialization
 # ====================
 db = SQLAlchemy(app)
 
+# ====================
+# Logging Configuration
+# ====================
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 # ====================
 # Booking Status Enum
 # ====================
@@ -46,17 +69,72 @@ class BookingStatus(str, Enum):
 # ====================
 class Booking(db.Model):
     booking_id = db.Column(db.Integer, primary_key=True)
-    event_id = db.Column(db.Integer)
-    room_id = db.Column(db.Integer)
+    event_id = db.Column(db.Integer, index=True)
+    room_id = db.Column(db.Integer, index=True)
     approval_id = db.Column(db.Integer)
     tanggal_booking = db.Column(db.DateTime)
-    tanggal_mulai = db.Column(db.Date)
+    tanggal_mulai = db.Column(db.Date, index=True)
     tanggal_selesai = db.Column(db.Date)
-    status_booking = db.Column(db.String(20))
+    status_booking = db.Column(db.String(20), index=True)
     keterangan_reject = db.Column(db.String(255))
 
+    __table_args__ = (
+        db.Index('ix_booking_tanggal_booking_booking_id', 'tanggal_booking', 'booking_id'),
+    )
+
+class OutboxMessage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    topic = db.Column(db.String(50), nullable=False)
+    aggregate_id = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_outbox_message_status_topic_id', 'status', 'topic', 'id'),
+    )
+
+class OutboxLease(db.Model):
+    destination = db.Column(db.String(50), primary_key=True)
+    owner = db.Column(db.String(100))
+    expires_at = db.Column(db.DateTime)
+
+class RoomDayClaim(db.Model):
+    """One row per booked room-day; the primary key makes double booking fail atomically on insert."""
+    room_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    day = db.Column(db.Date, primary_key=True)
+    booking_id = db.Column(db.Integer, nullable=False, index=True)
+
+class IdempotencyKey(db.Model):
+    key = db.Column(db.String(255), primary_key=True)
+    request_hash = db.Column(db.String(64), nullable=False)
+    status_code = db.Column(db.Integer)
+    response = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, index=True)
+
+ACTIVE_BOOKING_STATUSES = (BookingStatus.PENDING.value, BookingStatus.APPROVED.value)
+
+# Each destination is drained in message order by one dispatcher at a time
+OUTBOX_TOPICS = {
+    'booking.sync': 'booking_confirmation',
+    'reservation.upsert': 'room_availability',
+    'reservation.release': 'room_availability',
+    'schedule.upsert': 'room_schedule',
+    'schedule.release': 'room_schedule',
+}
+
 with app.app_context():
     db.create_all()
+    for destination in set(OUTBOX_TOPICS.values()):
+        if not OutboxLease.query.get(destination):
+            db.session.add(OutboxLease(destination=destination))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another worker seeded the leases first
+        db.session.rollback()
 
 # ====================
 # Marshmallow Schema for input validation
@@ -67,13 +145,714 @@ class BookingRequestSchema(Schema):
 
 booking_schema = BookingRequestSchema()
 
+# ====================
+# Batched Upstream Lookups
+# ====================
+DEFAULT_APPROVAL_STATUS = {'status': 'Pending', 'keterangan_reject': None}
+
+def count_upstream_call():
+    """Track the number of upstream HTTP calls made while serving the current request."""
+    g.upstream_calls = g.get('upstream_calls', 0) + 1
+
+def fetch_events(event_ids, fields):
+    """Return {event_id: event} with the projected fields using one call to add_event_service; raises on failure."""
+    count_upstream_call()
+    response = upstream.post(
+        f"{ADD_EVENT_SERVICE}/api/events/batch",
+        json={'ids': [event_id for event_id in event_ids if event_id is not None], 'fields': list(fields)},
+        timeout=5
+    )
+    response.raise_for_status()
+    return {int(event_id): event for event_id, event in response.json().items()}
+
+def fetch_event_names(event_ids):
+    """Return {event_id: nama_event} for the given events using one call to add_event_service."""
+    if not event_ids:
+        return {}
+    try:
+        events = fetch_events(event_ids, ['nama_event'])
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to fetch events: {str(e)}")
+        return {}
+    return {event_id: event.get('nama_event', '-') for event_id, event in events.items()}
+
+def fetch_room_names(room_ids):
+    """Return {room_id: nama_ruangan} for the given rooms using one call to room_availability_service."""
+    if not room_ids:
+        return {}
+    try:
+        count_upstream_call()
+        response = upstream.post(
+            f"{ROOM_AVAILABILITY_SERVICE}/rooms/batch",
+            json={'ids': [room_id for room_id in room_ids if room_id is not None]},
+            timeout=5
+        )
+        if response.status_code != 200:
+            return {}
+        return {int(room_id): room.get('nama_ruangan', '-') for room_id, room in response.json().items()}
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Failed to fetch rooms: {str(e)}")
+        return {}
+
+def fetch_approval_status(booking_id):
+    """Single-booking approval lookup, used when the bulk endpoint is not available."""
+    try:
+        count_upstream_call()
+        response = upstream.get(f"{BOOKING_CONFIRMATION_SERVICE}/api/approval-status/{booking_id}", timeout=2)
+        return response.json() if response.status_code == 200 else DEFAULT_APPROVAL_STATUS
+    except Exception as e:
+        logger.error(f"Error getting approval status: {str(e)}")
+        return DEFAULT_APPROVAL_STATUS
+
+def fetch_approval_statuses(booking_ids):
+    """Return {booking_id: approval status} for many bookings using one call to booking_confirmation_service."""
+    if not booking_ids:
+        return {}
+    try:
+        count_upstream_call()
+        response = upstream.post(
+            f"{BOOKING_CONFIRMATION_SERVICE}/api/approval-status/bulk",
+            json={'booking_ids': list(booking_ids)},
+            timeout=5
+        )
+        if response.status_code == 200:
+            statuses = response.json().get('statuses', {})
+            return {
+                booking_id: statuses.get(str(booking_id), DEFAULT_APPROVAL_STATUS)
+                for booking_id in booking_ids
+            }
+        if response.status_code not in (404, 405):
+            logger.error(f"Bulk approval lookup failed: {response.status_code} {response.text}")
+            return {}
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Bulk approval lookup failed: {str(e)}")
+        return {}
+
+    # Older booking_confirmation_service without the bulk endpoint
+    logger.warning("Bulk approval endpoint unavailable, falling back to per-booking lookups")
+    return {booking_id: fetch_approval_status(booking_id) for booking_id in booking_ids}
+
+# ====================
+# GraphQL Batch Loaders
+# ====================
+# name -> (batch function, value for keys the upstream does not know)
+LOADERS = {
+    'approval_status': (fetch_approval_statuses, DEFAULT_APPROVAL_STATUS),
+    'event_name': (fetch_event_names, '-'),
+    'room_name': (fetch_room_names, '-'),
+}
+
+def get_loader(name):
+    return request_loader(name, *LOADERS[name])
+
+def queue_booking_lookups(bookings):
+    get_loader('approval_status').queue(booking.booking_id for booking in bookings)
+    get_loader('event_name').queue(booking.event_id for booking in bookings)
+    get_loader('room_name').queue(booking.room_id for booking in bookings)
+
+# ====================
+# Booking List Filters & Pagination
+# ====================
+BOOKING_PAGE_MAX = 500
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def filter_bookings(query, args):
+    """Apply the ids, status, room_id, event_id and date range filters of the booking list in SQL."""
+    if args.get('ids'):
+        query = query.filter(Booking.booking_id.in_({int(item) for item in args['ids'].split(',') if item.strip()}))
+    if args.get('status'):
+        query = query.filter(Booking.status_booking == args['status'])
+    if args.get('room_id'):
+        query = query.filter(Booking.room_id == int(args['room_id']))
+    if args.get('event_id'):
+        query = query.filter(Booking.event_id == int(args['event_id']))
+    # Date range keeps bookings overlapping [start_date, end_date]
+    if args.get('start_date'):
+        query = query.filter(Booking.tanggal_selesai >= datetime.strptime(args['start_date'], '%Y-%m-%d').date())
+    if args.get('end_date'):
+        query = query.filter(Booking.tanggal_mulai <= datetime.strptime(args['end_date'], '%Y-%m-%d').date())
+    return query
+
+def paginate_bookings(query, args):
+    """
+    Keyset pagination over booking_id (ascending, default) or
+    tanggal_booking (newest first, booking_id as tie breaker).
+
+    Without a limit the full filtered list is returned, as before.
+    Returns (bookings, next_cursor); next_cursor is None on the last page.
+    """
+    sort = args.get('sort', 'booking_id')
+    cursor = decode_cursor(args['cursor']) if args.get('cursor') else None
+
+    if sort == 'booking_id':
+        if cursor:
+            query = query.filter(Booking.booking_id > cursor['booking_id'])
+        query = query.order_by(Booking.booking_id)
+    elif sort == 'tanggal_booking':
+        if cursor:
+            tanggal_booking = datetime.fromisoformat(cursor['tanggal_booking'])
+            query = query.filter(or_(
+                Booking.tanggal_booking < tanggal_booking,
+                and_(Booking.tanggal_booking == tanggal_booking, Booking.booking_id < cursor['booking_id'])
+            ))
+        query = query.order_by(Booking.tanggal_booking.desc(), Booking.booking_id.desc())
+    else:
+        raise ValueError(f'Unsupported sort: {sort}')
+
+    if not args.get('limit'):
+        return query.all(), None
+
+    limit = max(1, min(int(args['limit']), BOOKING_PAGE_MAX))
+    bookings = query.limit(limit + 1).all()
+    if len(bookings) <= limit:
+        return bookings, None
+
+    bookings = bookings[:limit]
+    last = bookings[-1]
+    next_cursor = {'booking_id': last.booking_id}
+    if sort == 'tanggal_booking':
+        next_cursor['tanggal_booking'] = last.tanggal_booking.isoformat()
+    return bookings, encode_cursor(next_cursor)
+
+def enrich_bookings(bookings):
+    """Serialize bookings with event, room and approval data, one batched call per upstream."""
+    event_names = fetch_event_names({booking.event_id for booking in bookings})
+    room_names = fetch_room_names({booking.room_id for booking in bookings})
+    approvals = fetch_approval_statuses([booking.booking_id for booking in bookings])
+
+    results = []
+    for booking in bookings:
+        try:
+            approval_data = approvals.get(booking.booking_id, DEFAULT_APPROVAL_STATUS)
+            results.append({
+                'booking_id': booking.booking_id,
+                'nama_event': event_names.get(booking.event_id, '-'),
+                'nama_ruangan': room_names.get(booking.room_id, '-'),
+                'tanggal_booking': booking.tanggal_booking.strftime('%Y-%m-%d %H:%M:%S'),
+                'tanggal_mulai': booking.tanggal_mulai.strftime('%Y-%m-%d'),
+                'tanggal_selesai': booking.tanggal_selesai.strftime('%Y-%m-%d'),
+                'status': approval_data.get('status', 'Pending'),
+                'room_id': booking.room_id,
+                'event_id': booking.event_id,
+                'keterangan_reject': approval_data.get('keterangan_reject')
+            })
+        except Exception as e:
+            logger.error(f"Error processing booking {booking.booking_id}: {str(e)}")
+            continue
+    return results
+
+# ====================
+# NDJSON Export
+# ====================
+NDJSON_MIMETYPE = 'application/x-ndjson'
+STREAM_CHUNK_SIZE = 500
+
+def wants_ndjson():
+    """Streaming is requested with ?stream=1 or Accept: application/x-ndjson."""
+    if request.args.get('stream') in ('1', 'true'):
+        return True
+    return request.accept_mimetypes.best == NDJSON_MIMETYPE
+
+def stream_bookings(query):
+    """
+    Stream the filtered bookings as one JSON object per line.
+
+    Rows are read from the database in chunks with yield_per and enriched
+    one chunk at a time, so memory stays flat however long the export is.
+    """
+    def generate():
+        rows = iter(query.order_by(Booking.booking_id).yield_per(STREAM_CHUNK_SIZE))
+        streamed = 0
+        try:
+            while True:
+                chunk = list(islice(rows, STREAM_CHUNK_SIZE))
+                if not chunk:
+                    break
+                for booking_data in enrich_bookings(chunk):
+                    yield json.dumps(booking_data) + '\n'
+                streamed += len(chunk)
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated stream
+            logger.error(f"Booking export aborted after {streamed} rows: {str(e)}")
+            return
+        logger.info(f"Streamed {streamed} bookings using {g.get('upstream_calls', 0)} upstream calls")
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+# ====================
+# Transactional Outbox
+# ====================
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_POLL_INTERVAL = 1.0
+OUTBOX_LEASE_SECONDS = 30
+OUTBOX_BACKOFF_MAX = 60
+
+class OutboxDeliveryError(Exception):
+    def __init__(self, message, retryable=True):
+        super().__init__(message)
+        self.retryable = retryable
+
+def check_delivery(response):
+    """5xx is retried with backoff, any other non-2xx means the message is rejected."""
+    if response.status_code >= 500:
+        raise OutboxDeliveryError(f"{response.status_code} {response.text[:200]}")
+    if response.status_code >= 300:
+        raise OutboxDeliveryError(f"{response.status_code} {response.text[:200]}", retryable=False)
+
+def enqueue(topic, aggregate_id, payload):
+    """Add a message to the current session; it is committed together with the booking change."""
+    db.session.add(OutboxMessage(topic=topic, aggregate_id=aggregate_id, payload=json.dumps(payload)))
+
+def booking_sync_payload(booking):
+    return {
+        'booking_id': booking.booking_id,
+        'event_id': booking.event_id,
+        'room_id': booking.room_id,
+        'tanggal_booking': booking.tanggal_booking.strftime('%Y-%m-%d %H:%M:%S'),
+        'tanggal_mulai': booking.tanggal_mulai.strftime('%Y-%m-%d'),
+        'tanggal_selesai': booking.tanggal_selesai.strftime('%Y-%m-%d'),
+        'status_booking': booking.status_booking,
+        'keterangan_reject': None
+    }
+
+def reservation_payload(booking):
+    return {
+        'booking_id': booking.booking_id,
+        'room_id': booking.room_id,
+        'event_id': booking.event_id,
+        'tanggal_mulai': booking.tanggal_mulai.strftime('%Y-%m-%d'),
+        'tanggal_selesai': booking.tanggal_selesai.strftime('%Y-%m-%d'),
+        'status': booking.status_booking
+    }
+
+def queue_booking_sync(booking):
+    """Queue the booking for booking_confirmation_service; the booking must be flushed first."""
+    enqueue('booking.sync', booking.booking_id, booking_sync_payload(booking))
+
+def queue_reservation_sync(booking):
+    """Queue mirroring the booking into the availability index of room_availability_service."""
+    enqueue('reservation.upsert', booking.booking_id, reservation_payload(booking))
+
+def queue_reservation_release(booking_id):
+    enqueue('reservation.release', booking_id, {'booking_id': booking_id})
+
+def queue_schedule_sync(booking):
+    """Queue the booking for the schedule projection of room_schedule_service, which keeps only approved bookings."""
+    enqueue('schedule.upsert', booking.booking_id, reservation_payload(booking))
+
+def queue_schedule_release(booking_id):
+    enqueue('schedule.release', booking_id, {'booking_id': booking_id})
+
+def deliver_booking_syncs(messages):
+    """Sync a run of bookings in one call and store the approval ids that come back."""
+    payloads = [json.loads(message.payload) for message in messages]
+    response = upstream.post(f"{BOOKING_CONFIRMATION_SERVICE}/api/sync-bookings", json={'bookings': payloads})
+    if response.status_code in (404, 405):
+        # Older booking_confirmation_service without the bulk endpoint
+        approval_ids = {}
+        for payload in payloads:
+            single = upstream.post(f"{BOOKING_CONFIRMATION_SERVICE}/api/sync-booking", json=payload)
+            check_delivery(single)
+            approval_ids[payload['booking_id']] = single.json().get('approval_log', {}).get('approval_id')
+    else:
+        check_delivery(response)
+        approval_ids = {int(booking_id): approval_id for booking_id, approval_id in response.json().get('approval_ids', {}).items()}
+
+    for booking in Booking.query.filter(Booking.booking_id.in_(approval_ids)).all():
+        # A later status update may already have set a newer approval id
+        if booking.approval_id is None:
+            booking.approval_id = approval_ids[booking.booking_id]
+
+def deliver_reservation_upserts(messages):
+    response = upstream.post(
+        f"{ROOM_AVAILABILITY_SERVICE}/reservations",
+        json=[json.loads(message.payload) for message in messages]
+    )
+    check_delivery(response)
+
+def deliver_reservation_releases(messages):
+    for message in messages:
+        response = upstream.delete(f"{ROOM_AVAILABILITY_SERVICE}/reservations/{message.aggregate_id}")
+        if response.status_code != 404:
+            check_delivery(response)
+
+def deliver_schedule_upserts(messages):
+    response = upstream.post(
+        f"{ROOM_SCHEDULE_SERVICE}/schedules/sync",
+        json=[json.loads(message.payload) for message in messages]
+    )
+    check_delivery(response)
+
+def deliver_schedule_releases(messages):
+    for message in messages:
+        response = upstream.delete(f"{ROOM_SCHEDULE_SERVICE}/schedules/booking/{message.aggregate_id}")
+        if response.status_code != 404:
+            check_delivery(response)
+
+OUTBOX_HANDLERS = {
+    'booking.sync': deliver_booking_syncs,
+    'reservation.upsert': deliver_reservation_upserts,
+    'reservation.release': deliver_reservation_releases,
+    'schedule.upsert': deliver_schedule_upserts,
+    'schedule.release': deliver_schedule_releases,
+}
+
+class OutboxDispatcher:
+    """
+    Background thread that drains the outbox.
+
+    Messages of one destination are delivered in id order, consecutive
+    messages of the same topic in a single call. A failed delivery stops
+    that destination and retries it with jittered backoff, so a booking is
+    never synced out of order. Only the worker holding the destination
+    lease dispatches it; the others just enqueue.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+        self._owner = None
+        self._failures = {}
+        self._retry_at = {}
+
+    def start(self):
+        """Start the thread once per process, also in a freshly forked worker."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._owner = f"{socket.gethostname()}:{self._pid}"
+            self._wake = threading.Event()
+            self._failures = {}
+            self._retry_at = {}
+            threading.Thread(target=self._run, name='outbox-dispatcher', daemon=True).start()
+
+    def wake(self):
+        """Deliver right away instead of waiting for the next poll."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(OUTBOX_POLL_INTERVAL)
+            self._wake.clear()
+            for destination in sorted(set(OUTBOX_TOPICS.values())):
+                try:
+                    with app.app_context():
+                        self.drain(destination)
+                except Exception as e:
+                    logger.error(f"Outbox dispatcher error for {destination}: {str(e)}")
+
+    def _acquire_lease(self, destination):
+        now = datetime.utcnow()
+        acquired = OutboxLease.query.filter(
+            OutboxLease.destination == destination,
+            or_(OutboxLease.owner.is_(None), OutboxLease.owner == self._owner, OutboxLease.expires_at < now)
+        ).update(
+            {'owner': self._owner, 'expires_at': now + timedelta(seconds=OUTBOX_LEASE_SECONDS)},
+            synchronize_session=False
+        )
+        db.session.commit()
+        return acquired == 1
+
+    def drain(self, destination):
+        if time.monotonic() < self._retry_at.get(destination, 0):
+            return
+        topics = [topic for topic, target in OUTBOX_TOPICS.items() if target == destination]
+        while self._acquire_lease(destination):
+            messages = OutboxMessage.query.filter(
+                OutboxMessage.status == 'pending',
+                OutboxMessage.topic.in_(topics)
+            ).order_by(OutboxMessage.id).limit(OUTBOX_BATCH_SIZE).all()
+            if not messages:
+                return
+            for _, group in groupby(messages, key=lambda message: message.topic):
+                if not self._deliver(destination, list(group)):
+                    return
+
+    def _deliver(self, destination, messages):
+        """Deliver one group; returns False when the destination should back off."""
+        try:
+            OUTBOX_HANDLERS[messages[0].topic](messages)
+        except requests.exceptions.RequestException as e:
+            error = OutboxDeliveryError(str(e))
+        except OutboxDeliveryError as e:
+            error = e
+        else:
+            for message in messages:
+                db.session.delete(message)
+            db.session.commit()
+            self._failures.pop(destination, None)
+            return True
+
+        db.session.rollback()
+        if not error.retryable and len(messages) > 1:
+            # One bad message rejected the whole call; deliver one by one to isolate it
+            return all(self._deliver(destination, [message]) for message in messages)
+
+        for message in messages:
+            message.attempts += 1
+            message.last_error = str(error)[:255]
+            if not error.retryable:
+                message.status = 'failed'
+        db.session.commit()
+
+        if not error.retryable:
+            logger.error(f"Outbox message {messages[0].id} rejected by {destination}: {str(error)}")
+            return True
+
+        failures = self._failures.get(destination, 0) + 1
+        self._failures[destination] = failures
+        delay = random.uniform(0, min(OUTBOX_BACKOFF_MAX, 2 ** failures))
+        self._retry_at[destination] = time.monotonic() + delay
+        logger.warning(f"Outbox delivery to {destination} failed ({str(error)}), retrying in {delay:.1f}s")
+        return False
+
+outbox = OutboxDispatcher()
+
+@app.before_request
+def start_outbox_dispatcher():
+    outbox.start()
+
+# ====================
+# Atomic Slot Claims
+# ====================
+def booking_days(room_id, tanggal_mulai, tanggal_selesai):
+    day = tanggal_mulai
+    while day <= tanggal_selesai:
+        yield room_id, day
+        day += timedelta(days=1)
+
+def claim_days(booking):
+    """
+    Claim every day of the booking for its room in the current transaction.
+
+    The (room_id, day) primary key turns a concurrent double booking into an
+    IntegrityError on flush, so check and insert are one atomic step
+    without a global lock. The booking must be flushed first.
+    """
+    db.session.add_all([
+        RoomDayClaim(room_id=room_id, day=day, booking_id=booking.booking_id)
+        for room_id, day in booking_days(booking.room_id, booking.tanggal_mulai, booking.tanggal_selesai)
+    ])
+    db.session.flush()
+
+def release_days(booking_id):
+    RoomDayClaim.query.filter_by(booking_id=booking_id).delete(synchronize_session=False)
+
+def set_booking_status(booking, status_booking):
+    """
+    Move the booking to status_booking and queue the change for
+    room_availability_service and room_schedule_service; the caller commits.
+
+    Rejected bookings give their days back; a revived booking has to win
+    them again, which raises IntegrityError when they were taken meanwhile.
+    """
+    was_active = booking.status_booking in ACTIVE_BOOKING_STATUSES
+    booking.status_booking = status_booking
+    is_active = booking.status_booking in ACTIVE_BOOKING_STATUSES
+    if was_active and not is_active:
+        release_days(booking.booking_id)
+    elif is_active and not was_active:
+        claim_days(booking)
+    queue_reservation_sync(booking)
+    queue_schedule_sync(booking)
+
+def apply_approval(booking, approval):
+    """
+    Read-repair: bring the booking in line with its approval in
+    booking_confirmation_service. Returns whether the status changed; the
+    caller commits and handles IntegrityError like set_booking_status.
+    """
+    status_booking = approval.get('status', BookingStatus.PENDING.value)
+    booking.keterangan_reject = approval.get('keterangan_reject')
+    if approval.get('approval_id'):
+        booking.approval_id = approval['approval_id']
+    if booking.status_booking == status_booking:
+        return False
+    set_booking_status(booking, status_booking)
+    return True
+
+RECONCILE_PAGE_SIZE = 500
+
+def reconcile_pending_bookings():
+    """
+    Read-repair every Pending booking at once, a page at a time with one
+    bulk approval lookup per page. Catches approvals whose status update
+    never reached this service. Returns (checked, updated); raises
+    RequestException when booking_confirmation_service cannot be reached.
+    """
+    checked = updated = 0
+    last_id = 0
+    while True:
+        bookings = Booking.query.filter(
+            Booking.status_booking == BookingStatus.PENDING.value,
+            Booking.booking_id > last_id
+        ).order_by(Booking.booking_id).limit(RECONCILE_PAGE_SIZE).all()
+        if not bookings:
+            return checked, updated
+        approvals = fetch_approval_statuses([booking.booking_id for booking in bookings])
+        if not approvals:
+            raise requests.exceptions.ConnectionError('Approval statuses unavailable')
+        for booking in bookings:
+            # Pending bookings already hold their days, so no claim can fail here
+            if apply_approval(booking, approvals[booking.booking_id]):
+                updated += 1
+        db.session.commit()
+        checked += len(bookings)
+        last_id = bookings[-1].booking_id
+
+def backfill_legacy_bookings():
+    """
+    One-time backfill for bookings made before RoomDayClaim and the
+    availability index existed: claim their days and queue them for
+    room_availability_service in the same transaction.
+    """
+    if RoomDayClaim.query.first():
+        return
+    claims = {}
+    active = Booking.query.filter(Booking.status_booking.in_(ACTIVE_BOOKING_STATUSES)).order_by(Booking.booking_id).all()
+    for booking in active:
+        for key in booking_days(booking.room_id, booking.tanggal_mulai, booking.tanggal_selesai):
+            # Legacy double bookings keep the claim of the earliest booking
+            claims.setdefault(key, booking.booking_id)
+        queue_reservation_sync(booking)
+    db.session.add_all([
+        RoomDayClaim(room_id=room_id, day=day, booking_id=booking_id)
+        for (room_id, day), booking_id in claims.items()
+    ])
+    try:
+        db.session.commit()
+        if active:
+            logger.info(f"Backfilled day claims and reservations of {len(active)} bookings")
+    except IntegrityError:
+        # Another worker ran the backfill first
+        db.session.rollback()
+
+with app.app_context():
+    backfill_legacy_bookings()
+
+def claimed_days(keys):
+    """Return the (room_id, day) pairs among keys that are already claimed, in one query per room."""
+    days_by_room = {}
+    for room_id, day in keys:
+        days_by_room.setdefault(room_id, set()).add(day)
+    taken = set()
+    for room_id, days in days_by_room.items():
+        rows = db.session.query(RoomDayClaim.day).filter(
+            RoomDayClaim.room_id == room_id, RoomDayClaim.day.in_(days)
+        ).all()
+        taken.update((room_id, day) for (day,) in rows)
+    return taken
+
+# ====================
+# Idempotency Keys
+# ====================
+IDEMPOTENCY_TTL = timedelta(hours=24)
+# A key still without a response after this long belongs to a crashed request
+IDEMPOTENCY_LOCK_TIMEOUT = timedelta(seconds=60)
+IDEMPOTENCY_EVICT_INTERVAL = 300
+
+_last_idempotency_eviction = 0.0
+
+def evict_expired_idempotency_keys():
+    """Delete keys past their TTL, at most once per interval per worker."""
+    global _last_idempotency_eviction
+    if time.monotonic() - _last_idempotency_eviction < IDEMPOTENCY_EVICT_INTERVAL:
+        return
+    _last_idempotency_eviction = time.monotonic()
+    IdempotencyKey.query.filter(
+        IdempotencyKey.created_at < datetime.utcnow() - IDEMPOTENCY_TTL
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
+def claim_idempotency_key(key, request_hash):
+    """Claim the key for this request; returns None when claimed, otherwise the response to send."""
+    now = datetime.utcnow()
+    db.session.add(IdempotencyKey(key=key, request_hash=request_hash, created_at=now))
+    try:
+        db.session.commit()
+        return None
+    except IntegrityError:
+        db.session.rollback()
+
+    record = IdempotencyKey.query.get(key)
+    if record is None:
+        return jsonify({'error': 'Idempotency key was just evicted, retry the request'}), 409
+    if record.request_hash != request_hash:
+        return jsonify({'error': 'Idempotency-Key was already used with a different request'}), 422
+    if record.status_code is not None:
+        return Response(record.response, status=record.status_code, mimetype='application/json',
+                        headers={'Idempotent-Replayed': 'true'})
+    if now - record.created_at < IDEMPOTENCY_LOCK_TIMEOUT:
+        return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+
+    # Abandoned claim: take it over with a compare-and-swap on created_at
+    taken = IdempotencyKey.query.filter_by(key=key, status_code=None, created_at=record.created_at) \
+        .update({'created_at': now}, synchronize_session=False)
+    db.session.commit()
+    if not taken:
+        return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+    return None
+
+def idempotent(view):
+    """
+    Make a POST endpoint safe to retry with an Idempotency-Key header.
+
+    The first request claims the key and its response is stored; retries
+    with the same key and body replay that response. 5xx responses are not
+    stored, so the key can be retried.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return view(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({'error': 'Idempotency-Key is too long'}), 400
+
+        request_hash = hashlib.sha256(
+            f"{request.method} {request.path}\n".encode() + request.get_data()
+        ).hexdigest()
+        evict_expired_idempotency_keys()
+        replay = claim_idempotency_key(key, request_hash)
+        if replay is not None:
+            return replay
+
+        try:
+            response = app.make_response(view(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            IdempotencyKey.query.filter_by(key=key).delete(synchronize_session=False)
+            db.session.commit()
+            raise
+
+        if response.status_code >= 500:
+            IdempotencyKey.query.filter_by(key=key).delete(synchronize_session=False)
+        else:
+            IdempotencyKey.query.filter_by(key=key).update({
+                'status_code': response.status_code,
+                'response': response.get_data(as_text=True)
+            }, synchronize_session=False)
+        db.session.commit()
+        return response
+    return wrapper
+
 # ====================
 # Routes
 # ====================
 @app.route('/api/approved-events', methods=['GET'])
 def get_approved_events():
     try:
-        response = requests.get(f"{ADD_EVENT_SERVICE}/api/events")
+        response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events")
         response.raise_for_status()
         all_events = response.json()
         approved_events = [event for event in all_events if event.get('status_approval') == 'Approved']
@@ -82,6 +861,7 @@ def get_approved_events():
         return jsonify({'error': f'Service error: {str(e)}'}), 500
 
 @app.route('/api/book-room', methods=['POST'])
+@idempotent
 def book_room():
     try:
         data = request.get_json()
@@ -93,7 +873,7 @@ def book_room():
         event_id = data['event_id']
         room_id = data['room_id']
 
-        event_response = requests.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
+        event_response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
         if event_response.status_code != 200:
             return jsonify({'error': 'Event not found'}), 404
 
@@ -104,7 +884,7 @@ def book_room():
         if not all([tanggal_mulai, tanggal_selesai]):
             return jsonify({'error': 'Event data incomplete'}), 400
 
-        availability_response = requests.get(
+        availability_response = upstream.get(
             f"{ROOM_AVAILABILITY_SERVICE}/check-availability",
             params={
                 'room_id': room_id,
@@ -135,34 +915,18 @@ def book_room():
             status_booking=BookingStatus.PENDING.value,
         )
         db.session.add(booking)
-        db.session.commit()
-
-        # Sync with booking_confirmation_service
+        db.session.flush()
         try:
-            sync_response = requests.post(
-                f"{BOOKING_CONFIRMATION_SERVICE}/api/sync-booking",
-                json={
-                    "booking_id": booking.booking_id,
-                    "event_id": booking.event_id,
-                    "room_id": booking.room_id,
-                    "tanggal_booking": booking.tanggal_booking.strftime('%Y-%m-%d %H:%M:%S'),
-                    "tanggal_mulai": booking.tanggal_mulai.strftime('%Y-%m-%d'),
-                    "tanggal_selesai": booking.tanggal_selesai.strftime('%Y-%m-%d'),
-                    "status_booking": booking.status_booking,
-                    "keterangan_reject": None
-                },
-                timeout=2
-            )
-            if sync_response.status_code == 200:
-                sync_data = sync_response.json()
-                approval_id = sync_data.get('approval_log', {}).get('approval_id')
-                if approval_id:
-                    booking.approval_id = approval_id
-                    db.session.commit()
-            else:
-                print(f"Failed to sync booking: {sync_response.text}")
-        except Exception as e:
-            print(f"Failed to sync booking: {e}")
+            claim_days(booking)
+        except IntegrityError:
+            # Lost the race for the slot to a concurrent booking
+            db.session.rollback()
+            return jsonify({'error': 'Room is not available for the requested time slot', 'conflicts': []}), 409
+        # Downstream syncs are committed with the booking and delivered by the outbox
+        queue_reservation_sync(booking)
+        queue_booking_sync(booking)
+        db.session.commit()
+        outbox.wake()
 
         return jsonify({
             'booking_id': booking.booking_id,
@@ -180,6 +944,154 @@ def book_room():
         db.session.rollback()
         return jsonify({'error': f'Booking failed: {str(e)}'}), 500
 
+BOOKING_BATCH_MAX = 500
+BATCH_CLAIM_ATTEMPTS = 3
+
+@app.route('/api/book-room/batch', methods=['POST'])
+@idempotent
+def book_room_batch():
+    """
+    Book many (event_id, room_id) pairs in one call.
+
+    Events are fetched once per distinct id, availability is checked with
+    one bulk call (items also conflict with earlier items of the batch),
+    and all accepted bookings are inserted in a single transaction.
+    Each item gets its own result with the status code the single-item
+    endpoint would have returned.
+    """
+    try:
+        data = request.get_json()
+        items = data.get('items') if isinstance(data, dict) else data
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'Expected a non-empty list of items'}), 400
+        if len(items) > BOOKING_BATCH_MAX:
+            return jsonify({'error': f'At most {BOOKING_BATCH_MAX} items per batch'}), 400
+
+        results = [None] * len(items)
+        valid = []
+        for position, item in enumerate(items):
+            try:
+                booking_schema.load(item)
+                valid.append((position, int(item['event_id']), int(item['room_id'])))
+            except ValidationError as err:
+                results[position] = {'status': 400, 'error': 'Validation error', 'messages': err.messages}
+            except (TypeError, AttributeError):
+                results[position] = {'status': 400, 'error': 'Invalid item'}
+
+        events = fetch_events({event_id for _, event_id, _ in valid}, ['tanggal_mulai', 'tanggal_selesai']) if valid else {}
+
+        candidates = []
+        for position, event_id, room_id in valid:
+            event_data = events.get(event_id)
+            if not event_data:
+                results[position] = {'status': 404, 'event_id': event_id, 'room_id': room_id, 'error': 'Event not found'}
+            elif not all([event_data.get('tanggal_mulai'), event_data.get('tanggal_selesai')]):
+                results[position] = {'status': 400, 'event_id': event_id, 'room_id': room_id, 'error': 'Event data incomplete'}
+            else:
+                candidates.append((position, event_id, room_id, event_data['tanggal_mulai'], event_data['tanggal_selesai']))
+
+        checks = []
+        if candidates:
+            availability_response = upstream.post(
+                f"{ROOM_AVAILABILITY_SERVICE}/check-availability/bulk",
+                json={'items': [
+                    {'room_id': room_id, 'start_date': tanggal_mulai, 'end_date': tanggal_selesai}
+                    for _, _, room_id, tanggal_mulai, tanggal_selesai in candidates
+                ]}
+            )
+            if availability_response.status_code != 200:
+                return jsonify({'error': 'Failed to check room availability'}), 500
+            checks = availability_response.json()['results']
+
+        accepted = []
+        for (position, event_id, room_id, tanggal_mulai, tanggal_selesai), check in zip(candidates, checks):
+            if check.get('error'):
+                results[position] = {'status': 404 if check['error'] == 'Room not found' else 400,
+                                     'event_id': event_id, 'room_id': room_id, 'error': check['error']}
+            elif not check.get('is_available', False):
+                results[position] = {
+                    'status': 409, 'event_id': event_id, 'room_id': room_id,
+                    'error': 'Room is not available for the requested time slot',
+                    'conflicts': check.get('conflicting_schedules', []),
+                    # Positions of earlier items in this request that took the slot
+                    'conflicting_items': [candidates[index][0] for index in check.get('conflicting_items', [])]
+                }
+            else:
+                accepted.append((position, event_id, room_id,
+                                 datetime.strptime(tanggal_mulai, "%Y-%m-%d").date(),
+                                 datetime.strptime(tanggal_selesai, "%Y-%m-%d").date()))
+
+        # Claim the slots optimistically: items whose days are already claimed are
+        # dropped, and if a concurrent booking wins a day before commit we retry
+        bookings = []
+        now = datetime.now(pytz.timezone('Asia/Jakarta'))
+        for _ in range(BATCH_CLAIM_ATTEMPTS):
+            taken = claimed_days(
+                key for _, _, room_id, tanggal_mulai, tanggal_selesai in accepted
+                for key in booking_days(room_id, tanggal_mulai, tanggal_selesai)
+            )
+            still_free = []
+            for item in accepted:
+                position, event_id, room_id, tanggal_mulai, tanggal_selesai = item
+                if any(key in taken for key in booking_days(room_id, tanggal_mulai, tanggal_selesai)):
+                    results[position] = {'status': 409, 'event_id': event_id, 'room_id': room_id,
+                                         'error': 'Room is not available for the requested time slot', 'conflicts': []}
+                else:
+                    taken.update(booking_days(room_id, tanggal_mulai, tanggal_selesai))
+                    still_free.append(item)
+            accepted = still_free
+
+            bookings = [
+                (position, Booking(
+                    event_id=event_id,
+                    room_id=room_id,
+                    tanggal_booking=now,
+                    tanggal_mulai=tanggal_mulai,
+                    tanggal_selesai=tanggal_selesai,
+                    status_booking=BookingStatus.PENDING.value
+                ))
+                for position, event_id, room_id, tanggal_mulai, tanggal_selesai in accepted
+            ]
+            if not bookings:
+                break
+            try:
+                db.session.add_all([booking for _, booking in bookings])
+                db.session.flush()
+                for _, booking in bookings:
+                    claim_days(booking)
+                    queue_reservation_sync(booking)
+                    queue_booking_sync(booking)
+                db.session.commit()
+                outbox.wake()
+                break
+            except IntegrityError:
+                db.session.rollback()
+                bookings = []
+        else:
+            # Not stored under the Idempotency-Key, so the same key can be retried
+            return jsonify({'error': 'Too many concurrent bookings for these rooms, retry the batch'}), 503, {'Retry-After': '1'}
+
+        for position, booking in bookings:
+            results[position] = {
+                'status': 201,
+                'booking_id': booking.booking_id,
+                'event_id': booking.event_id,
+                'room_id': booking.room_id,
+                'status_booking': booking.status_booking
+            }
+
+        return jsonify({
+            'results': results,
+            'created': len(bookings),
+            'failed': len(results) - len(bookings)
+        }), 200
+
+    except requests.exceptions.RequestException as e:
+        return jsonify({'error': f'Service error: {str(e)}'}), 500
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Batch booking failed: {str(e)}'}), 500
+
 @app.route('/api/bookings/<int:booking_id>', methods=['GET'])
 def get_booking_status(booking_id):
     booking = Booking.query.get(booking_id)
@@ -188,16 +1100,24 @@ def get_booking_status(booking_id):
 
     try:
         # Get status from booking_confirmation_service
-        approval_resp = requests.get(f"{BOOKING_CONFIRMATION_SERVICE}/api/approval-status/{booking_id}", timeout=2)
+        approval_resp = upstream.get(f"{BOOKING_CONFIRMATION_SERVICE}/api/approval-status/{booking_id}", timeout=2)
         if approval_resp.status_code == 200:
             approval_data = approval_resp.json()
             status_booking = approval_data.get('status', 'Pending')
             keterangan_reject = approval_data.get('keterangan_reject')
             
-            # Update local status
-            booking.status_booking = status_booking
-            booking.keterangan_reject = keterangan_reject
-            db.session.commit()
+            # Update local status; a change missed by the sync goes through the same transition
+            status_changed = booking.status_booking != status_booking
+            try:
+                apply_approval(booking, approval_data)
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                logger.warning(f"Booking {booking_id} cannot become {status_booking} again: its days were taken")
+                status_booking = booking.status_booking
+                keterangan_reject = booking.keterangan_reject
+            if status_changed:
+                outbox.wake()
         else:
             status_booking = 'Pending'
             keterangan_reject = None
@@ -244,60 +1164,42 @@ def get_booking_status_alias(booking_id):
 @app.route('/api/bookings', methods=['GET'])
 def get_all_bookings():
     try:
-        print("\n=== Fetching all bookings ===")
-        bookings = Booking.query.all()
-        print(f"Total bookings in database: {len(bookings)}")
-        
-        results = []
-        for booking in bookings:
-            try:
-                print(f"\nProcessing booking {booking.booking_id}:")
-                print(f"Room ID: {booking.room_id}")
-                
-                event_resp = requests.get(f"{ADD_EVENT_SERVICE}/api/events/{booking.event_id}")
-                nama_event = event_resp.json().get('nama_event', '-') if event_resp.status_code == 200 else '-'
-                print(f"Event name: {nama_event}")
-
-                room_resp = requests.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms/{booking.room_id}")
-                nama_ruangan = room_resp.json().get('nama_ruangan', '-') if room_resp.status_code == 200 else '-'
-                print(f"Room name: {nama_ruangan}")
-
-                try:
-                    approval_resp = requests.get(f"{BOOKING_CONFIRMATION_SERVICE}/api/approval-status/{booking.booking_id}", timeout=2)
-                    approval_data = approval_resp.json() if approval_resp.status_code == 200 else {'status': 'Pending', 'keterangan_reject': None}
-                    status_booking = approval_data.get('status', 'Pending')
-                    keterangan_reject = approval_data.get('keterangan_reject')
-                    print(f"Approval status: {status_booking}")
-                except Exception as e:
-                    print(f"Error getting approval status: {str(e)}")
-                    status_booking = 'Pending'
-                    keterangan_reject = None
-
-                booking_data = {
-                    'booking_id': booking.booking_id,
-                    'nama_event': nama_event,
-                    'nama_ruangan': nama_ruangan,
-                    'tanggal_booking': booking.tanggal_booking.strftime('%Y-%m-%d %H:%M:%S'),
-                    'tanggal_mulai': booking.tanggal_mulai.strftime('%Y-%m-%d'),
-                    'tanggal_selesai': booking.tanggal_selesai.strftime('%Y-%m-%d'),
-                    'status': status_booking,
-                    'room_id': booking.room_id,
-                    'event_id': booking.event_id,
-                    'keterangan_reject': keterangan_reject
-                }
-                print(f"Processed booking data: {booking_data}")
-                results.append(booking_data)
-                
-            except Exception as e:
-                print(f"Error processing booking {booking.booking_id}: {str(e)}")
-                continue
-
-        print(f"\nReturning {len(results)} bookings")
-        return jsonify(results)
+        logger.info("=== Fetching all bookings ===")
+        try:
+            query = filter_bookings(Booking.query, request.args)
+            if wants_ndjson():
+                return stream_bookings(query)
+            total_count = query.count() if request.args.get('include_total') else None
+            bookings, next_cursor = paginate_bookings(query, request.args)
+        except (ValueError, KeyError, TypeError) as e:
+            return jsonify({'error': f'Invalid parameter: {str(e)}'}), 400
+        logger.info(f"Bookings selected: {len(bookings)}")
+
+        results = enrich_bookings(bookings)
+
+        logger.info(f"Returning {len(results)} bookings using {g.get('upstream_calls', 0)} upstream calls")
+        response = jsonify(results)
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        if total_count is not None:
+            response.headers['X-Total-Count'] = str(total_count)
+        return response
     except Exception as e:
-        print(f"Error in get_all_bookings: {str(e)}")
+        logger.error(f"Error in get_all_bookings: {str(e)}")
         return []
 
+@app.route('/api/bookings/stats', methods=['GET'])
+def get_booking_stats():
+    """Booking counts per status for the list filters, in one GROUP BY; for dashboards over paged lists."""
+    try:
+        query = filter_bookings(db.session.query(Booking.status_booking, func.count(Booking.booking_id)), request.args)
+        counts = dict(query.group_by(Booking.status_booking).all())
+    except (ValueError, KeyError, TypeError) as e:
+        return jsonify({'error': f'Invalid parameter: {str(e)}'}), 400
+    statuses = {status.value: counts.pop(status.value, 0) for status in BookingStatus}
+    statuses.update(counts)
+    return jsonify({'total': sum(statuses.values()), 'statuses': statuses})
+
 @app.route('/api/update-booking-status/<int:booking_id>', methods=['POST'])
 def update_booking_status(booking_id):
     try:
@@ -310,14 +1212,17 @@ def update_booking_status(booking_id):
             return jsonify({'error': 'Booking not found'}), 404
 
         # Update booking with data from booking_confirmation_service
-        if 'status_booking' in data:
-            booking.status_booking = data['status_booking']
         if 'keterangan_reject' in data:
             booking.keterangan_reject = data['keterangan_reject']
         if 'approval_id' in data:
             booking.approval_id = data['approval_id']
-        
+        try:
+            set_booking_status(booking, data.get('status_booking', booking.status_booking))
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({'error': 'Room is no longer available for this booking'}), 409
         db.session.commit()
+        outbox.wake()
 
         return jsonify({
             'success': True,
@@ -334,6 +1239,21 @@ def update_booking_status(booking_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/bookings/reconcile', methods=['POST'])
+def reconcile_bookings():
+    """Pull the approval of every Pending booking from booking_confirmation_service, e.g. before a projection rebuild."""
+    try:
+        checked, updated = reconcile_pending_bookings()
+    except requests.exceptions.RequestException as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to fetch approval statuses: {str(e)}'}), 502
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to reconcile bookings: {str(e)}'}), 500
+    finally:
+        outbox.wake()
+    return jsonify({'checked': checked, 'updated': updated}), 200
+
 @app.route('/api/bookings/<int:booking_id>', methods=['DELETE'])
 def delete_booking(booking_id):
     try:
@@ -343,7 +1263,11 @@ def delete_booking(booking_id):
 
         # Delete booking from database
         db.session.delete(booking)
+        release_days(booking_id)
+        queue_reservation_release(booking_id)
+        queue_schedule_release(booking_id)
         db.session.commit()
+        outbox.wake()
 
         return jsonify({
             'success': True,
@@ -358,6 +1282,23 @@ def delete_booking(booking_id):
 def health_check():
     return jsonify({'status': 'healthy'}), 200
 
+@app.route('/metrics/upstreams', methods=['GET'])
+def upstream_metrics():
+    return jsonify(upstream.stats()), 200
+
+@app.route('/metrics/outbox', methods=['GET'])
+def outbox_metrics():
+    counts = db.session.query(OutboxMessage.topic, OutboxMessage.status, func.count(OutboxMessage.id)) \
+        .group_by(OutboxMessage.topic, OutboxMessage.status).all()
+    oldest = db.session.query(func.min(OutboxMessage.created_at)).filter(OutboxMessage.status == 'pending').scalar()
+    topics = {}
+    for topic, status, count in counts:
+        topics.setdefault(topic, {'pending': 0, 'failed': 0})[status] = count
+    return jsonify({
+        'topics': topics,
+        'oldest_pending_age_seconds': round((datetime.utcnow() - oldest).total_seconds(), 1) if oldest else 0
+    }), 200
+
 # ====================
 # GraphQL
 # ====================
@@ -370,6 +1311,8 @@ class BookingType(graphene.ObjectType):
     tanggal_selesai = graphene.Date()
     status_booking = graphene.String()
     keterangan_reject = graphene.String()
+    nama_event = graphene.String()
+    nama_ruangan = graphene.String()
 
     def resolve_booking_id(self, info):
         return self.booking_id
@@ -389,11 +1332,18 @@ class BookingType(graphene.ObjectType):
     def resolve_tanggal_selesai(self, info):
         return self.tanggal_selesai
 
+    # Approval status, event and room names come from the request's batch loaders
     def resolve_status_booking(self, info):
-        return self.status_booking
+        return get_loader('approval_status').load(self.booking_id).get('status', 'Pending')
 
     def resolve_keterangan_reject(self, info):
-        return self.keterangan_reject
+        return get_loader('approval_status').load(self.booking_id).get('keterangan_reject')
+
+    def resolve_nama_event(self, info):
+        return get_loader('event_name').load(self.event_id)
+
+    def resolve_nama_ruangan(self, info):
+        return get_loader('room_name').load(self.room_id)
 
 # ------- Create Booking Mutation -------
 class CreateBooking(graphene.Mutation):
@@ -408,7 +1358,7 @@ class CreateBooking(graphene.Mutation):
     def mutate(self, info, event_id, room_id):
         try:
             # Check event existence
-            event_response = requests.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
+            event_response = upstream.get(f"{ADD_EVENT_SERVICE}/api/events/{event_id}")
             if event_response.status_code != 200:
                 return CreateBooking(success=False, message="Event not found")
 
@@ -420,7 +1370,7 @@ class CreateBooking(graphene.Mutation):
                 return CreateBooking(success=False, message="Event data incomplete")
 
             # Check room availability
-            availability_response = requests.get(
+            availability_response = upstream.get(
                 f"{ROOM_AVAILABILITY_SERVICE}/check-availability",
                 params={
                     'room_id': room_id,
@@ -449,34 +1399,19 @@ class CreateBooking(graphene.Mutation):
                 status_booking=BookingStatus.PENDING.value
             )
             db.session.add(booking)
-            db.session.commit()
-
-            # Sync with booking_confirmation_service
+            db.session.flush()
             try:
-                sync_response = requests.post(
-                    f"{BOOKING_CONFIRMATION_SERVICE}/api/sync-booking",
-                    json={
-                        "booking_id": booking.booking_id,
-                        "event_id": booking.event_id,
-                        "room_id": booking.room_id,
-                        "tanggal_booking": booking.tanggal_booking.strftime('%Y-%m-%d %H:%M:%S'),
-                        "tanggal_mulai": booking.tanggal_mulai.strftime('%Y-%m-%d'),
-                        "tanggal_selesai": booking.tanggal_selesai.strftime('%Y-%m-%d'),
-                        "status_booking": booking.status_booking,
-                        "keterangan_reject": None
-                    },
-                    timeout=2
+                claim_days(booking)
+            except IntegrityError:
+                db.session.rollback()
+                return CreateBooking(
+                    success=False,
+                    message="Room is not available for the requested time slot"
                 )
-                if sync_response.status_code == 200:
-                    sync_data = sync_response.json()
-                    approval_id = sync_data.get('approval_log', {}).get('approval_id')
-                    if approval_id:
-                        booking.approval_id = approval_id
-                        db.session.commit()
-                else:
-                    print(f"Failed to sync booking: {sync_response.text}")
-            except Exception as e:
-                print(f"Failed to sync booking: {e}")
+            queue_reservation_sync(booking)
+            queue_booking_sync(booking)
+            db.session.commit()
+            outbox.wake()
 
             return CreateBooking(
                 booking=booking,
@@ -503,7 +1438,11 @@ class DeleteBooking(graphene.Mutation):
                 return DeleteBooking(success=False, message="Booking not found")
 
             db.session.delete(booking)
+            release_days(booking_id)
+            queue_reservation_release(booking_id)
+            queue_schedule_release(booking_id)
             db.session.commit()
+            outbox.wake()
 
             return DeleteBooking(
                 success=True,
@@ -521,55 +1460,14 @@ class Query(graphene.ObjectType):
 
     def resolve_bookings(self, info):
         bookings = Booking.query.all()
-        results = []
-        for booking in bookings:
-            try:
-                approval_resp = requests.get(f"{BOOKING_CONFIRMATION_SERVICE}/api/approval-status/{booking.booking_id}", timeout=2)
-                approval_data = approval_resp.json() if approval_resp.status_code == 200 else {'status': 'Pending', 'keterangan_reject': None}
-                status_booking = approval_data.get('status', 'Pending')
-                keterangan_reject = approval_data.get('keterangan_reject')
-            except Exception as e:
-                print(f"Error getting approval status: {str(e)}")
-                status_booking = 'Pending'
-                keterangan_reject = None
-
-            results.append(BookingType(
-                booking_id=booking.booking_id,
-                event_id=booking.event_id,
-                room_id=booking.room_id,
-                tanggal_booking=booking.tanggal_booking,
-                tanggal_mulai=booking.tanggal_mulai,
-                tanggal_selesai=booking.tanggal_selesai,
-                status_booking=status_booking,
-                keterangan_reject=keterangan_reject
-            ))
-        return results
+        queue_booking_lookups(bookings)
+        return bookings
 
     def resolve_booking(self, info, booking_id):
         booking = Booking.query.get(booking_id)
-        if not booking:
-            return None
-
-        try:
-            approval_resp = requests.get(f"{BOOKING_CONFIRMATION_SERVICE}/api/approval-status/{booking_id}", timeout=2)
-            approval_data = approval_resp.json() if approval_resp.status_code == 200 else {'status': 'Pending', 'keterangan_reject': None}
-            status_booking = approval_data.get('status', 'Pending')
-            keterangan_reject = approval_data.get('keterangan_reject')
-        except Exception as e:
-            print(f"Error getting approval status: {str(e)}")
-            status_booking = 'Pending'
-            keterangan_reject = None
-
-        return BookingType(
-            booking_id=booking.booking_id,
-            event_id=booking.event_id,
-            room_id=booking.room_id,
-            tanggal_booking=booking.tanggal_booking,
-            tanggal_mulai=booking.tanggal_mulai,
-            tanggal_selesai=booking.tanggal_selesai,
-            status_booking=status_booking,
-            keterangan_reject=keterangan_reject
-        )
+        if booking:
+            queue_booking_lookups([booking])
+        return booking
 
 class Mutation(graphene.ObjectType):
     create_booking = CreateBooking.Field()
@@ -627,20 +1525,7 @@ def graphql():
     if not data:
         return jsonify({"error": "No input data provided"}), 400
 
-    result = schema.execute(
-        data.get("query"),
-        variables=data.get("variables"),
-        operation_name=data.get("operationName"),
-        context_value=request,
-    )
-
-    response = {}
-    if result.errors:
-        response["errors"] = [str(e) for e in result.errors]
-    if result.data:
-        response["data"] = result.data
-
-    status_code = 200 if not result.errors else 400
+    response, status_code = execute_query(schema, data, context_value=request)
     return jsonify(response), status_code
 
 # ====================
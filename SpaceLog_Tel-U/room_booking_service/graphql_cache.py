@@ -0,0 +1,148 @@
+# ====================
+# Shared GraphQL Document Cache
+# ====================
+"""
+Parsed and validated GraphQL document cache with persisted queries.
+
+Documents are cached by the sha256 of the query text in a bounded LRU, so
+a query that was seen before is executed straight away without parsing or
+validating it again. The same hash doubles as a persisted query id: a
+client sends {"extensions": {"persistedQuery": {"version": 1,
+"sha256Hash": ...}}} without a query, and if the hash is unknown (never
+registered, or evicted) the response is a 200 with the error message
+PersistedQueryNotFound, as Apollo-style clients expect, and the client
+resends once with the full query, which registers it again.
+
+Works with graphql-core 2 (graphene 2) and graphql-core 3 (graphene 3).
+
+This file is shared by every service; keep the copies identical.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import graphql
+
+GRAPHQL_CORE_3 = hasattr(graphql, 'graphql_sync')
+
+DOCUMENT_CACHE_SIZE = int(os.getenv('GRAPHQL_DOCUMENT_CACHE_SIZE', '256'))
+
+PERSISTED_QUERY_NOT_FOUND = 'PersistedQueryNotFound'
+PERSISTED_QUERY_NOT_FOUND_CODE = 'PERSISTED_QUERY_NOT_FOUND'
+
+
+class DocumentCache:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'maxsize': self.maxsize,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+documents = DocumentCache(DOCUMENT_CACHE_SIZE)
+
+
+def query_hash(query):
+    return hashlib.sha256(query.encode('utf-8')).hexdigest()
+
+
+def graphql_schema(schema):
+    # graphene 3 wraps the graphql-core schema, graphene 2 subclasses it
+    return getattr(schema, 'graphql_schema', schema)
+
+
+def load_document(schema, query):
+    """Return (document, validation_errors) for query, parsing and validating it only on a cache miss."""
+    key = query_hash(query)
+    entry = documents.get(key)
+    if entry is None:
+        try:
+            document = graphql.parse(query)
+        except graphql.GraphQLError as error:
+            # syntax errors are not cached; they should not be hot
+            return None, [error]
+        entry = (document, list(graphql.validate(graphql_schema(schema), document)))
+        documents.put(key, entry)
+    return entry
+
+
+def execute_query(schema, data, context_value=None):
+    """Execute a GraphQL request body through the document cache; returns (response, status_code)."""
+    if not isinstance(data, dict):
+        return {'errors': ['Request body must be a JSON object.']}, 400
+    query = data.get('query')
+    if query is not None and not isinstance(query, str):
+        return {'errors': ['query must be a string.']}, 400
+    extensions = data.get('extensions') or {}
+    persisted = extensions.get('persistedQuery') if isinstance(extensions, dict) else None
+    sha256_hash = persisted.get('sha256Hash') if isinstance(persisted, dict) else None
+    if sha256_hash is not None and not isinstance(sha256_hash, str):
+        return {'errors': ['sha256Hash must be a string.']}, 400
+
+    if sha256_hash:
+        if query and query_hash(query) != sha256_hash:
+            return {'errors': ['provided sha256Hash does not match query']}, 400
+        if not query:
+            entry = documents.get(sha256_hash)
+            if entry is None:
+                # Apollo-style clients resend with the query only on this exact shape
+                return {'errors': [{
+                    'message': PERSISTED_QUERY_NOT_FOUND,
+                    'extensions': {'code': PERSISTED_QUERY_NOT_FOUND_CODE},
+                }]}, 200
+    if not query and not sha256_hash:
+        return {'errors': ['Must provide query string.']}, 400
+    if query:
+        entry = load_document(schema, query)
+
+    document, errors = entry
+    if errors:
+        return {'errors': [str(e) for e in errors]}, 400
+
+    if GRAPHQL_CORE_3:
+        result = graphql.execute(
+            graphql_schema(schema),
+            document,
+            variable_values=data.get('variables'),
+            operation_name=data.get('operationName'),
+            context_value=context_value,
+        )
+    else:
+        result = graphql.execute(
+            graphql_schema(schema),
+            document,
+            variables=data.get('variables'),
+            operation_name=data.get('operationName'),
+            context=context_value,
+        )
+
+    response = {}
+    if result.errors:
+        response['errors'] = [str(e) for e in result.errors]
+    if result.data:
+        response['data'] = result.data
+    return response, 200 if not result.errors else 400
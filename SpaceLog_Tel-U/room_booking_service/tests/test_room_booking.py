@@ -0,0 +1,172 @@
+import threading
+from datetime import date, datetime
+
+
+def add_booking(service, status='Pending', room_id=1, tanggal_mulai=date(2030, 1, 10), tanggal_selesai=date(2030, 1, 10)):
+    with service.app.app_context():
+        booking = service.Booking(
+            event_id=1, room_id=room_id, tanggal_booking=datetime(2030, 1, 1),
+            tanggal_mulai=tanggal_mulai, tanggal_selesai=tanggal_selesai, status_booking=status
+        )
+        service.db.session.add(booking)
+        service.db.session.flush()
+        service.claim_days(booking)
+        service.db.session.commit()
+        return booking.booking_id
+
+
+def queued_topics(service, booking_id):
+    with service.app.app_context():
+        return [message.topic for message in service.OutboxMessage.query.filter_by(aggregate_id=booking_id)]
+
+
+def test_reconcile_applies_missed_approvals(service, client, fake_upstream):
+    approved = add_booking(service)
+    rejected = add_booking(service, tanggal_mulai=date(2030, 1, 11), tanggal_selesai=date(2030, 1, 11))
+    untouched = add_booking(service, tanggal_mulai=date(2030, 1, 12), tanggal_selesai=date(2030, 1, 12))
+    fake_upstream.route('POST', '/api/approval-status/bulk', lambda url, json, **kwargs: {'statuses': {
+        str(approved): {'status': 'Approved', 'keterangan_reject': None, 'approval_id': 7},
+        str(rejected): {'status': 'Rejected', 'keterangan_reject': 'Bentrok', 'approval_id': 8},
+        str(untouched): {'status': 'Pending', 'keterangan_reject': None, 'approval_id': None},
+    }})
+
+    response = client.post('/api/bookings/reconcile')
+
+    assert response.status_code == 200
+    assert response.get_json() == {'checked': 3, 'updated': 2}
+    with service.app.app_context():
+        assert service.Booking.query.get(approved).status_booking == 'Approved'
+        assert service.Booking.query.get(approved).approval_id == 7
+        assert service.Booking.query.get(rejected).status_booking == 'Rejected'
+        assert service.RoomDayClaim.query.filter_by(booking_id=rejected).count() == 0
+        assert service.Booking.query.get(untouched).status_booking == 'Pending'
+    assert queued_topics(service, approved) == ['reservation.upsert', 'schedule.upsert']
+    assert queued_topics(service, untouched) == []
+
+
+def test_reconcile_fails_when_approvals_are_unavailable(service, client, fake_upstream):
+    booking_id = add_booking(service)
+    fake_upstream.route('POST', '/api/approval-status/bulk', lambda url, **kwargs: fake_upstream.respond({}, 503))
+
+    response = client.post('/api/bookings/reconcile')
+
+    assert response.status_code == 502
+    with service.app.app_context():
+        assert service.Booking.query.get(booking_id).status_booking == 'Pending'
+
+
+def route_event(fake_upstream, tanggal_mulai='2030-01-10', tanggal_selesai='2030-01-10', on_check=None):
+    fake_upstream.route('GET', '/api/events/', lambda url, **kwargs: {
+        'event_id': int(url.rsplit('/', 1)[1]), 'tanggal_mulai': tanggal_mulai, 'tanggal_selesai': tanggal_selesai})
+
+    def check(url, **kwargs):
+        if on_check:
+            on_check()
+        return {'is_available': True, 'conflicting_schedules': []}
+    fake_upstream.route('GET', '/check-availability', check)
+
+
+def test_duplicate_idempotency_key_replays_first_response(service, client, fake_upstream):
+    route_event(fake_upstream)
+    headers = {'Idempotency-Key': 'booking-1'}
+
+    first = client.post('/api/book-room', json={'event_id': 1, 'room_id': 1}, headers=headers)
+    upstream_calls = len(fake_upstream.calls)
+    second = client.post('/api/book-room', json={'event_id': 1, 'room_id': 1}, headers=headers)
+
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.get_json() == first.get_json()
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert len(fake_upstream.calls) == upstream_calls
+    with service.app.app_context():
+        assert service.Booking.query.count() == 1
+
+
+def test_idempotency_key_reused_with_other_body_is_rejected(service, client, fake_upstream):
+    route_event(fake_upstream)
+    headers = {'Idempotency-Key': 'booking-2'}
+
+    client.post('/api/book-room', json={'event_id': 1, 'room_id': 1}, headers=headers)
+    response = client.post('/api/book-room', json={'event_id': 1, 'room_id': 2}, headers=headers)
+
+    assert response.status_code == 422
+
+
+def test_concurrent_claims_on_same_room_day_conflict(service, client, fake_upstream):
+    # Both requests pass the availability check before either claims its days
+    barrier = threading.Barrier(2, timeout=5)
+    route_event(fake_upstream, '2030-01-10', '2030-01-12', on_check=barrier.wait)
+    statuses = []
+
+    def book(event_id):
+        response = service.app.test_client().post('/api/book-room', json={'event_id': event_id, 'room_id': 1})
+        statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=book, args=(event_id,)) for event_id in (1, 2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [201, 409]
+    with service.app.app_context():
+        assert service.Booking.query.count() == 1
+        assert service.RoomDayClaim.query.count() == 3
+
+
+def test_claim_of_taken_day_fails_for_overlapping_range(service, client, fake_upstream):
+    add_booking(service, tanggal_mulai=date(2030, 1, 12), tanggal_selesai=date(2030, 1, 12))
+    route_event(fake_upstream, '2030-01-10', '2030-01-12')
+
+    response = client.post('/api/book-room', json={'event_id': 1, 'room_id': 1})
+
+    assert response.status_code == 409
+    with service.app.app_context():
+        assert service.Booking.query.count() == 1
+
+
+def test_outbox_retries_after_failed_delivery(service, client, fake_upstream, monkeypatch):
+    # Full backoff instead of a random share of it
+    monkeypatch.setattr(service.random, 'uniform', lambda low, high: high)
+    booking_id = add_booking(service)
+    with service.app.app_context():
+        service.queue_reservation_sync(service.Booking.query.get(booking_id))
+        service.db.session.commit()
+    replies = [fake_upstream.respond({'error': 'down'}, 503), fake_upstream.respond({'success': True})]
+    delivered = []
+
+    def post(url, json, **kwargs):
+        delivered.append(json)
+        return replies.pop(0)
+    fake_upstream.route('POST', '/reservations', post)
+
+    with service.app.app_context():
+        service.outbox.drain('room_availability')
+        message = service.OutboxMessage.query.one()
+        assert (message.status, message.attempts) == ('pending', 1)
+        assert message.last_error.startswith('503')
+
+        # Backing off: nothing is sent before the retry time
+        service.outbox.drain('room_availability')
+        assert len(delivered) == 1
+
+        service.outbox._retry_at = {}
+        service.outbox.drain('room_availability')
+        assert service.OutboxMessage.query.count() == 0
+
+    assert delivered[0] == delivered[1]
+    assert delivered[1][0]['booking_id'] == booking_id
+
+
+def test_outbox_marks_rejected_message_failed(service, client, fake_upstream):
+    booking_id = add_booking(service)
+    with service.app.app_context():
+        service.queue_reservation_sync(service.Booking.query.get(booking_id))
+        service.db.session.commit()
+    fake_upstream.route('POST', '/reservations', lambda url, **kwargs: fake_upstream.respond({'error': 'bad'}, 400))
+
+    with service.app.app_context():
+        service.outbox.drain('room_availability')
+        message = service.OutboxMessage.query.one()
+        assert (message.status, message.attempts) == ('failed', 1)
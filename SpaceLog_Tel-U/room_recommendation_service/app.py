@@ -3,8 +3,20 @@
 # ====================
 from flask import Flask, request, jsonify
 from flask_cors import CORS
+import os
+import re
+import threading
+import time
+from datetime import datetime, date
+from bisect import bisect_left
+from collections import defaultdict
+from heapq import nsmallest
+from itertools import groupby
+import numpy as np
 import requests
+from http_client import upstream
 import graphene
+from graphql_cache import execute_query
 from graphene import ObjectType, String, Int, Field, List, Schema
 
 # ====================
@@ -17,6 +29,491 @@ CORS(app)  # Mengaktifkan CORS agar bisa diakses dari frontend/backend lain
 # Service Endpoint Config
 # ====================
 ROOM_AVAILABILITY_SERVICE = "http://room_availability_service:5001"
+ADD_EVENT_SERVICE = "http://add_event_service:5008"
+
+# ====================
+# Recommendation Index
+# ====================
+LOCATION_TOKEN = re.compile(r'[0-9a-z]+')
+TOKEN_MATCH_CACHE_SIZE = 1024
+# fasilitas is free text such as "AC, Proyektor dan Whiteboard"
+FACILITY_SEPARATOR = re.compile(r'[,;/\n&]|\bdan\b')
+
+# Multi-criteria scoring; each feature is in [0, 1], higher is better
+SCORE_CRITERIA = ('capacity', 'location', 'facilities', 'utilization')
+# Location is a filter unless the caller gives it a weight
+DEFAULT_WEIGHTS = {'capacity': 0.6, 'location': 0.0, 'facilities': 0.3, 'utilization': 0.1}
+
+def location_tokens(text):
+    return LOCATION_TOKEN.findall((text or '').lower())
+
+def facility_names(text):
+    return {' '.join(name.split()) for name in FACILITY_SEPARATOR.split((text or '').lower()) if name.strip()}
+
+def normalize_weights(weights):
+    """Scale the given weights to sum to 1; criteria left out weigh nothing."""
+    unknown = set(weights) - set(SCORE_CRITERIA)
+    if unknown:
+        raise ValueError(f"Kriteria tidak dikenal: {', '.join(sorted(unknown))}")
+    merged = {name: float(weights.get(name) or 0) for name in SCORE_CRITERIA}
+    if any(value < 0 for value in merged.values()) or not sum(merged.values()):
+        raise ValueError('Bobot harus positif')
+    total = sum(merged.values())
+    return {name: value / total for name, value in merged.items()}
+
+def parse_weights(value):
+    """Parse capacity:0.6,facilities:0.4 from the query string."""
+    weights = {}
+    for item in value.split(','):
+        if item.strip():
+            name, _, weight = item.partition(':')
+            weights[name.strip()] = float(weight)
+    return normalize_weights(weights)
+
+def popcount(masks):
+    """Set bits per row of a 2-D uint64 array."""
+    return np.unpackbits(np.ascontiguousarray(masks).view(np.uint8), axis=1).sum(axis=1)
+
+class RoomIndex:
+    """
+    Search structures over one catalog version, built once when it is loaded.
+
+    Rooms are kept sorted by (kapasitas, room_id), so bisect finds the first
+    room that is big enough and a room's position is its rank by capacity
+    gap. An inverted index maps every location token to those positions.
+    """
+    def __init__(self, rooms):
+        self.rooms = rooms
+        self.by_capacity = sorted(rooms, key=lambda room: (room['kapasitas'], room['room_id']))
+        self.capacities = [room['kapasitas'] for room in self.by_capacity]
+        self.locations = [(room.get('lokasi') or '').lower() for room in self.by_capacity]
+        self.postings = defaultdict(set)
+        for position, lokasi in enumerate(self.locations):
+            for token in location_tokens(lokasi):
+                self.postings[token].add(position)
+        self._token_matches = {}
+
+        # Scoring arrays, in the same capacity order
+        self.capacity_array = np.array(self.capacities, dtype=np.float64)
+        self.room_ids = [room['room_id'] for room in self.by_capacity]
+        room_facilities = [facility_names(room.get('fasilitas')) for room in self.by_capacity]
+        self.facility_bits = {}
+        for names in room_facilities:
+            for name in sorted(names):
+                self.facility_bits.setdefault(name, len(self.facility_bits))
+        self.facility_words = max(1, (len(self.facility_bits) + 63) // 64)
+        self.facility_masks = np.zeros((len(self.by_capacity), self.facility_words), dtype=np.uint64)
+        for position, names in enumerate(room_facilities):
+            self.facility_masks[position] = self.facility_mask(names)
+        self._utilization = (None, None)
+
+    def token_matches(self, token):
+        """Positions with a location token containing token, cached per index."""
+        matches = self._token_matches.get(token)
+        if matches is None:
+            matches = set()
+            for vocabulary_token, positions in self.postings.items():
+                if token in vocabulary_token:
+                    matches |= positions
+            if len(self._token_matches) >= TOKEN_MATCH_CACHE_SIZE:
+                self._token_matches.clear()
+            self._token_matches[token] = matches
+        return matches
+
+    def location_positions(self, lokasi):
+        """Positions of the rooms whose lokasi contains lokasi (case-insensitive)."""
+        lokasi = lokasi.lower()
+        # Every query token lies inside one location token of a matching room,
+        # so the token index narrows the rooms before the substring check
+        matches = sorted((self.token_matches(token) for token in set(location_tokens(lokasi))), key=len)
+        if matches:
+            candidates = matches[0].intersection(*matches[1:])
+        else:
+            candidates = range(len(self.by_capacity))
+        return {position for position in candidates if lokasi in self.locations[position]}
+
+    def facility_mask(self, names):
+        mask = np.zeros(self.facility_words, dtype=np.uint64)
+        for name in names:
+            bit = self.facility_bits.get(name)
+            if bit is not None:
+                mask[bit // 64] |= np.uint64(1 << (bit % 64))
+        return mask
+
+    def utilization_array(self, utilization):
+        """Utilisation per position for a {room_id: fraction} snapshot, built once per snapshot."""
+        snapshot, values = self._utilization
+        if snapshot is not utilization:
+            values = np.array([utilization.get(room_id, 0.0) for room_id in self.room_ids], dtype=np.float64)
+            self._utilization = (utilization, values)
+        return values
+
+    def score(self, kapasitas, lokasi, fasilitas, weights, utilization, top=None):
+        """
+        Rank the rooms with at least kapasitas seats, in lokasi if given, by
+        the weighted sum of capacity fit, share of the required facilities
+        and spare time (1 - utilisation). Only when location has a weight is
+        lokasi scored instead of filtered. Returns (top rooms with their
+        score, number of rooms ranked).
+        """
+        first = bisect_left(self.capacities, kapasitas)
+        positions = np.arange(first, len(self.by_capacity))
+        location = None
+        if lokasi:
+            matches = self.location_positions(lokasi)
+            if weights['location'] > 0:
+                location = np.isin(positions, list(matches)).astype(np.float64)
+            else:
+                positions = np.array(sorted(position for position in matches if position >= first), dtype=np.int64)
+        count = len(positions)
+        if count == 0 or top == 0:
+            return [], count
+        if location is None:
+            location = np.ones(count)
+
+        # 1 for an exact fit, lower the emptier the room would be
+        capacity_fit = np.minimum(1.0, max(kapasitas, 1) / np.maximum(self.capacity_array[positions], 1.0))
+
+        required = facility_names(fasilitas)
+        if required:
+            # Facilities no room has still count as missing
+            facilities = popcount(self.facility_masks[positions] & self.facility_mask(required)) / len(required)
+        else:
+            facilities = np.ones(count)
+
+        spare = 1.0 - np.clip(self.utilization_array(utilization)[positions], 0.0, 1.0)
+
+        scores = (weights['capacity'] * capacity_fit + weights['location'] * location
+                  + weights['facilities'] * facilities + weights['utilization'] * spare)
+
+        candidates = np.arange(count)
+        if top is not None and top < count:
+            candidates = np.argpartition(-scores, top - 1)[:top]
+        # Best score first, ties by capacity order
+        order = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [dict(self.by_capacity[positions[i]], score=round(float(scores[i]), 4)) for i in order], count
+
+    def recommend(self, kapasitas, lokasi=None, offset=0, limit=None):
+        """
+        Rooms with at least kapasitas seats, in lokasi if given, smallest
+        capacity gap first. Returns (page, total number of matches).
+        """
+        first = bisect_left(self.capacities, kapasitas)
+        if not lokasi:
+            end = None if limit is None else first + offset + limit
+            return self.by_capacity[first + offset:end], len(self.by_capacity) - first
+
+        positions = [position for position in self.location_positions(lokasi) if position >= first]
+        if limit is None:
+            wanted = sorted(positions)[offset:]
+        else:
+            wanted = nsmallest(offset + limit, positions)[offset:]
+        return [self.by_capacity[position] for position in wanted], len(positions)
+
+# ====================
+# Room Catalog Cache
+# ====================
+ROOM_CATALOG_TTL = float(os.getenv('ROOM_CATALOG_TTL', '30'))
+# After a failed refresh the stale catalog is served this long before trying again
+ROOM_CATALOG_RETRY = float(os.getenv('ROOM_CATALOG_RETRY', '5'))
+
+class RoomCatalog:
+    """
+    In-process copy of the room catalog of room_availability_service.
+
+    Within the TTL rooms are served from memory. After that the copy is
+    revalidated with the version it holds (/rooms/catalog?version=), which
+    answers 304 until a room changes, so a refresh is usually one empty
+    response. Refreshes are single-flight: one thread refreshes while the
+    others keep serving the current copy, and only the very first load makes
+    callers wait. If a refresh fails the stale copy is served.
+    """
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._refresh_lock = threading.Lock()
+        self.version = None
+        self.index = None
+        self.expires_at = 0.0
+        self.refreshes = 0
+        self.not_modified = 0
+        self.failures = 0
+
+    def get(self):
+        """Return the list of rooms; raises requests.exceptions.RequestException if it was never loaded."""
+        return self.get_index().rooms
+
+    def get_index(self):
+        """Return the RoomIndex of the current catalog, refreshing it first if needed."""
+        if self.index is None:
+            with self._refresh_lock:
+                if self.index is None:
+                    if time.monotonic() < self.expires_at:
+                        # The load just failed for a caller that was ahead of us
+                        raise requests.exceptions.ConnectionError('Room catalog is not available yet')
+                    self._refresh()
+        elif time.monotonic() >= self.expires_at and self._refresh_lock.acquire(blocking=False):
+            try:
+                if time.monotonic() >= self.expires_at:
+                    self._refresh()
+            except Exception as e:
+                print(f"Room catalog refresh failed, serving version {self.version}: {str(e)}")
+            finally:
+                self._refresh_lock.release()
+        return self.index
+
+    def _refresh(self):
+        params = {'version': self.version} if self.version is not None else None
+        try:
+            response = upstream.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms/catalog", params=params)
+            if response.status_code == 304:
+                self.not_modified += 1
+                self.expires_at = time.monotonic() + self.ttl
+                return
+            if response.status_code == 404:
+                # Older room_availability_service without the versioned catalog
+                response = upstream.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms")
+                response.raise_for_status()
+                version, rooms = None, response.json()
+            else:
+                response.raise_for_status()
+                data = response.json()
+                version, rooms = data['version'], data['rooms']
+            index = RoomIndex(rooms)
+        except Exception as e:
+            # Unreachable or malformed alike: keep the current copy until the retry deadline
+            self.failures += 1
+            self.expires_at = time.monotonic() + ROOM_CATALOG_RETRY
+            if isinstance(e, requests.exceptions.RequestException):
+                raise
+            raise requests.exceptions.RequestException(f'Invalid room catalog response: {str(e)}') from e
+
+        self.version, self.index = version, index
+        self.refreshes += 1
+        self.expires_at = time.monotonic() + self.ttl
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'rooms': len(self.index.rooms) if self.index is not None else None,
+            'ttl_seconds': self.ttl,
+            'expires_in_seconds': round(max(0.0, self.expires_at - time.monotonic()), 2),
+            'refreshes': self.refreshes,
+            'not_modified': self.not_modified,
+            'failures': self.failures
+        }
+
+catalog = RoomCatalog(ROOM_CATALOG_TTL)
+
+ROOM_UTILIZATION_TTL = float(os.getenv('ROOM_UTILIZATION_TTL', '300'))
+ROOM_UTILIZATION_DAYS = int(os.getenv('ROOM_UTILIZATION_DAYS', '90'))
+
+class RoomUtilization:
+    """
+    Recent utilisation per room from room_availability_service, refreshed
+    every ROOM_UTILIZATION_TTL seconds by one thread at a time. Scoring
+    never waits for it: until it is loaded, every room counts as idle.
+    """
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._refresh_lock = threading.Lock()
+        self.values = {}
+        self.expires_at = 0.0
+
+    def get(self):
+        if time.monotonic() >= self.expires_at and self._refresh_lock.acquire(blocking=False):
+            try:
+                response = upstream.get(
+                    f"{ROOM_AVAILABILITY_SERVICE}/rooms/utilization",
+                    params={'days': ROOM_UTILIZATION_DAYS}
+                )
+                response.raise_for_status()
+                self.values = {int(room_id): value for room_id, value in response.json()['utilization'].items()}
+                self.expires_at = time.monotonic() + self.ttl
+            except requests.exceptions.RequestException as e:
+                print(f"Room utilization refresh failed: {str(e)}")
+                self.expires_at = time.monotonic() + ROOM_CATALOG_RETRY
+            finally:
+                self._refresh_lock.release()
+        return self.values
+
+utilization = RoomUtilization(ROOM_UTILIZATION_TTL)
+
+# ====================
+# Availability Filter
+# ====================
+DATE_FORMAT = '%Y-%m-%d'
+
+def parse_date_range(start_date, end_date):
+    """Validate an optional start_date/end_date pair; raises ValueError."""
+    if not start_date and not end_date:
+        return None
+    if not start_date or not end_date:
+        raise ValueError('start_date dan end_date harus diisi bersamaan')
+    if datetime.strptime(start_date, DATE_FORMAT) > datetime.strptime(end_date, DATE_FORMAT):
+        raise ValueError('start_date tidak boleh setelah end_date')
+    return start_date, end_date
+
+def available_room_ids(room_ids, start_date, end_date):
+    """Ids of the rooms with no reservation in [start_date, end_date], using one bulk availability call."""
+    if not room_ids:
+        return set()
+    response = upstream.post(
+        f"{ROOM_AVAILABILITY_SERVICE}/check-availability/bulk",
+        json={'items': [
+            {'room_id': room_id, 'start_date': start_date, 'end_date': end_date}
+            for room_id in room_ids
+        ]}
+    )
+    response.raise_for_status()
+    return {result['room_id'] for result in response.json()['results'] if result.get('is_available')}
+
+def find_recommendations(kapasitas, lokasi=None, date_range=None, offset=0, limit=None, fasilitas=None, weights=None):
+    """
+    Ranked rooms for the request, leaving out rooms already booked in
+    date_range. Rooms are ranked by capacity gap, or by weighted score when
+    fasilitas or weights are given. Returns (page, total).
+    """
+    index = catalog.get_index()
+    top = offset + limit if limit is not None and date_range is None else None
+    if fasilitas or weights is not None:
+        rooms, total = index.score(kapasitas, lokasi, fasilitas, weights or DEFAULT_WEIGHTS, utilization.get(), top)
+    elif date_range is None:
+        return index.recommend(kapasitas, lokasi, offset, limit)
+    else:
+        rooms, total = index.recommend(kapasitas, lokasi)
+
+    if date_range is not None:
+        available = available_room_ids([room['room_id'] for room in rooms], *date_range)
+        rooms = [room for room in rooms if room['room_id'] in available]
+        total = len(rooms)
+    end = None if limit is None else offset + limit
+    return rooms[offset:end], total
+
+# ====================
+# Batch Room Assignment
+# ====================
+ASSIGN_MAX_EVENTS = int(os.getenv('ASSIGN_MAX_EVENTS', '2000'))
+# Per-request limit of room_booking_service /api/book-room/batch
+BOOKING_BATCH_MAX = 500
+
+# Matching costs: at most 1 for empty seats plus the location penalty.
+# Infeasible pairs cost so much that the matching first maximises the
+# number of events placed and only then the fit.
+LOCATION_MISS_COST = 0.5
+INFEASIBLE_COST = 1e6
+
+def min_cost_assignment(cost):
+    """
+    Hungarian algorithm (shortest augmenting paths with potentials) for a
+    cost matrix; the work per augmenting step is vectorised over the
+    columns. Returns the column of every row, -1 for rows left out when
+    there are more rows than columns.
+    """
+    if cost.shape[0] > cost.shape[1]:
+        assignment = np.full(cost.shape[0], -1, dtype=np.int64)
+        for column, row in enumerate(min_cost_assignment(cost.T)):
+            assignment[row] = column
+        return assignment
+
+    rows, columns = cost.shape
+    u = np.zeros(rows + 1)
+    v = np.zeros(columns + 1)
+    owner = np.zeros(columns + 1, dtype=np.int64)  # 1-based row holding each column, 0 = free
+    way = np.zeros(columns + 1, dtype=np.int64)
+    for row in range(1, rows + 1):
+        owner[0] = row
+        column = 0
+        minv = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+        while owner[column]:
+            used[column] = True
+            reduced = cost[owner[column] - 1] - u[owner[column]] - v[1:]
+            free = ~used[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = column
+            candidates = np.where(free, minv[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+            column = next_column
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    assignment = np.full(rows, -1, dtype=np.int64)
+    taken = np.nonzero(owner[1:])[0]
+    assignment[owner[1:][taken] - 1] = taken
+    return assignment
+
+def plan_assignments(index, events, reservations):
+    """
+    Give each event a room with enough seats that is free for its whole
+    date range, overlapping neither existing reservations nor the rest of
+    the plan.
+
+    Events are swept by start date: a room is free for an event once all
+    events planned in it so far have ended. Every event starting on the
+    same day is matched to the free rooms in one min-cost assignment; the
+    cost is the share of empty seats plus a penalty for a missed preferred
+    location. Dates are ordinals. Returns (assignments, unassigned), where
+    assignments are (event, catalog position) pairs.
+
+    The sweep is greedy: a day's matching is fixed before later days are
+    seen, so a long event placed early can hold a room that a later event
+    needed. It places as many events as possible per day, not overall.
+    """
+    capacities = index.capacity_array
+    position_of = {room_id: position for position, room_id in enumerate(index.room_ids)}
+    reserved = [
+        (position_of[reservation['room_id']], reservation['start'], reservation['end'])
+        for reservation in reservations if reservation['room_id'] in position_of
+    ]
+    reserved_room, reserved_start, reserved_end = (
+        np.array(column, dtype=np.int64) for column in (zip(*reserved) if reserved else ((), (), ()))
+    )
+    # Last planned day per room; a room is free for events starting after it
+    busy_until = np.full(len(capacities), np.iinfo(np.int64).min)
+    largest = capacities[-1] if len(capacities) else 0
+    location_masks = {}
+
+    assignments, unassigned = [], []
+    ordered = sorted(events, key=lambda event: (event['start'], -event['kapasitas'], event['event_id']))
+    for start, group in groupby(ordered, key=lambda event: event['start']):
+        group = list(group)
+        rooms = np.nonzero(busy_until < start)[0]
+        cost = np.full((len(group), len(rooms)), INFEASIBLE_COST)
+        for row, event in enumerate(group):
+            fits = capacities[rooms] >= event['kapasitas']
+            if reserved_room.size:
+                clashes = reserved_room[(reserved_start <= event['end']) & (reserved_end >= start)]
+                fits &= ~np.isin(rooms, clashes)
+            row_cost = 1.0 - event['kapasitas'] / np.maximum(capacities[rooms], 1.0)
+            if event.get('lokasi'):
+                mask = location_masks.get(event['lokasi'])
+                if mask is None:
+                    mask = np.zeros(len(capacities), dtype=bool)
+                    mask[list(index.location_positions(event['lokasi']))] = True
+                    location_masks[event['lokasi']] = mask
+                row_cost = row_cost + LOCATION_MISS_COST * ~mask[rooms]
+            cost[row] = np.where(fits, row_cost, INFEASIBLE_COST)
+
+        # Only rooms some event of the day can use take part in the matching
+        usable = (cost < INFEASIBLE_COST).any(axis=0)
+        rooms, cost = rooms[usable], cost[:, usable]
+        for row, column in enumerate(min_cost_assignment(cost)):
+            event = group[row]
+            if column >= 0 and cost[row, column] < INFEASIBLE_COST:
+                busy_until[rooms[column]] = event['end']
+                assignments.append((event, int(rooms[column])))
+            elif event['kapasitas'] > largest:
+                unassigned.append((event, 'Tidak ada ruangan dengan kapasitas yang cukup'))
+            else:
+                unassigned.append((event, 'Semua ruangan yang sesuai sudah terpakai pada tanggal tersebut'))
+    return assignments, unassigned
 
 # ====================
 # REST Endpoint - Room Recommendation
@@ -24,13 +521,8 @@ ROOM_AVAILABILITY_SERVICE = "http://room_availability_service:5001"
 @app.route('/api/rooms', methods=['GET'])
 def get_rooms():
     try:
-        # Ambil semua data ruangan dari Room Availability Service
-        response = requests.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms")
-        if response.status_code != 200:
-            return jsonify({'error': 'Gagal mengambil data ruangan'}), 500
-
-        rooms = response.json()
-        return jsonify(rooms)
+        # Ambil data ruangan dari cache katalog Room Availability Service
+        return jsonify(catalog.get())
 
     # Error handling jika gagal request ke service availability
     except requests.exceptions.RequestException as e:
@@ -44,37 +536,36 @@ def get_rooms():
 def recommend_rooms():
     # Ambil parameter dari query string
     kapasitas = request.args.get('kapasitas', type=int)
-    lokasi = request.args.get('lokasi', '').lower()  # bisa kosong
+    lokasi = request.args.get('lokasi', '')  # bisa kosong
+    offset = request.args.get('offset', 0, type=int)
+    limit = request.args.get('limit', type=int)
 
     # Validasi parameter kapasitas wajib diisi
     if kapasitas is None:
         return jsonify({'error': 'Parameter "kapasitas" wajib diisi'}), 400
+    if offset < 0 or (limit is not None and limit < 0):
+        return jsonify({'error': 'Parameter "offset" dan "limit" tidak boleh negatif'}), 400
+    try:
+        # Jika ada rentang tanggal, hanya ruangan yang masih kosong yang direkomendasikan
+        date_range = parse_date_range(request.args.get('start_date'), request.args.get('end_date'))
+    except ValueError as e:
+        return jsonify({'error': f'Tanggal tidak valid: {str(e)}'}), 400
+    # Fasilitas atau bobot mengaktifkan penilaian multi-kriteria
+    fasilitas = request.args.get('fasilitas')
+    try:
+        weights = parse_weights(request.args['weights']) if request.args.get('weights') else None
+    except ValueError as e:
+        return jsonify({'error': f'Bobot tidak valid: {str(e)}'}), 400
 
     try:
-        # Ambil semua data ruangan dari Room Availability Service
-        response = requests.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms")
-        if response.status_code != 200:
-            return jsonify({'error': 'Gagal mengambil data ruangan'}), 500
-
-        rooms = response.json()
-
-        # Filter ruangan berdasarkan kapasitas dan (jika ada) lokasi
-        suitable_rooms = []
-        for room in rooms:
-            if room['kapasitas'] >= kapasitas:
-                if lokasi:
-                    if lokasi in room.get('lokasi', '').lower():
-                        suitable_rooms.append(room)
-                else:
-                    suitable_rooms.append(room)
-
-        # Urutkan hasil berdasarkan selisih kapasitas terkecil
-        suitable_rooms.sort(key=lambda x: abs(x['kapasitas'] - kapasitas))
+        # Cari di indeks katalog: kapasitas cukup dan (jika ada) lokasi,
+        # urut dari selisih kapasitas terkecil
+        rooms, total = find_recommendations(kapasitas, lokasi, date_range, offset, limit, fasilitas, weights)
 
         # Kembalikan hasil rekomendasi dalam format JSON
         return jsonify({
-            'recommended_rooms': suitable_rooms,
-            'total_recommendations': len(suitable_rooms)
+            'recommended_rooms': rooms,
+            'total_recommendations': total
         })
 
     # Error handling jika gagal request ke service availability
@@ -85,10 +576,184 @@ def recommend_rooms():
     except Exception as e:
         return jsonify({'error': f'Kesalahan tidak terduga: {str(e)}'}), 500
 
+def fetch_event_dates(event_ids):
+    """tanggal_mulai/tanggal_selesai and status_approval of many events from add_event_service, keyed by event_id."""
+    if not event_ids:
+        return {}
+    response = upstream.post(
+        f"{ADD_EVENT_SERVICE}/api/events/batch",
+        json={'ids': sorted(event_ids), 'fields': ['tanggal_mulai', 'tanggal_selesai', 'status_approval']}
+    )
+    response.raise_for_status()
+    return {int(event_id): event for event_id, event in response.json().items()}
+
+@app.route('/api/rooms/assign', methods=['POST'])
+def assign_rooms():
+    """
+    Plan rooms for many events at once and return the plan as request
+    bodies for room_booking_service POST /api/book-room/batch.
+
+    Body: {"events": [{"event_id", "kapasitas", "lokasi"}],
+    "default_kapasitas"}. Only event_id is required per event: kapasitas
+    falls back to default_kapasitas and lokasi is a preference. Without
+    "events" every approved event that has not ended yet is planned; listed
+    events that are not approved are reported as unassigned. Dates always
+    come from add_event_service, since that is what the batch booking path
+    books; dates sent along must match them.
+
+    The plan is greedy per start day (see plan_assignments): each day's
+    matching is optimal for the rooms still free, but earlier days are not
+    revisited, so it is not a global optimum.
+    """
+    data = request.get_json(silent=True) or {}
+    default_kapasitas = data.get('default_kapasitas')
+    today = date.today().isoformat()
+    try:
+        # Tanpa daftar event, rencanakan semua event disetujui yang belum selesai
+        all_approved = data.get('events') is None
+        if all_approved:
+            if default_kapasitas is None:
+                return jsonify({'error': '"default_kapasitas" wajib diisi jika "events" tidak diberikan'}), 400
+            response = upstream.get(f"{ADD_EVENT_SERVICE}/api/approved-events")
+            response.raise_for_status()
+            items = [event for event in response.json() if (event.get('tanggal_selesai') or '') >= today]
+        else:
+            items = data['events']
+        if not isinstance(items, list):
+            return jsonify({'error': '"events" harus berupa list'}), 400
+        if len(items) > ASSIGN_MAX_EVENTS:
+            return jsonify({'error': f'Maksimal {ASSIGN_MAX_EVENTS} event per permintaan'}), 400
+
+        # Validasi setiap event
+        errors = {}
+        events = {}
+        for position, item in enumerate(items):
+            try:
+                event_id = int(item['event_id'])
+                kapasitas = int(item.get('kapasitas', default_kapasitas))
+            except (KeyError, TypeError, ValueError, AttributeError):
+                errors[position] = 'event_id dan kapasitas (atau default_kapasitas) wajib berupa angka'
+                continue
+            lokasi = item.get('lokasi')
+            if kapasitas < 1:
+                errors[position] = 'kapasitas harus lebih dari 0'
+            elif lokasi is not None and not isinstance(lokasi, str):
+                errors[position] = 'lokasi harus berupa teks'
+            elif event_id in events:
+                errors[position] = f'event_id {event_id} duplikat'
+            else:
+                events[event_id] = {'event_id': event_id, 'kapasitas': kapasitas, 'lokasi': lokasi,
+                                    'position': position, 'requested': (item.get('tanggal_mulai'), item.get('tanggal_selesai'))}
+        if errors:
+            return jsonify({'error': 'Data event tidak valid', 'items': errors}), 400
+
+        # Tanggal selalu dari Add Event Service, sama dengan yang dibooking oleh /api/book-room/batch
+        stored = {int(item['event_id']): item for item in items} if all_approved else fetch_event_dates(set(events))
+        unassigned = []
+        planned = []
+        for event_id, event in events.items():
+            found = stored.get(event_id)
+            if not found:
+                unassigned.append({'event_id': event_id, 'reason': 'Event tidak ditemukan'})
+                continue
+            if not all_approved and found.get('status_approval') != 'Approved':
+                unassigned.append({'event_id': event_id, 'reason': 'Event belum disetujui'})
+                continue
+            event['tanggal_mulai'], event['tanggal_selesai'] = found.get('tanggal_mulai'), found.get('tanggal_selesai')
+            requested_mulai, requested_selesai = event['requested']
+            if (requested_mulai and requested_mulai != event['tanggal_mulai']) or \
+                    (requested_selesai and requested_selesai != event['tanggal_selesai']):
+                errors[event['position']] = (f"Tanggal berbeda dengan Add Event Service "
+                                             f"({event['tanggal_mulai']} s.d. {event['tanggal_selesai']})")
+                continue
+            try:
+                event['start'] = datetime.strptime(event['tanggal_mulai'], DATE_FORMAT).toordinal()
+                event['end'] = datetime.strptime(event['tanggal_selesai'], DATE_FORMAT).toordinal()
+            except (TypeError, ValueError):
+                unassigned.append({'event_id': event_id, 'reason': 'Tanggal event tidak valid'})
+                continue
+            if event['start'] > event['end']:
+                unassigned.append({'event_id': event_id, 'reason': 'tanggal_mulai setelah tanggal_selesai'})
+            elif event['tanggal_selesai'] < today:
+                unassigned.append({'event_id': event_id, 'reason': 'Event sudah selesai'})
+            else:
+                planned.append(event)
+        if errors:
+            return jsonify({'error': 'Data event tidak valid', 'items': errors}), 400
+
+        # Reservasi yang sudah ada di rentang rencana, sekali ambil untuk semua ruangan
+        reservations = []
+        if planned:
+            response = upstream.get(
+                f"{ROOM_AVAILABILITY_SERVICE}/reservations",
+                params={
+                    'start_date': datetime.fromordinal(min(event['start'] for event in planned)).strftime(DATE_FORMAT),
+                    'end_date': datetime.fromordinal(max(event['end'] for event in planned)).strftime(DATE_FORMAT)
+                }
+            )
+            response.raise_for_status()
+            reservations = [
+                {'room_id': reservation['room_id'], 'event_id': reservation['event_id'],
+                 'start': datetime.strptime(reservation['tanggal_mulai'], DATE_FORMAT).toordinal(),
+                 'end': datetime.strptime(reservation['tanggal_selesai'], DATE_FORMAT).toordinal()}
+                for reservation in response.json()['reservations']
+            ]
+        # Event yang sudah punya booking tidak direncanakan ulang
+        booked_events = {reservation['event_id'] for reservation in reservations}
+        unassigned += [{'event_id': event['event_id'], 'reason': 'Event sudah memiliki booking'}
+                       for event in planned if event['event_id'] in booked_events]
+        planned = [event for event in planned if event['event_id'] not in booked_events]
+
+        index = catalog.get_index()
+        assignments, rejected = plan_assignments(index, planned, reservations)
+        unassigned += [{'event_id': event['event_id'], 'reason': reason} for event, reason in rejected]
+
+        plan = []
+        for event, position in sorted(assignments, key=lambda assignment: (assignment[0]['start'], assignment[0]['event_id'])):
+            room = index.by_capacity[position]
+            plan.append({
+                'event_id': event['event_id'],
+                'room_id': room['room_id'],
+                'nama_ruangan': room['nama_ruangan'],
+                'lokasi': room['lokasi'],
+                'kapasitas': event['kapasitas'],
+                'kapasitas_ruangan': room['kapasitas'],
+                'tanggal_mulai': event['tanggal_mulai'],
+                'tanggal_selesai': event['tanggal_selesai']
+            })
+        items = [{'event_id': assignment['event_id'], 'room_id': assignment['room_id']} for assignment in plan]
+
+        return jsonify({
+            'assignments': plan,
+            'unassigned': sorted(unassigned, key=lambda item: item['event_id']),
+            # Siap dikirim satu per satu ke POST /api/book-room/batch
+            'batches': [{'items': items[start:start + BOOKING_BATCH_MAX]} for start in range(0, len(items), BOOKING_BATCH_MAX)],
+            'total_events': len(events),
+            'total_assigned': len(plan),
+            # Setiap tanggal mulai dicocokkan sekali, tanpa mengubah tanggal sebelumnya
+            'strategy': 'greedy_per_start_day'
+        })
+
+    # Error handling jika gagal request ke service lain
+    except requests.exceptions.RequestException as e:
+        return jsonify({'error': f'Gagal komunikasi ke service lain: {str(e)}'}), 500
+
+    # Error handling umum
+    except Exception as e:
+        return jsonify({'error': f'Kesalahan tidak terduga: {str(e)}'}), 500
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({'status': 'healthy'}), 200
 
+@app.route('/metrics/upstreams', methods=['GET'])
+def upstream_metrics():
+    return jsonify(upstream.stats()), 200
+
+@app.route('/metrics/catalog', methods=['GET'])
+def catalog_metrics():
+    return jsonify(catalog.stats()), 200
+
 # ====================
 # GraphQL
 # ====================
@@ -98,48 +763,41 @@ class RoomType(ObjectType):
     kapasitas = Int(required=True)
     fasilitas = String(required=True)
     lokasi = String(required=True)
+    score = graphene.Float()
+
+class ScoreWeightsInput(graphene.InputObjectType):
+    capacity = graphene.Float()
+    location = graphene.Float()
+    facilities = graphene.Float()
+    utilization = graphene.Float()
 
 class Query(ObjectType):
     rooms = graphene.List(RoomType)
     recommend_rooms = graphene.List(
         RoomType,
         kapasitas=graphene.Int(required=True),
-        lokasi=graphene.String()
+        lokasi=graphene.String(),
+        start_date=graphene.String(),
+        end_date=graphene.String(),
+        offset=graphene.Int(),
+        limit=graphene.Int(),
+        fasilitas=graphene.String(),
+        weights=graphene.Argument(ScoreWeightsInput)
     )
 
     def resolve_rooms(self, info):
         try:
-            response = requests.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms")
-            if response.status_code != 200:
-                return []
-            return response.json()
+            return catalog.get()
         except Exception as e:
             return []
 
-    def resolve_recommend_rooms(self, info, kapasitas, lokasi=None):
+    def resolve_recommend_rooms(self, info, kapasitas, lokasi=None, start_date=None, end_date=None,
+                                offset=0, limit=None, fasilitas=None, weights=None):
         try:
-            # Get all rooms from Room Availability Service
-            response = requests.get(f"{ROOM_AVAILABILITY_SERVICE}/rooms")
-            if response.status_code != 200:
-                return []
-
-            rooms = response.json()
-
-            # Filter rooms based on capacity and optional location
-            suitable_rooms = []
-            for room in rooms:
-                if room['kapasitas'] >= kapasitas:
-                    if lokasi:
-                        if lokasi.lower() in room.get('lokasi', '').lower():
-                            suitable_rooms.append(room)
-                    else:
-                        suitable_rooms.append(room)
-
-            # Sort results by smallest capacity difference
-            suitable_rooms.sort(key=lambda x: abs(x['kapasitas'] - kapasitas))
-
-            return suitable_rooms
-
+            date_range = parse_date_range(start_date, end_date)
+            weights = normalize_weights(dict(weights)) if weights is not None else None
+            rooms, _ = find_recommendations(kapasitas, lokasi, date_range, max(offset, 0), limit, fasilitas, weights)
+            return rooms
         except Exception as e:
             return []
 
@@ -195,20 +853,7 @@ def graphql():
     if not data:
         return jsonify({"error": "No input data provided"}), 400
 
-    result = schema.execute(
-        data.get("query"),
-        variables=data.get("variables"),
-        operation_name=data.get("operationName"),
-        context_value=request,
-    )
-
-    response = {}
-    if result.errors:
-        response["errors"] = [str(e) for e in result.errors]
-    if result.data:
-        response["data"] = result.data
-
-    status_code = 200 if not result.errors else 400
+    response, status_code = execute_query(schema, data, context_value=request)
     return jsonify(response), status_code
 
 # ====================
@@ -0,0 +1,65 @@
+import importlib.util
+import json
+import os
+import sys
+
+import pytest
+import requests
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='session')
+def service():
+    sys.path.insert(0, SERVICE_DIR)
+    spec = importlib.util.spec_from_file_location('room_recommendation_app', os.path.join(SERVICE_DIR, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FakeResponse:
+    def __init__(self, payload, status_code=200):
+        self.payload = payload
+        self.status_code = status_code
+        self.text = json.dumps(payload)
+        self.headers = {}
+
+    def json(self):
+        return self.payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f'{self.status_code}', response=self)
+
+
+class FakeUpstream:
+    """Routes upstream calls to handlers by method and URL fragment, and records them."""
+    respond = FakeResponse
+
+    def __init__(self):
+        self.routes = []
+        self.calls = []
+
+    def route(self, method, fragment, handler):
+        self.routes.append((method, fragment, handler))
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url))
+        for route_method, fragment, handler in self.routes:
+            if route_method == method and fragment in url:
+                result = handler(url, **kwargs)
+                return result if isinstance(result, FakeResponse) else FakeResponse(result)
+        raise AssertionError(f'Unexpected upstream call {method} {url}')
+
+
+@pytest.fixture
+def fake_upstream(service, monkeypatch):
+    fake = FakeUpstream()
+    monkeypatch.setattr(service.upstream, 'request', fake.request)
+    return fake
+
+
+@pytest.fixture
+def client(service, fake_upstream):
+    return service.app.test_client()
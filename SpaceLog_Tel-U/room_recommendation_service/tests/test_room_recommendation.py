@@ -0,0 +1,59 @@
+from itertools import permutations
+
+import numpy as np
+
+
+ROOMS = [
+    {'room_id': 1, 'nama_ruangan': 'A', 'kapasitas': 30, 'lokasi': 'Gedung A', 'fasilitas': 'AC'},
+    {'room_id': 2, 'nama_ruangan': 'B', 'kapasitas': 50, 'lokasi': 'Gedung B', 'fasilitas': 'AC'},
+]
+
+
+def test_assign_skips_events_that_are_not_approved(service, client, fake_upstream, monkeypatch):
+    monkeypatch.setattr(service.catalog, 'get_index', lambda: service.RoomIndex(ROOMS))
+    fake_upstream.route('POST', '/api/events/batch', lambda url, json, **kwargs: {
+        '1': {'tanggal_mulai': '2099-01-10', 'tanggal_selesai': '2099-01-10', 'status_approval': 'Approved'},
+        '2': {'tanggal_mulai': '2099-01-10', 'tanggal_selesai': '2099-01-10', 'status_approval': 'Pending'},
+        '3': {'tanggal_mulai': '2099-01-10', 'tanggal_selesai': '2099-01-10', 'status_approval': 'Rejected'},
+    })
+    fake_upstream.route('GET', '/reservations', lambda url, **kwargs: {'reservations': []})
+
+    response = client.post('/api/rooms/assign', json={
+        'events': [{'event_id': 1}, {'event_id': 2}, {'event_id': 3}],
+        'default_kapasitas': 20,
+    })
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [assignment['event_id'] for assignment in body['assignments']] == [1]
+    assert body['unassigned'] == [
+        {'event_id': 2, 'reason': 'Event belum disetujui'},
+        {'event_id': 3, 'reason': 'Event belum disetujui'},
+    ]
+    assert body['batches'] == [{'items': [{'event_id': 1, 'room_id': 1}]}]
+
+
+def brute_force_cost(cost):
+    """Cheapest way to match min(rows, columns) pairs, trying every assignment."""
+    rows, columns = cost.shape
+    if rows <= columns:
+        return min(sum(cost[row, column] for row, column in enumerate(chosen))
+                   for chosen in permutations(range(columns), rows))
+    return min(sum(cost[row, column] for column, row in enumerate(chosen))
+               for chosen in permutations(range(rows), columns))
+
+
+def test_min_cost_assignment_matches_brute_force(service):
+    rng = np.random.default_rng(7)
+    for _ in range(300):
+        rows, columns = rng.integers(1, 7, size=2)
+        cost = rng.integers(0, 10, size=(rows, columns)).astype(np.float64)
+        # Ties and infeasible pairs like the planner produces
+        cost[rng.random((rows, columns)) < 0.2] = service.INFEASIBLE_COST
+
+        assignment = service.min_cost_assignment(cost)
+
+        assigned = [(row, column) for row, column in enumerate(assignment) if column >= 0]
+        assert len(assigned) == min(rows, columns)
+        assert len({column for _, column in assigned}) == len(assigned)
+        assert sum(cost[row, column] for row, column in assigned) == brute_force_cost(cost)
@@ -3,11 +3,21 @@
 # ====================
 from flask import Flask, request, jsonify
 from flask_sqlalchemy import SQLAlchemy
+from db_config import configure_database
 from flask_cors import CORS
-from datetime import datetime
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import defaultdict
+from heapq import heappush, heappop
+import os
+import threading
+import time
 import requests
+from sqlalchemy import inspect, text
+from http_client import upstream
 from enum import Enum
 import graphene
+from graphql_cache import execute_query
 from graphene import ObjectType, String, Int, Field, List, Mutation
 
 # ====================
@@ -19,8 +29,7 @@ CORS(app)  # Mengaktifkan CORS agar bisa diakses dari frontend/backend lain
 # ====================
 # Service Endpoint Config
 # ====================
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///room_schedule.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+configure_database(app, 'sqlite:///room_schedule.db')
 
 ROOM_AVAILABILITY_SERVICE = "http://room_availability_service:5001"
 BOOKING_CONFIRMATION_SERVICE = "http://booking_confirmation_service:5006"
@@ -43,6 +52,16 @@ class RoomSchedule(db.Model):
     tanggal_selesai = db.Column(db.DateTime, nullable=False)
     status = db.Column(db.String(255), nullable=False)
     event_id = db.Column(db.Integer, nullable=False)
+    # Set on rows projected from approved bookings of room_booking_service
+    booking_id = db.Column(db.Integer)
+    room_name = db.Column(db.String(255))
+    event_name = db.Column(db.String(255))
+
+    __table_args__ = (
+        db.Index('ix_room_schedule_booking_id', 'booking_id', unique=True),
+        # Overlap checks: equality on room_id and status, range on the dates
+        db.Index('ix_room_schedule_room_status_dates', 'room_id', 'status', 'tanggal_mulai', 'tanggal_selesai'),
+    )
 
     def __repr__(self):
         return f'<Schedule {self.schedule_id} | Room {self.room_id} | Event {self.event_id}>'
@@ -50,8 +69,307 @@ class RoomSchedule(db.Model):
 # ====================
 # Create DB
 # ====================
+# Columns added after the table first shipped; create_all() does not alter existing tables
+ADDED_COLUMNS = {
+    'booking_id': 'INTEGER',
+    'room_name': 'VARCHAR(255)',
+    'event_name': 'VARCHAR(255)',
+}
+
 with app.app_context():
     db.create_all()
+    existing_columns = {column['name'] for column in inspect(db.engine).get_columns(RoomSchedule.__tablename__)}
+    for column, ddl in ADDED_COLUMNS.items():
+        if column not in existing_columns:
+            db.session.execute(text(f'ALTER TABLE {RoomSchedule.__tablename__} ADD COLUMN {column} {ddl}'))
+    db.session.commit()
+    for index in RoomSchedule.__table__.indexes:
+        index.create(db.engine, checkfirst=True)
+
+# ====================
+# Concurrent Upstream Fan-out
+# ====================
+FANOUT_WORKERS = int(os.getenv('FANOUT_WORKERS', '16'))
+FANOUT_PER_UPSTREAM = int(os.getenv('FANOUT_PER_UPSTREAM', '4'))
+FANOUT_DEADLINE = float(os.getenv('FANOUT_DEADLINE', '3'))
+FANOUT_CHUNK_SIZE = int(os.getenv('FANOUT_CHUNK_SIZE', '100'))
+CONNECT_TIMEOUT = 2
+
+fanout_pool = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='fanout')
+
+# Caps the calls in flight to one upstream, across all requests of this worker
+upstream_slots = {
+    ADD_EVENT_SERVICE: threading.BoundedSemaphore(FANOUT_PER_UPSTREAM),
+    ROOM_AVAILABILITY_SERVICE: threading.BoundedSemaphore(FANOUT_PER_UPSTREAM),
+}
+
+def fan_out(calls, deadline=FANOUT_DEADLINE):
+    """
+    Run calls concurrently, waiting at most deadline seconds in total.
+
+    calls maps a key to (upstream, fn); fn is called with the seconds left
+    before the deadline and should use them as its timeout. Returns
+    {key: result}; calls that fail or miss the deadline are left out.
+    """
+    expires = time.monotonic() + deadline
+
+    def run(upstream, fn):
+        slots = upstream_slots[upstream]
+        if not slots.acquire(timeout=max(0, expires - time.monotonic())):
+            raise TimeoutError(f'No free slot for {upstream} before the deadline')
+        try:
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError('Deadline passed while queued')
+            return fn(remaining)
+        finally:
+            slots.release()
+
+    futures = {fanout_pool.submit(run, upstream, fn): key for key, (upstream, fn) in calls.items()}
+    done, not_done = wait(futures, timeout=deadline)
+    for future in not_done:
+        future.cancel()
+        print(f"Fan-out call {futures[future]} missed the {deadline}s deadline")
+
+    results = {}
+    for future in done:
+        try:
+            results[futures[future]] = future.result()
+        except Exception as e:
+            print(f"Fan-out call {futures[future]} failed: {str(e)}")
+    return results
+
+def post_batch(url, payload, remaining):
+    response = upstream.post(url, json=payload, timeout=(CONNECT_TIMEOUT, remaining))
+    response.raise_for_status()
+    return response.json()
+
+def chunked(ids):
+    ids = sorted(ids)
+    return [tuple(ids[i:i + FANOUT_CHUNK_SIZE]) for i in range(0, len(ids), FANOUT_CHUNK_SIZE)]
+
+def fetch_names(event_ids, room_ids):
+    """
+    Return ({event_id: nama_event}, {room_id: nama_ruangan}), fetching every
+    chunk of ids from add_event_service and room_availability_service at once.
+    Ids whose chunk failed or timed out are missing from the maps.
+    """
+    calls = {}
+    for chunk in chunked(event_ids):
+        calls[('event', chunk)] = (ADD_EVENT_SERVICE, lambda remaining, chunk=chunk: post_batch(
+            f"{ADD_EVENT_SERVICE}/api/events/batch", {'ids': list(chunk), 'fields': ['nama_event']}, remaining))
+    for chunk in chunked(room_ids):
+        calls[('room', chunk)] = (ROOM_AVAILABILITY_SERVICE, lambda remaining, chunk=chunk: post_batch(
+            f"{ROOM_AVAILABILITY_SERVICE}/rooms/batch", {'ids': list(chunk)}, remaining))
+
+    event_names, room_names = {}, {}
+    for (kind, _), items in fan_out(calls).items():
+        for item_id, item in items.items():
+            if kind == 'event':
+                event_names[int(item_id)] = item.get('nama_event')
+            else:
+                room_names[int(item_id)] = item.get('nama_ruangan')
+    return event_names, room_names
+
+# ====================
+# Schedule Projection
+# ====================
+SCHEDULE_STATUS_APPROVED = 'Approved'
+REBUILD_PAGE_SIZE = 500
+# While the projection is still empty, a failed first rebuild is retried this often
+SCHEDULE_BOOTSTRAP_RETRY = float(os.getenv('SCHEDULE_BOOTSTRAP_RETRY', '10'))
+# Names that could not be looked up are retried in the background this often
+SCHEDULE_NAME_RETRY_INTERVAL = float(os.getenv('SCHEDULE_NAME_RETRY_INTERVAL', '300'))
+# room_booking_service holds a booking through its last day, while schedules
+# are half-open; projected rows therefore end at the last instant of that day
+BOOKING_DAY_END = timedelta(days=1, microseconds=-1)
+
+def booking_end(tanggal_selesai):
+    return datetime.strptime(tanggal_selesai, DATE_FORMAT) + BOOKING_DAY_END
+
+# Rows projected before the last day was held through its end
+with app.app_context():
+    midnight_ends = [
+        schedule_id for schedule_id, tanggal_selesai in db.session.query(
+            RoomSchedule.schedule_id, RoomSchedule.tanggal_selesai
+        ).filter(RoomSchedule.booking_id.isnot(None))
+        if tanggal_selesai == tanggal_selesai.replace(hour=0, minute=0, second=0, microsecond=0)
+    ]
+    for schedule in RoomSchedule.query.filter(RoomSchedule.schedule_id.in_(midnight_ends)).all():
+        schedule.tanggal_selesai += BOOKING_DAY_END
+    db.session.commit()
+
+def serialize_schedule(schedule):
+    return {
+        'schedule_id': schedule.schedule_id,
+        'booking_id': schedule.booking_id,
+        'room_id': schedule.room_id,
+        'room_name': schedule.room_name or 'Unknown Room',
+        'event_id': schedule.event_id,
+        'event_name': schedule.event_name or 'Unknown Event',
+        'tanggal_mulai': schedule.tanggal_mulai.strftime(DATE_FORMAT),
+        'tanggal_selesai': schedule.tanggal_selesai.strftime(DATE_FORMAT),
+        'status': schedule.status
+    }
+
+def fill_missing_names():
+    """Look up the names that were not available when approved rows were projected; the caller commits."""
+    missing = RoomSchedule.query.filter(
+        RoomSchedule.status == SCHEDULE_STATUS_APPROVED,
+        (RoomSchedule.room_name.is_(None)) | (RoomSchedule.event_name.is_(None))
+    ).all()
+    if not missing:
+        return
+    event_names, room_names = fetch_names(
+        {schedule.event_id for schedule in missing},
+        {schedule.room_id for schedule in missing}
+    )
+    for schedule in missing:
+        schedule.event_name = schedule.event_name or event_names.get(schedule.event_id)
+        schedule.room_name = schedule.room_name or room_names.get(schedule.room_id)
+
+def approved_schedules(room_id=None):
+    query = RoomSchedule.query.filter(RoomSchedule.status == SCHEDULE_STATUS_APPROVED)
+    if room_id is not None:
+        query = query.filter(RoomSchedule.room_id == room_id)
+    return query.order_by(RoomSchedule.tanggal_mulai, RoomSchedule.schedule_id).all()
+
+def project_bookings(bookings):
+    """
+    Upsert approved bookings into the projection and drop the rows of
+    bookings that are no longer approved. Names are fetched for new rows
+    only; a failed lookup leaves them empty for the background name retry.
+    Returns (upserted, removed). The caller commits.
+    """
+    bookings = {int(booking['booking_id']): booking for booking in bookings}
+    existing = {
+        schedule.booking_id: schedule
+        for schedule in RoomSchedule.query.filter(RoomSchedule.booking_id.in_(bookings)).all()
+    } if bookings else {}
+
+    approved = {booking_id: booking for booking_id, booking in bookings.items()
+                if booking.get('status') == SCHEDULE_STATUS_APPROVED}
+    new_or_moved = [booking for booking_id, booking in approved.items()
+                    if booking_id not in existing
+                    or existing[booking_id].event_id != booking['event_id']
+                    or existing[booking_id].room_id != booking['room_id']]
+    event_names, room_names = fetch_names(
+        {booking['event_id'] for booking in new_or_moved},
+        {booking['room_id'] for booking in new_or_moved}
+    ) if new_or_moved else ({}, {})
+
+    removed = 0
+    for booking_id, schedule in existing.items():
+        if booking_id not in approved:
+            db.session.delete(schedule)
+            removed += 1
+
+    for booking_id, booking in approved.items():
+        schedule = existing.get(booking_id)
+        if schedule is None:
+            schedule = RoomSchedule(booking_id=booking_id)
+            db.session.add(schedule)
+        if schedule.event_id != booking['event_id'] or schedule.room_id != booking['room_id']:
+            schedule.event_name = event_names.get(booking['event_id'])
+            schedule.room_name = room_names.get(booking['room_id'])
+        schedule.room_id = booking['room_id']
+        schedule.event_id = booking['event_id']
+        schedule.tanggal_mulai = datetime.strptime(booking['tanggal_mulai'], DATE_FORMAT)
+        schedule.tanggal_selesai = booking_end(booking['tanggal_selesai'])
+        schedule.status = SCHEDULE_STATUS_APPROVED
+    return len(approved), removed
+
+def reconcile_bookings():
+    """
+    Have room_booking_service pull the approvals it missed from
+    booking_confirmation_service, so its approved list is current.
+    """
+    response = upstream.post(f"{ROOM_BOOKING_SERVICE}/api/bookings/reconcile")
+    response.raise_for_status()
+    return response.json()
+
+def fetch_approved_bookings():
+    """Page through every approved booking of room_booking_service."""
+    bookings = []
+    params = {'status': SCHEDULE_STATUS_APPROVED, 'limit': REBUILD_PAGE_SIZE}
+    while True:
+        response = upstream.get(f"{ROOM_BOOKING_SERVICE}/api/bookings", params=params)
+        response.raise_for_status()
+        # The status filter matches room_booking's own status, which is what the
+        # outbox mirrors; the listed status is looked up live and may lag behind
+        bookings.extend(dict(booking, status=SCHEDULE_STATUS_APPROVED) for booking in response.json())
+        next_cursor = response.headers.get('X-Next-Cursor')
+        if not next_cursor:
+            return bookings
+        params['cursor'] = next_cursor
+
+def rebuild_projection():
+    """
+    Resync the whole projection from room_booking_service and fill in
+    missing names. Returns (upserted, removed); raises on failure.
+    """
+    reconcile_bookings()
+    bookings = fetch_approved_bookings()
+    try:
+        booking_ids = {int(booking['booking_id']) for booking in bookings}
+        stale = RoomSchedule.query.filter(
+            RoomSchedule.booking_id.isnot(None),
+            RoomSchedule.booking_id.notin_(booking_ids)
+        ).delete(synchronize_session=False)
+        upserted, removed = project_bookings(bookings)
+        fill_missing_names()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    print(f"Schedule projection rebuilt: {upserted} approved bookings, {stale + removed} rows removed")
+    return upserted, stale + removed
+
+class ProjectionMaintainer:
+    """
+    Background upkeep of the projection, one thread per process. On first
+    start, while no row has come from a booking yet, it rebuilds the
+    projection from room_booking_service until that succeeds. Afterwards it
+    retries missing names every SCHEDULE_NAME_RETRY_INTERVAL seconds, so
+    reads never call upstream.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def start(self):
+        """Start the thread once per process, also in a freshly forked worker."""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='schedule-projection', daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                with app.app_context():
+                    if not RoomSchedule.query.filter(RoomSchedule.booking_id.isnot(None)).first():
+                        rebuild_projection()
+                break
+            except Exception as e:
+                print(f"Schedule projection bootstrap failed, retrying in {SCHEDULE_BOOTSTRAP_RETRY}s: {str(e)}")
+                time.sleep(SCHEDULE_BOOTSTRAP_RETRY)
+
+        while True:
+            time.sleep(SCHEDULE_NAME_RETRY_INTERVAL)
+            try:
+                with app.app_context():
+                    fill_missing_names()
+                    db.session.commit()
+            except Exception as e:
+                print(f"Schedule name lookup failed: {str(e)}")
+
+maintainer = ProjectionMaintainer()
+
+@app.before_request
+def start_projection_maintainer():
+    maintainer.start()
 
 # ====================
 # REST Endpoints
@@ -59,87 +377,56 @@ with app.app_context():
 @app.route('/schedules/<int:room_id>', methods=['GET'])
 def get_room_schedules(room_id):
     try:
-        print(f"\n=== Fetching schedules for room {room_id} ===")
-        
-        # Get all bookings for the room from room_booking_service
-        bookings_response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings")
-        print(f"Bookings response status: {bookings_response.status_code}")
-        
-        if bookings_response.status_code != 200:
-            print(f"Error response from booking service: {bookings_response.text}")
-            return jsonify({'error': 'Failed to fetch bookings'}), 500
-
-        all_bookings = bookings_response.json()
-        print(f"Total bookings received: {len(all_bookings)}")
-        print(f"Sample booking data: {all_bookings[0] if all_bookings else 'No bookings'}")
-        
-        # Filter bookings for this room and approved status
-        room_bookings = [
-            b for b in all_bookings 
-            if str(b.get('room_id')) == str(room_id) and b.get('status') == 'Approved'
-        ]
-        print(f"Filtered bookings for room {room_id}: {len(room_bookings)}")
-        print(f"Filtered bookings data: {room_bookings}")
-        
-        if not room_bookings:
-            print(f"No approved bookings found for room {room_id}")
+        schedules = approved_schedules(room_id)
+        if not schedules:
             return jsonify({'message': 'Tidak ada jadwal yang disetujui untuk ruangan ini.'}), 200
-
-        results = []
-        for booking in room_bookings:
-            try:
-                print(f"\nProcessing booking: {booking}")
-                
-                # Get event details from add_event_service
-                event_response = requests.get(
-                    f"{ADD_EVENT_SERVICE}/api/events/{booking['event_id']}",
-                    timeout=2
-                )
-                event_data = event_response.json() if event_response.status_code == 200 else {}
-                print(f"Event data: {event_data}")
-
-                # Get room details
-                room_response = requests.get(
-                    f"{ROOM_AVAILABILITY_SERVICE}/rooms/{room_id}",
-                    timeout=2
-                )
-                room_data = room_response.json() if room_response.status_code == 200 else {}
-                print(f"Room data: {room_data}")
-
-                schedule_data = {
-                    'booking_id': booking['booking_id'],
-                    'room_id': booking['room_id'],
-                    'room_name': room_data.get('nama_ruangan', 'Unknown Room'),
-                    'event_id': booking['event_id'],
-                    'event_name': event_data.get('nama_event', 'Unknown Event'),
-                    'tanggal_mulai': booking['tanggal_mulai'],
-                    'tanggal_selesai': booking['tanggal_selesai'],
-                    'status': booking['status']
-                }
-                print(f"Processed schedule data: {schedule_data}")
-                results.append(schedule_data)
-                
-            except requests.exceptions.RequestException as e:
-                print(f"Error fetching additional data: {str(e)}")
-                # Fallback jika service error
-                results.append({
-                    'booking_id': booking['booking_id'],
-                    'room_id': booking['room_id'],
-                    'room_name': 'Unknown Room',
-                    'event_id': booking['event_id'],
-                    'event_name': 'Unknown Event',
-                    'tanggal_mulai': booking['tanggal_mulai'],
-                    'tanggal_selesai': booking['tanggal_selesai'],
-                    'status': booking['status']
-                })
-
-        print(f"\nFinal results: {results}")
-        return jsonify(results), 200
+        return jsonify([serialize_schedule(schedule) for schedule in schedules]), 200
 
     except Exception as e:
         print(f"Error in get_room_schedules: {str(e)}")
         return jsonify({'error': f'Failed to fetch schedules: {str(e)}'}), 500
 
+# Projection updates, delivered in order by the room_booking_service outbox
+@app.route('/schedules/sync', methods=['POST'])
+def sync_schedules():
+    data = request.get_json()
+    if not isinstance(data, list):
+        return jsonify({'error': 'Expected a list of bookings'}), 400
+    required_fields = ['booking_id', 'room_id', 'event_id', 'tanggal_mulai', 'tanggal_selesai', 'status']
+    if not all(isinstance(item, dict) and all(field in item for field in required_fields) for item in data):
+        return jsonify({'error': 'Missing required fields'}), 400
+
+    try:
+        upserted, removed = project_bookings(data)
+        db.session.commit()
+        return jsonify({'upserted': upserted, 'removed': removed}), 200
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': f'Invalid date format: {str(e)}'}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to sync schedules: {str(e)}'}), 500
+
+@app.route('/schedules/booking/<int:booking_id>', methods=['DELETE'])
+def delete_booking_schedule(booking_id):
+    schedule = RoomSchedule.query.filter_by(booking_id=booking_id).first()
+    if not schedule:
+        return jsonify({'error': 'Schedule not found'}), 404
+    db.session.delete(schedule)
+    db.session.commit()
+    return jsonify({'message': 'Schedule removed'}), 200
+
+@app.route('/schedules/rebuild', methods=['POST'])
+def rebuild_schedules():
+    """Resync the whole projection from room_booking_service, e.g. after lost updates."""
+    try:
+        upserted, removed = rebuild_projection()
+        return jsonify({'upserted': upserted, 'removed': removed}), 200
+    except requests.exceptions.RequestException as e:
+        return jsonify({'error': f'Failed to fetch bookings: {str(e)}'}), 502
+    except Exception as e:
+        return jsonify({'error': f'Failed to rebuild schedules: {str(e)}'}), 500
+
 # Add Schedule Endpoint (for internal use by booking confirmation service)
 @app.route('/add-schedule', methods=['POST'])
 def add_schedule():
@@ -198,6 +485,128 @@ def add_schedule():
         db.session.rollback()
         return jsonify({'error': f'Failed to add schedule: {str(e)}'}), 500
 
+# ====================
+# Bulk Schedule Import
+# ====================
+SCHEDULE_BATCH_MAX = 1000
+
+def overlapping_pairs(intervals):
+    """
+    Sort-and-sweep over (start, end, key) intervals of one room, treated as
+    half-open like the single-schedule check; projected bookings already end
+    at the close of their last day. Yields every overlapping pair
+    (earlier key, later key) in O(n log n + pairs).
+    """
+    active = []  # (end, seq, key) of intervals that may still overlap
+    for seq, (start, end, key) in enumerate(sorted(intervals, key=lambda interval: (interval[0], interval[1]))):
+        while active and active[0][0] <= start:
+            heappop(active)
+        for _, _, other in active:
+            yield other, key
+        heappush(active, (end, seq, key))
+
+def find_batch_conflicts(items):
+    """
+    Check the approved items of a batch against the approved schedules in the
+    database and against each other, with one query for the whole batch.
+    items are (position, room_id, start, end); returns {position: (rows, positions)}.
+    """
+    if not items:
+        return {}
+    existing = RoomSchedule.query.filter(
+        RoomSchedule.room_id.in_({room_id for _, room_id, _, _ in items}),
+        RoomSchedule.status == 'Approved',
+        RoomSchedule.tanggal_selesai > min(start for _, _, start, _ in items),
+        RoomSchedule.tanggal_mulai < max(end for _, _, _, end in items)
+    ).all()
+
+    intervals = defaultdict(list)
+    for row in existing:
+        intervals[row.room_id].append((row.tanggal_mulai, row.tanggal_selesai, ('row', row)))
+    for position, room_id, start, end in items:
+        intervals[room_id].append((start, end, ('item', position)))
+
+    conflicts = {}
+    for room_intervals in intervals.values():
+        for (kind_a, a), (kind_b, b) in overlapping_pairs(room_intervals):
+            if kind_a == 'row' and kind_b == 'row':
+                continue
+            for (kind, value), (other_kind, other) in (((kind_a, a), (kind_b, b)), ((kind_b, b), (kind_a, a))):
+                if kind == 'item':
+                    rows, positions = conflicts.setdefault(value, ([], []))
+                    (rows if other_kind == 'row' else positions).append(other)
+    return conflicts
+
+@app.route('/add-schedules', methods=['POST'])
+def add_schedules():
+    """Add a batch of schedules atomically: all are inserted, or none if any item is invalid or conflicts."""
+    data = request.get_json()
+    items = data.get('schedules') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'Expected a non-empty list of schedules'}), 400
+    if len(items) > SCHEDULE_BATCH_MAX:
+        return jsonify({'error': f'At most {SCHEDULE_BATCH_MAX} schedules per batch'}), 400
+
+    required_fields = ['room_id', 'event_id', 'tanggal_mulai', 'tanggal_selesai', 'status']
+    schedules = []
+    errors = []
+    for position, item in enumerate(items):
+        if not isinstance(item, dict) or not all(field in item for field in required_fields):
+            errors.append({'index': position, 'error': 'Missing required fields'})
+            continue
+        try:
+            tanggal_mulai = datetime.strptime(item['tanggal_mulai'], DATE_FORMAT)
+            tanggal_selesai = datetime.strptime(item['tanggal_selesai'], DATE_FORMAT)
+        except (TypeError, ValueError) as e:
+            errors.append({'index': position, 'error': f'Invalid date format: {str(e)}'})
+            continue
+        if tanggal_mulai >= tanggal_selesai:
+            errors.append({'index': position, 'error': 'Start time must be before end time'})
+            continue
+        schedules.append(RoomSchedule(
+            room_id=item['room_id'],
+            event_id=item['event_id'],
+            tanggal_mulai=tanggal_mulai,
+            tanggal_selesai=tanggal_selesai,
+            status=item['status']
+        ))
+    if errors:
+        return jsonify({'error': 'Invalid schedules', 'items': errors}), 400
+
+    try:
+        # Cek konflik hanya untuk status 'Approved', seperti add_schedule
+        conflicts = find_batch_conflicts([
+            (position, schedule.room_id, schedule.tanggal_mulai, schedule.tanggal_selesai)
+            for position, schedule in enumerate(schedules)
+            if schedule.status == 'Approved'
+        ])
+        if conflicts:
+            return jsonify({
+                'error': 'Schedule conflict detected with approved schedules',
+                'items': [{
+                    'index': position,
+                    'conflicts': [{
+                        'schedule_id': c.schedule_id,
+                        'event_id': c.event_id,
+                        'tanggal_mulai': c.tanggal_mulai.strftime(DATE_FORMAT),
+                        'tanggal_selesai': c.tanggal_selesai.strftime(DATE_FORMAT)
+                    } for c in rows],
+                    'conflicting_items': sorted(positions)
+                } for position, (rows, positions) in sorted(conflicts.items())]
+            }), 409
+
+        db.session.add_all(schedules)
+        db.session.commit()
+
+        return jsonify({
+            'schedule_ids': [schedule.schedule_id for schedule in schedules],
+            'message': f'{len(schedules)} schedules added successfully'
+        }), 201
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to add schedules: {str(e)}'}), 500
+
 # Update Schedule
 @app.route('/update-schedule/<int:schedule_id>', methods=['PUT'])
 def update_schedule(schedule_id):
@@ -217,7 +626,10 @@ def update_schedule(schedule_id):
         if 'tanggal_mulai' in data:
             schedule.tanggal_mulai = datetime.strptime(data['tanggal_mulai'], DATE_FORMAT)
         if 'tanggal_selesai' in data:
-            schedule.tanggal_selesai = datetime.strptime(data['tanggal_selesai'], DATE_FORMAT)
+            if schedule.booking_id is not None:
+                schedule.tanggal_selesai = booking_end(data['tanggal_selesai'])
+            else:
+                schedule.tanggal_selesai = datetime.strptime(data['tanggal_selesai'], DATE_FORMAT)
         if 'status' in data:
             schedule.status = data['status']
 
@@ -261,6 +673,10 @@ def update_schedule(schedule_id):
 def health_check():
     return jsonify({'status': 'healthy'}), 200
 
+@app.route('/metrics/upstreams', methods=['GET'])
+def upstream_metrics():
+    return jsonify(upstream.stats()), 200
+
 # ====================
 # GraphQL
 # ====================
@@ -281,181 +697,16 @@ class Query(ObjectType):
     room_schedules = graphene.List(RoomScheduleType, room_id=graphene.Int(required=True))
 
     def resolve_approved_schedules(self, info):
-        try:
-            # Get all bookings from room_booking_service
-            bookings_response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings")
-            if bookings_response.status_code != 200:
-                return []
-
-            all_bookings = bookings_response.json()
-            
-            # Filter approved bookings
-            approved_bookings = [b for b in all_bookings if b.get('status') == 'Approved']
-            
-            results = []
-            for booking in approved_bookings:
-                try:
-                    # Get event details
-                    event_response = requests.get(
-                        f"{ADD_EVENT_SERVICE}/api/events/{booking['event_id']}",
-                        timeout=2
-                    )
-                    event_data = event_response.json() if event_response.status_code == 200 else {}
-
-                    # Get room details
-                    room_response = requests.get(
-                        f"{ROOM_AVAILABILITY_SERVICE}/rooms/{booking['room_id']}",
-                        timeout=2
-                    )
-                    room_data = room_response.json() if room_response.status_code == 200 else {}
-
-                    schedule_data = {
-                        'booking_id': booking['booking_id'],
-                        'room_id': booking['room_id'],
-                        'room_name': room_data.get('nama_ruangan', 'Unknown Room'),
-                        'event_id': booking['event_id'],
-                        'event_name': event_data.get('nama_event', 'Unknown Event'),
-                        'tanggal_mulai': booking['tanggal_mulai'],
-                        'tanggal_selesai': booking['tanggal_selesai'],
-                        'status': booking['status']
-                    }
-                    results.append(schedule_data)
-                    
-                except requests.exceptions.RequestException:
-                    # Fallback if service error
-                    results.append({
-                        'booking_id': booking['booking_id'],
-                        'room_id': booking['room_id'],
-                        'room_name': 'Unknown Room',
-                        'event_id': booking['event_id'],
-                        'event_name': 'Unknown Event',
-                        'tanggal_mulai': booking['tanggal_mulai'],
-                        'tanggal_selesai': booking['tanggal_selesai'],
-                        'status': booking['status']
-                    })
-
-            return results
-
-        except Exception as e:
-            return []
+        return [serialize_schedule(schedule) for schedule in approved_schedules()]
 
     def resolve_approved_schedule(self, info, booking_id):
-        try:
-            # Get booking from room_booking_service
-            booking_response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings/{booking_id}")
-            if booking_response.status_code != 200:
-                return None
-
-            booking = booking_response.json()
-            
-            # Check if booking is approved
-            if booking.get('status') != 'Approved':
-                return None
-
-            try:
-                # Get event details
-                event_response = requests.get(
-                    f"{ADD_EVENT_SERVICE}/api/events/{booking['event_id']}",
-                    timeout=2
-                )
-                event_data = event_response.json() if event_response.status_code == 200 else {}
-
-                # Get room details
-                room_response = requests.get(
-                    f"{ROOM_AVAILABILITY_SERVICE}/rooms/{booking['room_id']}",
-                    timeout=2
-                )
-                room_data = room_response.json() if room_response.status_code == 200 else {}
-
-                return {
-                    'booking_id': booking['booking_id'],
-                    'room_id': booking['room_id'],
-                    'room_name': room_data.get('nama_ruangan', 'Unknown Room'),
-                    'event_id': booking['event_id'],
-                    'event_name': event_data.get('nama_event', 'Unknown Event'),
-                    'tanggal_mulai': booking['tanggal_mulai'],
-                    'tanggal_selesai': booking['tanggal_selesai'],
-                    'status': booking['status']
-                }
-                
-            except requests.exceptions.RequestException:
-                # Fallback if service error
-                return {
-                    'booking_id': booking['booking_id'],
-                    'room_id': booking['room_id'],
-                    'room_name': 'Unknown Room',
-                    'event_id': booking['event_id'],
-                    'event_name': 'Unknown Event',
-                    'tanggal_mulai': booking['tanggal_mulai'],
-                    'tanggal_selesai': booking['tanggal_selesai'],
-                    'status': booking['status']
-                }
-
-        except Exception as e:
+        schedule = RoomSchedule.query.filter_by(booking_id=booking_id, status=SCHEDULE_STATUS_APPROVED).first()
+        if not schedule:
             return None
+        return serialize_schedule(schedule)
 
     def resolve_room_schedules(self, info, room_id):
-        try:
-            # Get all bookings from room_booking_service
-            bookings_response = requests.get(f"{ROOM_BOOKING_SERVICE}/api/bookings")
-            if bookings_response.status_code != 200:
-                return []
-
-            all_bookings = bookings_response.json()
-            
-            # Filter bookings for this room and approved status
-            room_bookings = [
-                b for b in all_bookings 
-                if str(b.get('room_id')) == str(room_id) and b.get('status') == 'Approved'
-            ]
-            
-            results = []
-            for booking in room_bookings:
-                try:
-                    # Get event details
-                    event_response = requests.get(
-                        f"{ADD_EVENT_SERVICE}/api/events/{booking['event_id']}",
-                        timeout=2
-                    )
-                    event_data = event_response.json() if event_response.status_code == 200 else {}
-
-                    # Get room details
-                    room_response = requests.get(
-                        f"{ROOM_AVAILABILITY_SERVICE}/rooms/{room_id}",
-                        timeout=2
-                    )
-                    room_data = room_response.json() if room_response.status_code == 200 else {}
-
-                    schedule_data = {
-                        'booking_id': booking['booking_id'],
-                        'room_id': booking['room_id'],
-                        'room_name': room_data.get('nama_ruangan', 'Unknown Room'),
-                        'event_id': booking['event_id'],
-                        'event_name': event_data.get('nama_event', 'Unknown Event'),
-                        'tanggal_mulai': booking['tanggal_mulai'],
-                        'tanggal_selesai': booking['tanggal_selesai'],
-                        'status': booking['status']
-                    }
-                    results.append(schedule_data)
-                    
-                except requests.exceptions.RequestException:
-                    # Fallback if service error
-                    results.append({
-                        'booking_id': booking['booking_id'],
-                        'room_id': booking['room_id'],
-                        'room_name': 'Unknown Room',
-                        'event_id': booking['event_id'],
-                        'event_name': 'Unknown Event',
-                        'tanggal_mulai': booking['tanggal_mulai'],
-                        'tanggal_selesai': booking['tanggal_selesai'],
-                        'status': booking['status']
-                    })
-
-            return results
-
-        except Exception as e:
-            print(f"Error in resolve_room_schedules: {str(e)}")
-            return []
+        return [serialize_schedule(schedule) for schedule in approved_schedules(room_id)]
 
 schema = graphene.Schema(query=Query)
 
@@ -509,20 +760,7 @@ def graphql():
     if not data:
         return jsonify({"error": "No input data provided"}), 400
 
-    result = schema.execute(
-        data.get("query"),
-        variables=data.get("variables"),
-        operation_name=data.get("operationName"),
-        context_value=request,
-    )
-
-    response = {}
-    if result.errors:
-        response["errors"] = [str(e) for e in result.errors]
-    if result.data:
-        response["data"] = result.data
-
-    status_code = 200 if not result.errors else 400
+    response, status_code = execute_query(schema, data, context_value=request)
     return jsonify(response), status_code
 
 # =====================
@@ -0,0 +1,30 @@
+import importlib.util
+import os
+import sys
+import tempfile
+
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(scope='session')
+def service():
+    """The service module on a throwaway SQLite file, without its background thread."""
+    sys.path.insert(0, SERVICE_DIR)
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'room_schedule.db')
+    spec = importlib.util.spec_from_file_location('room_schedule_app', os.path.join(SERVICE_DIR, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.maintainer._pid = os.getpid()
+    return module
+
+
+@pytest.fixture
+def client(service, monkeypatch):
+    # Projected rows are left without names instead of calling upstream
+    monkeypatch.setattr(service, 'fetch_names', lambda event_ids, room_ids: ({}, {}))
+    yield service.app.test_client()
+    with service.app.app_context():
+        service.RoomSchedule.query.delete()
+        service.db.session.commit()
@@ -0,0 +1,107 @@
+def sync_booking(client, booking_id, tanggal_mulai, tanggal_selesai, room_id=1):
+    response = client.post('/schedules/sync', json=[{
+        'booking_id': booking_id,
+        'room_id': room_id,
+        'event_id': booking_id,
+        'tanggal_mulai': tanggal_mulai,
+        'tanggal_selesai': tanggal_selesai,
+        'status': 'Approved',
+    }])
+    assert response.status_code == 200
+
+
+def add_schedule(client, tanggal_mulai, tanggal_selesai, room_id=1):
+    return client.post('/add-schedule', json={
+        'room_id': room_id,
+        'event_id': 99,
+        'tanggal_mulai': tanggal_mulai,
+        'tanggal_selesai': tanggal_selesai,
+        'status': 'Approved',
+    })
+
+
+def test_one_day_booking_blocks_its_day(client):
+    sync_booking(client, 1, '2030-01-10', '2030-01-10')
+
+    assert add_schedule(client, '2030-01-10', '2030-01-11').status_code == 409
+    assert add_schedule(client, '2030-01-09', '2030-01-11').status_code == 409
+    assert add_schedule(client, '2030-01-11', '2030-01-12').status_code == 201
+
+
+def test_multi_day_booking_blocks_its_last_day(client):
+    sync_booking(client, 1, '2030-01-10', '2030-01-12')
+
+    assert add_schedule(client, '2030-01-12', '2030-01-13').status_code == 409
+    # Half-open manual schedule ending when the booking starts
+    assert add_schedule(client, '2030-01-09', '2030-01-10').status_code == 201
+    assert add_schedule(client, '2030-01-13', '2030-01-14').status_code == 201
+
+
+def test_other_room_is_not_blocked(client):
+    sync_booking(client, 1, '2030-01-10', '2030-01-10')
+
+    assert add_schedule(client, '2030-01-10', '2030-01-11', room_id=2).status_code == 201
+
+
+def test_batch_checks_projected_last_day(client):
+    sync_booking(client, 1, '2030-01-10', '2030-01-10')
+    sync_booking(client, 2, '2030-02-01', '2030-02-03')
+
+    response = client.post('/add-schedules', json=[
+        {'room_id': 1, 'event_id': 7, 'tanggal_mulai': '2030-01-10', 'tanggal_selesai': '2030-01-11', 'status': 'Approved'},
+        {'room_id': 1, 'event_id': 8, 'tanggal_mulai': '2030-02-03', 'tanggal_selesai': '2030-02-04', 'status': 'Approved'},
+    ])
+
+    assert response.status_code == 409
+
+
+def test_update_onto_projected_last_day_conflicts(client):
+    sync_booking(client, 1, '2030-01-10', '2030-01-12')
+    schedule_id = add_schedule(client, '2030-01-13', '2030-01-14').get_json()['schedule_id']
+
+    response = client.put(f'/update-schedule/{schedule_id}', json={'tanggal_mulai': '2030-01-12'})
+
+    assert response.status_code == 409
+
+
+def test_projected_rows_keep_their_booking_dates(client):
+    sync_booking(client, 1, '2030-01-10', '2030-01-12')
+
+    schedules = client.get('/schedules/1').get_json()
+
+    assert [(s['tanggal_mulai'], s['tanggal_selesai']) for s in schedules] == [('2030-01-10', '2030-01-12')]
+
+
+def test_rebuild_reconciles_bookings_first(service, client, monkeypatch):
+    calls = []
+
+    class Response:
+        headers = {}
+
+        def __init__(self, payload):
+            self.payload = payload
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return self.payload
+
+    def post(url, **kwargs):
+        calls.append(url)
+        return Response({'checked': 1, 'updated': 1})
+
+    def get(url, **kwargs):
+        calls.append(url)
+        return Response([{'booking_id': 5, 'room_id': 1, 'event_id': 5,
+                          'tanggal_mulai': '2030-03-01', 'tanggal_selesai': '2030-03-01'}])
+
+    monkeypatch.setattr(service.upstream, 'post', post)
+    monkeypatch.setattr(service.upstream, 'get', get)
+
+    response = client.post('/schedules/rebuild')
+
+    assert response.status_code == 200
+    assert calls[0].endswith('/api/bookings/reconcile')
+    assert calls[1].endswith('/api/bookings')
+    assert add_schedule(client, '2030-03-01', '2030-03-02').status_code == 409